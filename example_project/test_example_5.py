@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+
+from skd_smoke import SmokeTestCase
+
+from articles.models import Article
+
+
+# the first class builds and captures articles, the second one restores them
+# from snapshot
+SNAPSHOT_DIR = tempfile.mkdtemp()
+
+
+def tearDownModule():
+    shutil.rmtree(SNAPSHOT_DIR)
+
+
+def create_articles(cls):
+    Article.objects.bulk_create(Article(headline='article #%s' % i)
+                                for i in range(100))
+    return {'first_article_pk': Article.objects.earliest('pk').pk}
+
+
+def get_first_article_kwargs(testcase):
+    return {'pk': testcase.first_article_pk}
+
+
+class BuiltArticlesSmokeTestCase(SmokeTestCase):
+    SNAPSHOT_INITIALIZE = create_articles
+    SNAPSHOT_DIR = SNAPSHOT_DIR
+    TESTS_CONFIGURATION = (
+        ('articles:article', 200, 'GET',
+            {'url_kwargs': get_first_article_kwargs,
+             'comment': 'Articles are built and captured into snapshot.'}),
+    )
+
+
+class RestoredArticlesSmokeTestCase(SmokeTestCase):
+    SNAPSHOT_INITIALIZE = create_articles
+    SNAPSHOT_DIR = SNAPSHOT_DIR
+    TESTS_CONFIGURATION = (
+        ('articles:article', 200, 'GET',
+            {'url_kwargs': get_first_article_kwargs,
+             'comment': 'Articles are restored from snapshot.'}),
+    )
@@ -1,16 +1,45 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
 
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
 import traceback
-from uuid import uuid4
-from six import string_types
-
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+from functools import partial
+from importlib import import_module
+from timeit import default_timer
+from unittest import SkipTest
+
+from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.core.handlers.wsgi import STATUS_CODE_TEXT
+from django.core.signals import got_request_exception
+from django.core.urlresolvers import get_script_prefix, get_urlconf
+from django.db import connection, connections, transaction
+from django.http import HttpRequest
 from django.shortcuts import resolve_url
 
-from django.test import TestCase
+from django.test import SimpleTestCase, TestCase
+from django.test.client import store_rendered_templates
+from django.test.signals import setting_changed, template_rendered
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import six
+from django.utils.six import string_types, integer_types
+from django.utils.six.moves.http_cookies import SimpleCookie
+from django.utils.six.moves.queue import Empty, Queue
+from django.utils.translation import get_language
+
+# feature modules are imported where they are used so import of the package
+# stays cheap, modules of public helpers are small
+from skd_smoke.memoize import MemoizedCallback, memoized, \
+    collect_memoized_callbacks, prepare_memoized_results
+from skd_smoke.users import UserPool
 
 # start configuration error messages
 IMPROPERLY_BUILT_CONFIGURATION_MSG = \
@@ -49,6 +78,47 @@ def dict_or_callable(d):
     return isinstance(d, dict) or callable(d)
 
 
+def positive_number(n):
+    return isinstance(n, integer_types + (float,)) and \
+        not isinstance(n, bool) and n > 0
+
+
+def non_negative_int(n):
+    return isinstance(n, integer_types) and not isinstance(n, bool) and n >= 0
+
+
+def memory_budget(n):
+    from skd_smoke.memory import TRACEMALLOC_AVAILABLE
+
+    return TRACEMALLOC_AVAILABLE and positive_number(n)
+
+
+def leak_check_value(value):
+    from skd_smoke.memory import TRACEMALLOC_AVAILABLE
+
+    return value is False or TRACEMALLOC_AVAILABLE and (
+        value is True or positive_number(value))
+
+
+def positive_int(n):
+    return non_negative_int(n) and n > 0
+
+
+def profile_mode(value):
+    from skd_smoke.profiling import PROFILE_MODES
+
+    return value in PROFILE_MODES
+
+
+def batch_value(value):
+    return isinstance(value, bool) or positive_int(value)
+
+
+def non_negative_number(n):
+    return isinstance(n, integer_types + (float,)) and \
+        not isinstance(n, bool) and n >= 0
+
+
 # name and function
 NOT_REQUIRED_PARAM_TYPE_CHECK = {
     'comment': {'type': 'string', 'func': check_type(string_types)},
@@ -58,8 +128,56 @@ NOT_REQUIRED_PARAM_TYPE_CHECK = {
     'request_data': {'type': 'dict or callable', 'func': dict_or_callable},
     'user_credentials': {'type': 'dict or callable', 'func': dict_or_callable},
     'redirect_to': {'type': 'string', 'func': check_type(string_types)},
+    'max_latency_ms': {'type': 'positive number', 'func': positive_number},
+    'max_queries': {'type': 'non-negative int', 'func': non_negative_int},
+    'exact_queries': {'type': 'non-negative int', 'func': non_negative_int},
+    'load_weight': {'type': 'positive number', 'func': positive_number},
+    'max_memory_kb': {'type': 'positive number (requires tracemalloc of '
+                              'python 3.4+)', 'func': memory_budget},
+    'leak_check': {'type': 'bool or positive number (requires tracemalloc of '
+                           'python 3.4+)', 'func': leak_check_value},
+    'max_ttfb_ms': {'type': 'positive number', 'func': positive_number},
+    'min_chunks': {'type': 'positive int', 'func': positive_int},
+    'max_response_bytes': {'type': 'positive int', 'func': positive_int},
+    'profile': {'type': 'bool', 'func': check_type(bool)},
+    'max_templates': {'type': 'non-negative int', 'func': non_negative_int},
+    'max_template_ms': {'type': 'positive number', 'func': positive_number},
+    'warm_cache_check': {'type': 'bool', 'func': check_type(bool)},
+    'max_warm_queries': {'type': 'non-negative int',
+                         'func': non_negative_int},
+    'min_cache_speedup': {'type': 'positive number',
+                          'func': positive_number},
+    'requires_db': {'type': 'bool', 'func': check_type(bool)},
 }
 
+# parameters which identify request so they are taken into account in test
+# names (with url, method and status), budgets and other checks are not so
+# their changes do not rename tests and do not orphan their baseline
+HASHED_PARAMS = ('initialize', 'url_args', 'url_kwargs', 'request_data',
+                 'user_credentials')
+
+# parameters which do not affect result of request so they are not taken
+# into account in configuration fingerprint of incremental mode
+NOT_FINGERPRINTED_PARAMS = {'comment', 'load_weight', 'profile'}
+
+# settings of ``SmokeTestCase`` which affect results of its requests so they
+# are taken into account in configuration fingerprint of incremental mode
+FINGERPRINTED_SETTINGS = ('DEFAULT_MAX_LATENCY_MS', 'FAST_AUTH',
+                          'SHARED_INITIALIZE', 'SNAPSHOT_INITIALIZE',
+                          'LEAK_CHECK_ITERATIONS', 'LEAK_CHECK_WARMUP',
+                          'LEAK_CHECK_MAX_GROWTH_KB', 'LEAK_CHECK_RSS')
+
+# parameters which need database so they can't be used by requests marked by
+# ``requires_db`` False
+DATABASE_PARAMS = ('user_credentials', 'max_queries', 'exact_queries',
+                   'warm_cache_check', 'max_warm_queries',
+                   'min_cache_speedup')
+
+# parameters which instrument the whole process so they can't be used by
+# requests which are run concurrently
+PROCESS_PARAMS = ('max_memory_kb', 'leak_check', 'max_templates',
+                  'max_template_ms')
+
 INCORRECT_REQUIRED_PARAM_TYPE_MSG = \
     'django-skd-smoke: Configuration parameter "%s" with index=%s should be ' \
     '%s but is %s with next value: %s.'
@@ -75,20 +193,237 @@ LINK_TO_DOCUMENTATION = \
 UNKNOWN_HTTP_METHOD_MSG = \
     'Your django-skd-smoke configuration defines unknown http method: "%s".'
 
+INCORRECT_SHARED_INITIALIZE_MSG = \
+    'django-skd-smoke TestCase SHARED_INITIALIZE should be callable but is ' \
+    '%s with next value: %s.'
+
+INCORRECT_SHARED_OBJECTS_MSG = \
+    'django-skd-smoke TestCase SHARED_INITIALIZE should return dict or None ' \
+    'but returned %s with next value: %s.'
+
+INCORRECT_BENCHMARK_SETTING_MSG = \
+    'django-skd-smoke TestCase %s (or %s environment variable) should be %s ' \
+    'but is %s with next value: %s.'
+
+INCORRECT_SETTING_MSG = \
+    'django-skd-smoke TestCase %s should be %s but is %s with next value: %s.'
+
+DATABASE_PARAMS_MSG = \
+    'django-skd-smoke: Configuration of "%s" can\'t use %s with requires_db ' \
+    'False cause they need database.'
+
+CONCURRENT_PARAMS_MSG = \
+    'django-skd-smoke: Configuration of "%s" can\'t use %s with CONCURRENCY ' \
+    'cause they instrument the whole process.'
+
+DATABASE_REQUIRED_MSG = \
+    'django-skd-smoke SimpleSmokeTestCase can\'t run requests which require ' \
+    'database: %s. Move them to SmokeTestCase subclass.'
+
 HTTP_METHODS = {'get', 'post', 'head', 'options', 'put', 'patch', 'detete',
                 'trace'}
 
+# methods whose requests can be repeated without side effects
+SAFE_HTTP_METHODS = ('get', 'head', 'options', 'trace')
+
 INCORRECT_USER_CREDENTIALS = \
     'Authentication process failed. Supplied user credentials are incorrect: '\
     '%r. Ensure that related user was created successfully.'
 
+LATENCY_BUDGET_EXCEEDED_MSG = \
+    'Request took %.2f ms which exceeds latency budget of %s ms.'
+
+QUERIES_BUDGET_EXCEEDED_MSG = \
+    'Request executed %s queries which exceeds queries budget of %s.\n%s'
+
+EXACT_QUERIES_MISMATCH_MSG = \
+    'Request executed %s queries but exactly %s were expected.\n%s'
+
+MEMORY_BUDGET_EXCEEDED_MSG = \
+    'Request allocated %.1f KiB at peak which exceeds memory budget of %s ' \
+    'KiB. Allocations which are still held after request:\n%s'
+
+TTFB_BUDGET_EXCEEDED_MSG = \
+    'First byte of response arrived in %.2f ms which exceeds time to first ' \
+    'byte budget of %s ms (%s chunks, %s bytes in %.2f ms).'
+
+TRACED_TIMINGS_MSG = \
+    'Timings include overhead of tracemalloc or cProfile cause %s request ' \
+    'is not repeated without them.'
+
+NOT_ENOUGH_CHUNKS_MSG = \
+    'Response was streamed in %s chunks (%s bytes, first byte in %.2f ms, ' \
+    'all in %.2f ms) but at least %s chunks were expected.'
+
+NOT_STREAMING_RESPONSE_MSG = \
+    'Response %s is not streaming so its content is buffered into one chunk ' \
+    'but at least %s chunks were expected.'
+
+RESPONSE_SIZE_EXCEEDED_MSG = \
+    'Response content has %s which exceeds budget of %s bytes.'
+
+TEMPLATES_BUDGET_EXCEEDED_MSG = \
+    'Request rendered %s templates which exceeds templates budget of %s.\n%s'
+
+TEMPLATES_TIME_BUDGET_EXCEEDED_MSG = \
+    'Rendering of templates took %.2f ms which exceeds budget of %s ms.\n%s'
+
+BATCH_FAILURES_MSG = \
+    '%s of %s smoke requests of the batch failed:\n\n%s'
+
+DATABASE_ACCESS_FORBIDDEN_MSG = \
+    'Requests of %s are marked by requires_db False but "%s" database was ' \
+    'accessed. Remove requires_db False from requests which need database.'
+
+SUSPECTED_N_PLUS_ONE_MSG = \
+    'Suspected N+1: next query was executed %s times with different ' \
+    'parameters: %s'
+
+POSITIONAL_OPTIONS_DEPRECATED_MSG = \
+    'Passing %s to generate_test_method by position is deprecated, pass ' \
+    'them as keyword arguments.'
+
+TOO_MANY_POSITIONAL_OPTIONS_MSG = \
+    'generate_test_method takes at most %s positional arguments (%s given).'
+
+DUPLICATED_OPTION_MSG = \
+    'generate_test_method got multiple values for argument "%s".'
+
 # end configuration error messages
 
 
+# minimal number of executions of the same query with different parameters
+# which is reported as suspected N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+# sqlite backend reports queries with separated parameters
+SEPARATED_PARAMS_QUERY_RE = re.compile(
+    r'(?s)^QUERY = u?([\'"])(?P<sql>.*)\1 - PARAMS = .*$')
+PLACEHOLDER_RE = re.compile(r'%s')
+QUOTED_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'(?i)\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)')
+WHITESPACE_RE = re.compile(r'\s+')
+
+# shared by entries without request data or extra request parameters, they
+# are only read by test client so they are never changed
+EMPTY_REQUEST_DATA = {}
+NO_REQUEST_EXTRA = {}
+GZIP_REQUEST_EXTRA = {'HTTP_ACCEPT_ENCODING': 'gzip'}
+
+# parameters of generate_test_method which could be passed by position
+# before it started to take them as keyword arguments only
+LEGACY_POSITIONAL_OPTIONS = ('initialize', 'url_args', 'url_kwargs',
+                             'request_data', 'user_credentials',
+                             'redirect_to')
+
+# name of test method which runs all requests in batch mode (order number of
+# group is appended if requests are split into groups)
+BATCH_METHOD_NAME = 'test_smoke_batch'
+
+# name of class generated for requests which are marked by ``requires_db``
+# False (name of ``SmokeTestCase`` subclass is substituted)
+DATABASE_FREE_CLASS_NAME = '%sWithoutDatabase'
+
+# methods of database connections replaced by failure in database free test
+# cases
+FORBIDDEN_CONNECTION_METHODS = ('connect', 'cursor')
+
+# attributes which are managed by metaclass per class so they are not copied
+# into generated database free class
+GENERATED_CLASS_ATTRS = {'smoke_methods_generated', 'result_cache',
+                         'benchmark_report', 'baseline',
+                         'database_free_class'}
+
+# receiver of ``got_request_exception`` connected during concurrent run
+CONCURRENT_EXCEPTION_DISPATCH_UID = 'skd-smoke-concurrent-request-exception'
+
+# is incremented on every change of ``ROOT_URLCONF`` setting so urls cached
+# by generated test methods are resolved again
+URLCONF_GENERATION = 0
+
+
 def append_doc_link(error_message):
     return error_message + '\n' + LINK_TO_DOCUMENTATION
 
 
+@contextmanager
+def empty_context():
+    yield None
+
+
+def invalidate_resolved_urls(setting, **kwargs):
+    global URLCONF_GENERATION
+    if setting == 'ROOT_URLCONF':
+        URLCONF_GENERATION += 1
+
+
+setting_changed.connect(invalidate_resolved_urls)
+
+
+def get_url_state():
+    """
+    Returns state which reversed urls depend on: generation of urls
+    configuration, urlconf of current thread, script prefix and active
+    language (``i18n_patterns``). Language is not available until settings
+    are configured.
+
+    :return: hashable tuple
+    """
+    language = get_language() if settings.configured else None
+    return URLCONF_GENERATION, get_urlconf(), get_script_prefix(), language
+
+
+def fingerprint_query(sql):
+    """
+    Normalizes literals of supplied sql query so the same query executed with
+    different parameters gets the same fingerprint.
+
+    :param sql: sql query
+    :return: sql query with literals replaced by ``?``
+    """
+    separated_params_match = SEPARATED_PARAMS_QUERY_RE.match(sql)
+    if separated_params_match:
+        sql = PLACEHOLDER_RE.sub('?', separated_params_match.group('sql'))
+    sql = QUOTED_STRING_RE.sub('?', sql)
+    sql = NUMBER_RE.sub('?', sql)
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+    return WHITESPACE_RE.sub(' ', sql).strip()
+
+
+def find_n_plus_one_queries(queries, threshold=N_PLUS_ONE_THRESHOLD):
+    """
+    Finds queries which are executed repeatedly with different parameters.
+
+    :param queries: list of sql queries
+    :param threshold: minimal number of executions to report query
+    :return: list of (fingerprint, count) tuples, most frequent first
+    """
+    counter = Counter()
+    distinct_queries = {}
+    for sql in queries:
+        fingerprint = fingerprint_query(sql)
+        counter[fingerprint] += 1
+        distinct_queries.setdefault(fingerprint, set()).add(sql)
+    return [(fingerprint, count)
+            for fingerprint, count in counter.most_common()
+            if count >= threshold and len(distinct_queries[fingerprint]) > 1]
+
+
+def format_queries(queries):
+    """
+    Prepares report of executed queries with suspected N+1 queries on top.
+
+    :param queries: list of sql queries
+    :return: report as string
+    """
+    lines = [SUSPECTED_N_PLUS_ONE_MSG % (count, fingerprint)
+             for fingerprint, count in find_n_plus_one_queries(queries)]
+    lines.extend('%s. %s' % (number, sql)
+                 for number, sql in enumerate(queries, 1))
+    return '\n'.join(lines)
+
+
 def prepare_configuration(tests_configuration):
     """
     Prepares initial tests configuration. Raises exception if there is any
@@ -170,6 +505,132 @@ def prepare_configuration(tests_configuration):
     return confs
 
 
+def prepare_benchmark_setting(name, value, env_var, check, type_name):
+    """
+    Takes benchmark setting from class attribute or from environment variable
+    if attribute is not defined and checks its value.
+
+    :param name: name of class attribute
+    :param value: value of class attribute
+    :param env_var: name of environment variable
+    :param check: function which checks value
+    :param type_name: humanized expected type
+    :return: value of setting or None if it's not defined
+    :raises: ``django.core.exceptions.ImproperlyConfigured`` if value is \
+        incorrect
+    """
+    if value is None:
+        value = os.environ.get(env_var) or None
+        if value is not None:
+            try:
+                value = int(value)
+            except ValueError:
+                pass
+    if value is not None and not check(value):
+        raise ImproperlyConfigured(append_doc_link(
+            INCORRECT_BENCHMARK_SETTING_MSG %
+            (name, env_var, type_name, type(value), value)))
+    return value
+
+
+def check_setting(name, value, check, type_name):
+    """
+    Checks value of ``SmokeTestCase`` setting.
+
+    :param name: name of class attribute
+    :param value: value of class attribute
+    :param check: function which checks value
+    :param type_name: humanized expected type
+    :raises: ``django.core.exceptions.ImproperlyConfigured`` if value is \
+        incorrect
+    """
+    if not check(value):
+        raise ImproperlyConfigured(append_doc_link(
+            INCORRECT_SETTING_MSG % (name, type_name, type(value), value)))
+
+
+def prepare_credentials_key(credentials):
+    """
+    Prepares hashable key of supplied user credentials.
+
+    :param credentials: user credentials as dict
+    :return: tuple of sorted credentials items
+    """
+    return tuple(sorted((key, repr(value))
+                        for key, value in credentials.items()))
+
+
+def force_login(client, user, backend):
+    """
+    Logs in supplied ``user`` without authentication. Uses
+    ``client.force_login`` if it's available (django >= 1.9) otherwise it
+    repeats ``client.login`` except ``authenticate`` call.
+
+    :param client: ``django.test.Client`` instance
+    :param user: user instance
+    :param backend: dotted path to authentication backend of ``user``
+    """
+    if hasattr(client, 'force_login'):
+        client.force_login(user, backend)
+        return
+
+    from django.contrib.auth import login
+
+    user.backend = backend
+    engine = import_module(settings.SESSION_ENGINE)
+
+    request = HttpRequest()
+    if client.session:
+        request.session = client.session
+    else:
+        request.session = engine.SessionStore()
+    login(request, user)
+    request.session.save()
+
+    session_cookie = settings.SESSION_COOKIE_NAME
+    client.cookies[session_cookie] = request.session.session_key
+    client.cookies[session_cookie].update({
+        'max-age': None,
+        'path': '/',
+        'domain': settings.SESSION_COOKIE_DOMAIN,
+        'secure': settings.SESSION_COOKIE_SECURE or None,
+        'expires': None,
+    })
+
+
+def fast_login(testcase, credentials):
+    """
+    Logs in user with supplied credentials. Credentials are authenticated
+    only once per ``SmokeTestCase`` subclass while related user exists and
+    its password is not changed. Otherwise user is logged in by
+    ``force_login`` to avoid password hashing.
+
+    :param testcase: ``SmokeTestCase`` instance
+    :param credentials: user credentials as dict
+    :return: True if user was logged in otherwise False
+    """
+    from django.contrib.auth import authenticate
+
+    key = prepare_credentials_key(credentials)
+    user = None
+    if key in testcase.fast_auth_cache:
+        user_model, pk, password, backend = testcase.fast_auth_cache[key]
+        user = user_model._default_manager.filter(pk=pk).first()
+        if user is None or user.password != password or not user.is_active:
+            user = None
+
+    if user is None:
+        user = authenticate(**credentials)
+        if user is None or not user.is_active:
+            return False
+        backend = user.backend
+        testcase.fast_auth_cache[key] = (
+            type(user), user.pk, user.password, backend)
+
+    force_login(testcase.client, user, backend)
+    return True
+
+
 def generate_fail_test_method(exception_stacktrace):
     """
     Generates test method which fails and informs user about occurred
@@ -184,14 +645,204 @@ def generate_fail_test_method(exception_stacktrace):
     return fail_method
 
 
-def generate_test_method(urlname, status, method='GET', initialize=None,
-                         url_args=None, url_kwargs=None, request_data=None,
-                         user_credentials=None, redirect_to=None):
+def run_in_savepoint(testcase, test_method):
+    """
+    Runs generated test method inside of savepoint which is rolled back
+    after it so every request of batch starts with the same database.
+
+    :param testcase: ``TestCase`` instance
+    :param test_method: generated test method
+    """
+    with transaction.atomic():
+        try:
+            test_method(testcase)
+        finally:
+            transaction.set_rollback(True)
+
+
+def run_directly(testcase, test_method):
+    test_method(testcase)
+
+
+# test client which sends request in current worker thread of
+# ``run_concurrently``
+concurrent_requests = threading.local()
+
+
+def store_thread_exc_info(**kwargs):
+    """
+    Stores exception of view into test client which sends request in current
+    thread (``got_request_exception`` is sent by thread of the request).
+    """
+    client = getattr(concurrent_requests, 'client', None)
+    if client is not None:
+        client.exc_info = sys.exc_info()
+
+
+class ThreadClientMixin(object):
+    """
+    Mixin of test client class of worker threads. Django test client connects
+    its ``got_request_exception`` receiver with the same ``dispatch_uid`` for
+    every request and disconnects it when its request is done, its
+    ``template_rendered`` receivers get templates of all threads. So
+    exceptions and rendered templates are collected per thread here.
+    """
+
+    def store_exc_info(self, **kwargs):
+        store_thread_exc_info(**kwargs)
+
+    def request(self, **request):
+        thread = threading.current_thread()
+        store = {}
+
+        def store_thread_templates(signal, sender, template, context,
+                                   **kwargs):
+            if threading.current_thread() is thread:
+                store_rendered_templates(store, signal, sender, template,
+                                         context, **kwargs)
+
+        signal_uid = 'skd-smoke-template-render-%s' % id(store)
+        template_rendered.connect(store_thread_templates,
+                                  dispatch_uid=signal_uid)
+        concurrent_requests.client = self
+        try:
+            response = super(ThreadClientMixin, self).request(**request)
+        finally:
+            concurrent_requests.client = None
+            template_rendered.disconnect(dispatch_uid=signal_uid)
+        response.templates = store.get('templates', [])
+        response.context = store.get('context')
+        if response.context and len(response.context) == 1:
+            response.context = response.context[0]
+        return response
+
+
+class ThreadTestCase(object):
+    """
+    Proxy of ``TestCase`` instance for generated test method which is run in
+    worker thread. It has its own test client so cookies of concurrent
+    requests are not mixed, everything else is taken from ``TestCase``.
+
+    :param testcase: ``TestCase`` instance
+    :param client_class: test client class (``ThreadClientMixin`` subclass)
     """
-    Generates test method which takes or calls ``url_args`` and ``url_kwargs``,
-    resolves supplied ``urlname``, calls proper ``self.client`` method (get,
-    post, etc.) with ``request_data`` if any and compares response status with
-    parameter ``status`` using ``assertEqual``.
+
+    def __init__(self, testcase, client_class):
+        self.testcase = testcase
+        self.client = client_class()
+
+    def __getattr__(self, name):
+        return getattr(self.testcase, name)
+
+
+def run_concurrently(testcase, test_methods, concurrency):
+    """
+    Runs supplied generated test methods by ``concurrency`` worker threads so
+    requests which wait for i/o overlap. Database access of worker threads
+    is forbidden (see ``forbid_database_access``) cause they can't share
+    transaction of the test. Test clients of worker threads collect
+    exceptions of views and rendered templates per thread (see
+    ``ThreadClientMixin``).
+
+    :param testcase: ``SimpleSmokeTestCase`` instance
+    :param test_methods: list of generated test methods
+    :param concurrency: maximum number of worker threads
+    :return: list of ``sys.exc_info()`` tuples of failed methods or None \
+        for succeeded ones in order of ``test_methods``
+    """
+    outcomes = [None] * len(test_methods)
+    indexes = Queue()
+    for index in range(len(test_methods)):
+        indexes.put(index)
+    client_class = type(str('Thread%s' % testcase.client_class.__name__),
+                        (ThreadClientMixin, testcase.client_class), {})
+
+    def run_worker():
+        forbid_database_access(type(testcase).__name__)
+        while True:
+            try:
+                index = indexes.get_nowait()
+            except Empty:
+                return
+            try:
+                test_methods[index](ThreadTestCase(testcase, client_class))
+            except Exception:
+                outcomes[index] = sys.exc_info()
+
+    # receiver of test client is disconnected by the first finished request
+    # so exceptions of requests which are still in flight are delivered by
+    # this one
+    got_request_exception.connect(
+        store_thread_exc_info,
+        dispatch_uid=CONCURRENT_EXCEPTION_DISPATCH_UID)
+    try:
+        workers = [threading.Thread(target=run_worker)
+                   for _ in range(min(concurrency, len(test_methods)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        got_request_exception.disconnect(
+            dispatch_uid=CONCURRENT_EXCEPTION_DISPATCH_UID)
+    return outcomes
+
+
+def generate_batch_test_method(test_methods, use_savepoints=True,
+                               concurrency=None):
+    """
+    Generates test method which runs supplied generated test methods one by
+    one. Every method runs inside of its own savepoint with cookies of the
+    same client cleared before it. Methods are reported individually by
+    ``subTest`` (python 3.4+). Otherwise all failures are collected and
+    reported together in the end.
+
+    :param test_methods: list of generated test methods
+    :param use_savepoints: if False methods are run without savepoints \
+        (requests of database free test case)
+    :param concurrency: if it's supplied methods are run by this number of \
+        worker threads (see ``run_concurrently``) and then their results are \
+        reported in the same way
+    :return: method which takes ``TestCase``
+    """
+    def batch_test_method(self):
+        if concurrency:
+            outcomes = dict(zip(test_methods, run_concurrently(
+                self, test_methods, concurrency)))
+
+            # results of concurrent run are replayed one by one
+            def run(testcase, test_method):
+                if outcomes[test_method] is not None:
+                    six.reraise(*outcomes[test_method])
+        else:
+            run = run_in_savepoint if use_savepoints else run_directly
+        failures = []
+        for test_method in test_methods:
+            self.client.cookies = SimpleCookie()
+            if hasattr(self, 'subTest'):
+                with self.subTest(test_method.__name__):
+                    run(self, test_method)
+                continue
+            try:
+                run(self, test_method)
+            except SkipTest:
+                pass
+            except Exception:
+                failures.append('%s (%s)\n%s' % (
+                    test_method.__name__, test_method.__doc__,
+                    traceback.format_exc()))
+        if failures:
+            self.fail(BATCH_FAILURES_MSG % (len(failures), len(test_methods),
+                                            '\n'.join(failures)))
+    return batch_test_method
+
+
+class SmokeEntry(object):
+    """
+    Compact record of smoke test configuration entry together with settings
+    of its class which are used by ``run_smoke_entry``. It's created once per
+    entry when test methods are generated so defaults are normalized and
+    derived values are computed once instead of every run.
 
     :param urlname: plain url or urlname or namespace:urlname
     :param status: http status code
@@ -208,63 +859,523 @@ def generate_test_method(urlname, status, method='GET', initialize=None,
         login user using ``TestCase.client.login``
     :param redirect_to: plain url which is checked if only expected status \
         code is one of the [301, 302, 303, 307]
-    :return: new test method
-
+    :param max_latency_ms: maximum allowed duration of http method request \
+        in milliseconds
+    :param max_queries: maximum allowed number of sql queries executed during \
+        http method request
+    :param exact_queries: exact expected number of sql queries executed \
+        during http method request
+    :param fast_auth: if True user is logged in using ``fast_login`` instead \
+        of ``TestCase.client.login``
+    :param result_cache: ``skd_smoke.incremental.ResultCache`` instance to \
+        skip unchanged test and to record successful result
+    :param result_key: key of test result in ``result_cache`` and \
+        ``benchmark_report``
+    :param benchmark_report: ``skd_smoke.benchmark.BenchmarkReport`` \
+        instance, if it's supplied request is repeated after all checks and \
+        its timings are recorded into report
+    :param baseline: ``skd_smoke.baseline.Baseline`` instance, if it's \
+        supplied median latency of repeated request (or of benchmark) and \
+        number of queries are compared with baseline or recorded into it
+    :param max_memory_kb: maximum allowed peak of memory allocated during \
+        http method request in KiB, allocations are traced by \
+        ``tracemalloc`` only if it's supplied
+    :param leak_check: ``skd_smoke.memory.LeakCheck`` instance, if it's \
+        supplied request is repeated after all checks and growth of held \
+        memory is checked
+    :param max_ttfb_ms: maximum allowed time to the first non-empty chunk of \
+        response content in milliseconds
+    :param min_chunks: minimal expected number of non-empty chunks of \
+        streaming response
+    :param max_response_bytes: maximum allowed size of response content in \
+        bytes, gzip encoding is accepted by request if it's supplied
+    :param profile: 'all' to profile request by ``cProfile`` or 'slow' to \
+        repeat request under ``cProfile`` if it exceeds ``max_latency_ms``
+    :param profile_dir: directory to save profiles named by ``result_key`` \
+        into (``skd_smoke.profiling.DEFAULT_PROFILE_DIR`` if it's not supplied)
+    :param max_templates: maximum allowed number of templates rendered \
+        during http method request (including nested ones)
+    :param max_template_ms: maximum allowed duration of templates rendering \
+        in milliseconds
+    :param warm_cache_check: ``skd_smoke.cache.WarmCacheCheck`` instance, if \
+        it's supplied caches are cleared before test so request is cold and \
+        then it's compared with the same warm request
+    :param requires_db: if False queries are never captured (and counted as \
+        zero by ``baseline``) cause database access is forbidden
+    :param config_fingerprint: fingerprint of configuration of request (see \
+        ``prepare_config_fingerprint``) which is checked and recorded by \
+        ``result_cache``
     """
-    def new_test_method(self):
-        if initialize:
-            initialize(self)
 
-        if callable(url_args):
-            prepared_url_args = url_args(self)
+    __slots__ = ('urlname', 'status', 'method', 'initialize', 'url_args',
+                 'url_kwargs', 'request_data', 'user_credentials',
+                 'redirect_to', 'max_latency_ms', 'max_queries',
+                 'exact_queries', 'fast_auth', 'result_cache', 'result_key',
+                 'benchmark_report', 'baseline', 'max_memory_kb',
+                 'leak_check', 'max_ttfb_ms', 'min_chunks',
+                 'max_response_bytes', 'profile', 'profile_dir',
+                 'max_templates', 'max_template_ms', 'warm_cache_check',
+                 'requires_db', 'config_fingerprint', 'client_method',
+                 'instrument_templates',
+                 'consume', 'extra', 'static_url', 'url_state',
+                 'resolved_url')
+
+    def __init__(self, urlname, status, method='GET', initialize=None,
+                 url_args=None, url_kwargs=None, request_data=None,
+                 user_credentials=None, redirect_to=None,
+                 max_latency_ms=None, max_queries=None, exact_queries=None,
+                 fast_auth=False, result_cache=None, result_key=None,
+                 benchmark_report=None, baseline=None, max_memory_kb=None,
+                 leak_check=None, max_ttfb_ms=None, min_chunks=None,
+                 max_response_bytes=None, profile=None,
+                 profile_dir=None, max_templates=None,
+                 max_template_ms=None, warm_cache_check=None,
+                 requires_db=True, config_fingerprint=None):
+        self.urlname = urlname
+        self.status = status
+        self.method = method
+        self.initialize = initialize
+        self.url_args = url_args if callable(url_args) else \
+            tuple(url_args or ())
+        self.url_kwargs = url_kwargs if callable(url_kwargs) else \
+            url_kwargs or {}
+        self.request_data = request_data if callable(request_data) else \
+            request_data or EMPTY_REQUEST_DATA
+        self.user_credentials = user_credentials
+        self.redirect_to = redirect_to
+        self.max_latency_ms = max_latency_ms
+        self.max_queries = max_queries
+        self.exact_queries = exact_queries
+        self.fast_auth = fast_auth
+        self.result_cache = result_cache
+        self.result_key = result_key
+        self.benchmark_report = benchmark_report
+        self.baseline = baseline
+        self.max_memory_kb = max_memory_kb
+        self.leak_check = leak_check
+        self.max_ttfb_ms = max_ttfb_ms
+        self.min_chunks = min_chunks
+        self.max_response_bytes = max_response_bytes
+        self.profile = profile
+        if profile is not None and profile_dir is None:
+            from skd_smoke.profiling import DEFAULT_PROFILE_DIR
+            profile_dir = DEFAULT_PROFILE_DIR
+        self.profile_dir = profile_dir
+        self.max_templates = max_templates
+        self.max_template_ms = max_template_ms
+        self.warm_cache_check = warm_cache_check
+        self.requires_db = requires_db
+        self.config_fingerprint = config_fingerprint
+
+        self.client_method = method.lower()
+        self.instrument_templates = max_templates is not None or \
+            max_template_ms is not None or benchmark_report is not None
+        self.consume = max_ttfb_ms is not None or min_chunks is not None or \
+            max_response_bytes is not None
+        # size budget is about transferred bytes so compression is accepted
+        # like browsers and mobile clients do
+        self.extra = NO_REQUEST_EXTRA if max_response_bytes is None else \
+            GZIP_REQUEST_EXTRA
+        # resolved url is cached with url state if it does not depend on test
+        self.static_url = not callable(url_args) and not callable(url_kwargs)
+        self.url_state = None
+        self.resolved_url = None
+
+
+def send_timed_request(function, url, data, entry):
+    """
+    Sends request of supplied entry and measures its duration. Response
+    content is consumed by ``consume_response`` inside of timed block if
+    entry requires it.
+
+    :param function: ``testcase.client`` method (get, post, etc.)
+    :param url: resolved url
+    :param data: prepared request data
+    :param entry: ``SmokeEntry`` instance
+    :return: tuple of response, duration in milliseconds and \
+        ``ResponseStats`` (or None if content is not consumed)
+    """
+    started_at = default_timer()
+    response = function(url, data=data, **entry.extra)
+    elapsed_ms = (default_timer() - started_at) * 1000
+    stats = None
+    if entry.consume:
+        from skd_smoke.streaming import consume_response
+        stats = consume_response(response, started_at,
+                                 entry.max_response_bytes)
+        elapsed_ms = stats.total_ms
+    return response, elapsed_ms, stats
+
+
+def run_smoke_entry(testcase, entry):
+    """
+    Takes or calls ``url_args`` and ``url_kwargs`` of supplied entry,
+    resolves its ``urlname``, calls proper ``testcase.client`` method (get,
+    post, etc.) with ``request_data`` if any and compares response status
+    with ``status`` using ``assertEqual``. If ``max_latency_ms`` is supplied
+    the duration of ``testcase.client`` method call is checked against it.
+    If ``max_queries`` or ``exact_queries`` is supplied queries executed by
+    ``testcase.client`` method call are captured and their number is
+    checked.
+
+    If both ``url_args`` and ``url_kwargs`` are not callable resolved url is
+    cached and resolved again only if state returned by ``get_url_state`` is
+    changed.
+
+    If ``max_ttfb_ms``, ``min_chunks`` or ``max_response_bytes`` is supplied
+    response content is consumed by ``consume_response`` inside of timed block
+    so latency, queries and memory of streaming response include generation
+    of its content. Repeated requests (benchmark, baseline, etc.) are sent by
+    ``send_timed_request`` too so they are timed the same way.
+
+    If request is traced by ``TraceMemoryContext`` or profiled by
+    ``ProfileContext`` its timings are checked (and compared with baseline)
+    by the same request repeated without them, response of the first
+    request is checked. Requests of methods with side effects (post, put,
+    etc.) are not repeated so failure messages of their timings mention
+    overhead of tracing.
+
+    Rendering of templates is instrumented by ``TemplateRenderContext`` if
+    ``max_templates`` or ``max_template_ms`` is supplied or benchmark report
+    is collected, statistics of templates are recorded into report.
+
+    :param testcase: ``TestCase`` instance
+    :param entry: ``SmokeEntry`` instance
+    """
+    if entry.result_cache is not None and \
+            entry.result_cache.is_unchanged(entry.result_key,
+                                            entry.config_fingerprint):
+        from skd_smoke.incremental import UNCHANGED_ENTRY_SKIP_MSG
+        testcase.skipTest(UNCHANGED_ENTRY_SKIP_MSG)
+
+    testcase.smoke_request_key = entry.result_key
+
+    if entry.warm_cache_check is not None:
+        entry.warm_cache_check.prepare()
+
+    if entry.initialize:
+        entry.initialize(testcase)
+
+    if entry.static_url:
+        url_state = get_url_state()
+        if entry.url_state != url_state:
+            # url is stored first so concurrent run never gets url of
+            # previous state
+            entry.resolved_url = resolve_url(
+                entry.urlname, *entry.url_args, **entry.url_kwargs)
+            entry.url_state = url_state
+        resolved_url = entry.resolved_url
+    else:
+        if callable(entry.url_args):
+            prepared_url_args = entry.url_args(testcase)
         else:
-            prepared_url_args = url_args or []
+            prepared_url_args = entry.url_args
 
-        if callable(url_kwargs):
-            prepared_url_kwargs = url_kwargs(self)
+        if callable(entry.url_kwargs):
+            prepared_url_kwargs = entry.url_kwargs(testcase)
         else:
-            prepared_url_kwargs = url_kwargs or {}
+            prepared_url_kwargs = entry.url_kwargs
 
         resolved_url = resolve_url(
-            urlname, *prepared_url_args, **prepared_url_kwargs)
+            entry.urlname, *prepared_url_args, **prepared_url_kwargs)
 
-        if user_credentials:
-            if callable(user_credentials):
-                credentials = user_credentials(self)
-            else:
-                credentials = user_credentials
-            logged_in = self.client.login(**credentials)
-            self.assertTrue(
-                logged_in, INCORRECT_USER_CREDENTIALS % credentials)
-        function = getattr(self.client, method.lower())
-        if callable(request_data):
-            prepared_data = request_data(self)
+    if entry.user_credentials:
+        if callable(entry.user_credentials):
+            credentials = entry.user_credentials(testcase)
+        else:
+            credentials = entry.user_credentials
+        if entry.fast_auth:
+            logged_in = fast_login(testcase, credentials)
         else:
-            prepared_data = request_data or {}
-        response = function(resolved_url, data=prepared_data)
-        self.assertEqual(response.status_code, status)
-        if status in (301, 302, 303, 307) and redirect_to:
-            self.assertRedirects(response, redirect_to,
+            logged_in = testcase.client.login(**credentials)
+        testcase.assertTrue(
+            logged_in, INCORRECT_USER_CREDENTIALS % credentials)
+    function = getattr(testcase.client, entry.client_method)
+    if callable(entry.request_data):
+        prepared_data = entry.request_data(testcase)
+    else:
+        prepared_data = entry.request_data
+    if not entry.requires_db or entry.max_queries is None and \
+            entry.exact_queries is None and entry.baseline is None and \
+            entry.warm_cache_check is None:
+        queries_context = empty_context()
+    else:
+        queries_context = CaptureQueriesContext(connection)
+    if entry.max_memory_kb is None:
+        memory_context = empty_context()
+    else:
+        from skd_smoke.memory import TraceMemoryContext
+        memory_context = TraceMemoryContext()
+    if entry.instrument_templates:
+        from skd_smoke.templates import TemplateRenderContext
+        templates_context = TemplateRenderContext()
+    else:
+        templates_context = empty_context()
+    if entry.profile is not None:
+        from skd_smoke.profiling import PROFILE_SAVED_MSG, ProfileContext, \
+            save_profile
+    if entry.profile == 'all':
+        profile_context = ProfileContext()
+    else:
+        profile_context = empty_context()
+
+    def send():
+        return send_timed_request(function, resolved_url, prepared_data,
+                                  entry)
+
+    with queries_context as captured, memory_context as memory, \
+            templates_context as templates, profile_context as profiler:
+        response, elapsed_ms, stats = send()
+    traced_timings = memory is not None or profiler is not None
+    if traced_timings and entry.client_method in SAFE_HTTP_METHODS and \
+            (entry.max_latency_ms is not None or
+             entry.max_ttfb_ms is not None or entry.baseline is not None):
+        # tracemalloc and cProfile slow request down so its timings are
+        # taken from the same request repeated without them
+        _, elapsed_ms, stats = send()
+        traced_timings = False
+    traced_timings_note = ''
+    if traced_timings:
+        traced_timings_note = '\n' + TRACED_TIMINGS_MSG % entry.method.upper()
+    profile_name = entry.result_key or \
+        prepare_test_name(entry.urlname, entry.method, entry.status)
+    profile_paths = None
+    if profiler is not None:
+        profile_paths = save_profile(profiler, entry.profile_dir,
+                                     profile_name)
+    testcase.assertEqual(response.status_code, entry.status)
+    if entry.status in (301, 302, 303, 307) and entry.redirect_to:
+        testcase.assertRedirects(response, entry.redirect_to,
                                  fetch_redirect_response=False)
+    if entry.max_latency_ms is not None and \
+            elapsed_ms > entry.max_latency_ms:
+        message = LATENCY_BUDGET_EXCEEDED_MSG % (elapsed_ms,
+                                                 entry.max_latency_ms)
+        if entry.profile == 'slow':
+            with ProfileContext() as profiler:
+                send()
+            profile_paths = save_profile(profiler, entry.profile_dir,
+                                         profile_name)
+        if profile_paths:
+            message = '%s\n%s' % (message, PROFILE_SAVED_MSG % profile_paths)
+        testcase.fail(message + traced_timings_note)
+    if entry.max_response_bytes is not None and \
+            stats.size > entry.max_response_bytes:
+        from skd_smoke.streaming import describe_size
+        testcase.fail(RESPONSE_SIZE_EXCEEDED_MSG %
+                      (describe_size(stats), entry.max_response_bytes))
+    if entry.max_ttfb_ms is not None and stats.ttfb_ms > entry.max_ttfb_ms:
+        testcase.fail(TTFB_BUDGET_EXCEEDED_MSG %
+                      (stats.ttfb_ms, entry.max_ttfb_ms, stats.chunks,
+                       stats.size, stats.total_ms) + traced_timings_note)
+    if entry.min_chunks is not None and not stats.streaming:
+        testcase.fail(NOT_STREAMING_RESPONSE_MSG %
+                      (type(response).__name__, entry.min_chunks))
+    elif entry.min_chunks is not None and stats.chunks < entry.min_chunks:
+        testcase.fail(NOT_ENOUGH_CHUNKS_MSG %
+                      (stats.chunks, stats.size, stats.ttfb_ms,
+                       stats.total_ms, entry.min_chunks))
+    if memory is not None and memory.peak_kb > entry.max_memory_kb:
+        from skd_smoke.memory import format_memory_statistics
+        testcase.fail(MEMORY_BUDGET_EXCEEDED_MSG %
+                      (memory.peak_kb, entry.max_memory_kb,
+                       format_memory_statistics(memory.statistics)))
+    templates_report = None
+    if templates is not None:
+        from skd_smoke.templates import format_template_statistics
+        templates_report = templates.get_report()
+        if entry.max_templates is not None and \
+                templates.count > entry.max_templates:
+            testcase.fail(TEMPLATES_BUDGET_EXCEEDED_MSG %
+                          (templates.count, entry.max_templates,
+                           format_template_statistics(templates_report)))
+        if entry.max_template_ms is not None and \
+                templates.total_ms > entry.max_template_ms:
+            testcase.fail(TEMPLATES_TIME_BUDGET_EXCEEDED_MSG %
+                          (templates.total_ms, entry.max_template_ms,
+                           format_template_statistics(templates_report)))
+    queries = []
+    if captured is not None:
+        queries = [query['sql'] for query in captured.captured_queries]
+        if entry.exact_queries is not None and \
+                len(queries) != entry.exact_queries:
+            testcase.fail(EXACT_QUERIES_MISMATCH_MSG %
+                          (len(queries), entry.exact_queries,
+                           format_queries(queries)))
+        if entry.max_queries is not None and \
+                len(queries) > entry.max_queries:
+            testcase.fail(QUERIES_BUDGET_EXCEEDED_MSG %
+                          (len(queries), entry.max_queries,
+                           format_queries(queries)))
+    if entry.warm_cache_check is not None:
+        cache_errors = entry.warm_cache_check.run(
+            testcase, send, entry.status, elapsed_ms, queries)
+        if cache_errors:
+            testcase.fail('\n'.join(cache_errors))
+    timings = None
+    if entry.benchmark_report is not None or entry.baseline is not None:
+        from skd_smoke.benchmark import run_benchmark
+    benchmark_report = entry.benchmark_report
+    if benchmark_report is not None:
+        timings = run_benchmark(
+            testcase, send, entry.status, benchmark_report.iterations,
+            benchmark_report.warmup)
+        benchmark_report.record(entry.result_key, timings, templates_report)
+    baseline = entry.baseline
+    if baseline is not None:
+        def measure():
+            return run_benchmark(testcase, send, entry.status,
+                                 baseline.repeats)
+        if timings is None and traced_timings:
+            timings = measure()
+        elif timings is None:
+            timings = [elapsed_ms]
+            timings.extend(run_benchmark(
+                testcase, send, entry.status, baseline.repeats - 1))
+        regressions = baseline.check(
+            entry.result_key, timings, len(queries), measure)
+        if regressions:
+            testcase.fail('\n'.join(regressions))
+    if entry.leak_check is not None:
+        leaks = entry.leak_check.run(testcase, send, entry.status)
+        if leaks:
+            testcase.fail('\n'.join(leaks))
+    if entry.result_cache is not None:
+        entry.result_cache.record_success(entry.result_key, resolved_url,
+                                          entry.config_fingerprint)
+
+
+def generate_test_method(urlname, status, method='GET', *args, **options):
+    """
+    Generates test method which runs ``run_smoke_entry`` with ``SmokeEntry``
+    created from supplied parameters. Test method holds the entry only so
+    thousands of them are cheap to create.
+
+    :param urlname: plain url or urlname or namespace:urlname
+    :param status: http status code
+    :param method: http method (get, post, etc.)
+    :param args: deprecated positional ``LEGACY_POSITIONAL_OPTIONS``, they \
+        are accepted with ``DeprecationWarning``
+    :param options: keyword arguments of ``SmokeEntry`` (see its description)
+    :return: new test method
+    """
+    if len(args) > len(LEGACY_POSITIONAL_OPTIONS):
+        raise TypeError(TOO_MANY_POSITIONAL_OPTIONS_MSG % (
+            len(LEGACY_POSITIONAL_OPTIONS) + 3, len(args) + 3))
+    if args:
+        names = LEGACY_POSITIONAL_OPTIONS[:len(args)]
+        for name, value in zip(names, args):
+            if name in options:
+                raise TypeError(DUPLICATED_OPTION_MSG % name)
+            options[name] = value
+        warnings.warn(POSITIONAL_OPTIONS_DEPRECATED_MSG % ', '.join(names),
+                      DeprecationWarning, stacklevel=2)
+    entry = SmokeEntry(urlname, status, method, **options)
+
+    def new_test_method(self):
+        run_smoke_entry(self, entry)
     return new_test_method
 
 
-def prepare_test_name(urlname, method, status):
+def describe_config_value(value):
+    """
+    Converts configuration value into json serializable structure which does
+    not depend on objects identity. Functions are described by their
+    qualified names, ``functools.partial`` objects by their function and
+    arguments and other callable instances by their classes.
+
+    :param value: configuration value
+    :return: json serializable value
+    """
+    if isinstance(value, partial):
+        return {'partial': describe_config_value(value.func),
+                'args': describe_config_value(value.args),
+                'keywords': describe_config_value(value.keywords or {})}
+    if callable(value):
+        name = getattr(value, '__qualname__', None) or \
+            getattr(value, '__name__', None)
+        if name is None:
+            value = type(value)
+            name = getattr(value, '__qualname__', None) or value.__name__
+        return '%s.%s' % (getattr(value, '__module__', None), name)
+    if isinstance(value, dict):
+        return dict((six.text_type(key), describe_config_value(item))
+                    for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return [describe_config_value(item) for item in value]
+    if value is None or isinstance(value, string_types + integer_types +
+                                   (float,)):
+        return value
+    return repr(value)
+
+
+def hash_config(*values):
+    """
+    Prepares stable hash of configuration values (see
+    ``describe_config_value``).
+
+    :param values: configuration values
+    :return: hex digest of 12 characters
+    """
+    serialized = json.dumps(describe_config_value(values), sort_keys=True)
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()[:12]
+
+
+def prepare_test_hash(urlname, method, status, data=None):
+    """
+    Prepares stable hash of request identity. Only ``HASHED_PARAMS`` are
+    taken into account so changes of budgets, checks or comment keep the
+    hash.
+
+    :param urlname: initial urlname
+    :param method: http method (get, post, etc.)
+    :param status: http status code
+    :param data: dict of not required configuration parameters
+    :return: hex digest of 12 characters
+    """
+    data = data or {}
+    identity = dict((key, data[key]) for key in HASHED_PARAMS if key in data)
+    return hash_config(urlname, method.upper(), status, identity)
+
+
+def prepare_config_fingerprint(urlname, method, status, data=None,
+                               settings=None):
+    """
+    Prepares stable fingerprint of the whole configuration of request (except
+    ``NOT_FINGERPRINTED_PARAMS``) and supplied settings of its test case.
+    Incremental mode does not skip request if its fingerprint is changed.
+
+    :param urlname: initial urlname
+    :param method: http method (get, post, etc.)
+    :param status: http status code
+    :param data: dict of not required configuration parameters
+    :param settings: dict of ``FINGERPRINTED_SETTINGS`` of test case
+    :return: hex digest of 12 characters
+    """
+    config = dict((key, value) for key, value in (data or {}).items()
+                  if key not in NOT_FINGERPRINTED_PARAMS)
+    return hash_config(urlname, method.upper(), status, config,
+                       settings or {})
+
+
+def prepare_test_name(urlname, method, status, data=None):
     """
-    Prepares name for smoke test method with supplied parameters.
+    Prepares name for smoke test method with supplied parameters. Name ends
+    with hash of request identity so it's the same for every run.
 
     :param urlname: initial urlname
     :param method: http method (get, post, etc.)
     :param status: http status code
+    :param data: dict of not required configuration parameters
     :return: test name
     """
     prepared_url = urlname.replace(':', '_').strip('/').replace('/', '_')
     prepared_method = method.lower()
-    name = 'test_smoke_%(url)s_%(method)s_%(status)s_%(uuid)s' % {
+    name = 'test_smoke_%(url)s_%(method)s_%(status)s_%(hash)s' % {
         'url': prepared_url,
         'method': prepared_method,
         'status': status,
-        'uuid': uuid4().hex
+        'hash': prepare_test_hash(urlname, method, status, data)
     }
     return name
 
@@ -299,6 +1410,124 @@ def prepare_test_method_doc(method, urlname, status, status_text, data,
     return result
 
 
+def make_unique_name(name, names):
+    """
+    Appends order number to supplied name if it's already used. The same
+    configuration is allowed several times so order number keeps names
+    unique and stable. Result is added into ``names``.
+
+    :param name: desired name
+    :param names: set of already used names
+    :return: unique name
+    """
+    unique_name = name
+    counter = 1
+    while unique_name in names:
+        counter += 1
+        unique_name = '%s_%s' % (name, counter)
+    names.add(unique_name)
+    return unique_name
+
+
+def is_database_free(test):
+    """
+    Checks if request of tests configuration is marked by ``requires_db``
+    False. Configuration is validated later so malformed request is treated
+    as one which requires database.
+
+    :param test: item of ``TESTS_CONFIGURATION``
+    :return: True if request does not require database
+    """
+    try:
+        return isinstance(test[-1], dict) and \
+            test[-1].get('requires_db') is False
+    except (TypeError, IndexError, KeyError):
+        return False
+
+
+def create_database_free_class(cls):
+    """
+    Creates ``SimpleSmokeTestCase`` subclass for requests of supplied
+    ``SmokeTestCase`` subclass which are marked by ``requires_db`` False and
+    adds it into module of supplied class so test loader finds it. Settings
+    and helpers of supplied class are copied into created class.
+
+    :param cls: ``SmokeTestCase`` subclass
+    :return: created class or None if there are no such requests
+    """
+    try:
+        tests_configuration = [test for test in cls.TESTS_CONFIGURATION
+                               if is_database_free(test)]
+    except TypeError:
+        return None
+    if not tests_configuration:
+        return None
+
+    attrs = {}
+    for klass in reversed(cls.__mro__):
+        if klass in SmokeTestCase.__mro__:
+            continue
+        attrs.update(
+            (name, value) for name, value in klass.__dict__.items()
+            if not name.startswith(('__', 'test')) and
+            name not in GENERATED_CLASS_ATTRS)
+    name = DATABASE_FREE_CLASS_NAME % cls.__name__
+    attrs.update({
+        '__module__': cls.__module__,
+        '__doc__': 'Requests of %s which do not require database.' %
+                   cls.__name__,
+        'TESTS_CONFIGURATION': tests_configuration,
+    })
+    database_free_class = type(cls)(str(name), (SimpleSmokeTestCase,), attrs)
+
+    module = sys.modules.get(cls.__module__)
+    if module is not None:
+        setattr(module, name, database_free_class)
+    return database_free_class
+
+
+class DatabaseAccessForbidden(object):
+    """
+    Replacement of database connection method inside of database free test
+    case which fails on any call.
+    """
+
+    def __init__(self, wrapped, message):
+        self.wrapped = wrapped
+        self.message = message
+
+    def __call__(self, *args, **kwargs):
+        raise AssertionError(self.message)
+
+
+def forbid_database_access(name):
+    """
+    Replaces methods of database connections of current thread (connections
+    are thread local) by ``DatabaseAccessForbidden``.
+
+    :param name: name of database free test case for error message
+    """
+    for alias in connections:
+        connection = connections[alias]
+        for method_name in FORBIDDEN_CONNECTION_METHODS:
+            setattr(connection, method_name, DatabaseAccessForbidden(
+                getattr(connection, method_name),
+                DATABASE_ACCESS_FORBIDDEN_MSG % (name, alias)))
+
+
+def allow_database_access():
+    """
+    Restores methods of database connections of current thread replaced by
+    ``forbid_database_access``.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        for method_name in FORBIDDEN_CONNECTION_METHODS:
+            method = getattr(connection, method_name)
+            if isinstance(method, DatabaseAccessForbidden):
+                setattr(connection, method_name, method.wrapped)
+
+
 class GenerateTestMethodsMeta(type):
     """
     Metaclass which creates new test methods according to tests configuration.
@@ -307,6 +1536,11 @@ class GenerateTestMethodsMeta(type):
     ``SmokeTestCase`` defined inside our project and give possibility to
     derive it anywhere without duplicating test methods creation
     (in ``SmokeTestCase`` and library user test case).
+
+    Configuration validation and test methods creation are deferred until
+    the class is loaded by test loader (``dir`` of the class is requested or
+    missing attribute is accessed). So import of test modules stays cheap
+    when only some tests are selected to run.
     """
 
     def __new__(mcs, name, bases, attrs):
@@ -320,9 +1554,126 @@ class GenerateTestMethodsMeta(type):
         if not parents:
             return cls
 
+        from skd_smoke.incremental import INCREMENTAL_CACHE_ENV_VAR, \
+            get_result_cache
+
+        cls.smoke_methods_generated = False
+        cls.result_cache = get_result_cache(
+            cls.INCREMENTAL_CACHE_FILE or
+            os.environ.get(INCREMENTAL_CACHE_ENV_VAR))
+        if cls.requires_db:
+            cls.database_free_class = create_database_free_class(cls)
+        return cls
+
+    def __getattr__(cls, name):
+        # it's called only if attribute is not found in usual way
+        if name.startswith('__') or not cls.generate_test_methods():
+            raise AttributeError(name)
+        return getattr(cls, name)
+
+    def __dir__(cls):
+        cls.generate_test_methods()
+        names = set()
+        for klass in cls.__mro__:
+            names.update(klass.__dict__)
+        return sorted(names)
+
+    def generate_test_methods(cls):
+        """
+        Validates tests configuration and creates test methods (or fail
+        method if configuration is incorrect) once per class.
+
+        :return: True if test methods were created by this call
+        """
+        if cls.__dict__.get('smoke_methods_generated', True):
+            return False
+        cls.smoke_methods_generated = True
+
+        # inherited test methods should be available too
+        for base in cls.__mro__[1:]:
+            if isinstance(base, GenerateTestMethodsMeta):
+                base.generate_test_methods()
+
+        from skd_smoke.baseline import BASELINE_FILE_ENV_VAR, \
+            BASELINE_RECORD_ENV_VAR, Baseline
+        from skd_smoke.benchmark import BENCHMARK_ITERATIONS_ENV_VAR, \
+            BENCHMARK_WARMUP_ENV_VAR, BENCHMARK_REPORT_ENV_VAR, \
+            BenchmarkReport
+        from skd_smoke.cache import WarmCacheCheck
+        from skd_smoke.memory import LeakCheck
+        from skd_smoke.profiling import PROFILE_ENV_VAR, \
+            PROFILE_DIR_ENV_VAR, PROFILE_MODES, DEFAULT_PROFILE_DIR
+
         # noinspection PyBroadException
         try:
+            shared_initialize = cls.SHARED_INITIALIZE
+            if shared_initialize is not None and not callable(
+                    shared_initialize):
+                raise ImproperlyConfigured(append_doc_link(
+                    INCORRECT_SHARED_INITIALIZE_MSG %
+                    (type(shared_initialize), shared_initialize)))
+            if cls.SNAPSHOT_INITIALIZE is not None:
+                check_setting('SNAPSHOT_INITIALIZE', cls.SNAPSHOT_INITIALIZE,
+                              callable, 'callable')
+            if cls.USER_POOL is not None:
+                check_setting('USER_POOL', cls.USER_POOL,
+                              check_type(UserPool), 'UserPool')
             config = prepare_configuration(cls.TESTS_CONFIGURATION)
+            for urlname, status, method, data in config:
+                requires_db = data.get('requires_db', cls.requires_db)
+                database_params = [
+                    param for param in DATABASE_PARAMS
+                    if data.get(param) is not None and
+                    data.get(param) is not False]
+                if not requires_db and database_params:
+                    raise ImproperlyConfigured(append_doc_link(
+                        DATABASE_PARAMS_MSG %
+                        (urlname, ', '.join(database_params))))
+                process_params = [
+                    param for param in PROCESS_PARAMS
+                    if data.get(param) is not None and
+                    data.get(param) is not False]
+                if not requires_db and cls.CONCURRENCY is not None and \
+                        process_params:
+                    raise ImproperlyConfigured(append_doc_link(
+                        CONCURRENT_PARAMS_MSG %
+                        (urlname, ', '.join(process_params))))
+            if not cls.requires_db:
+                database_tests = [urlname for urlname, _, _, data in config
+                                  if data.get('requires_db')]
+                if database_tests:
+                    raise ImproperlyConfigured(append_doc_link(
+                        DATABASE_REQUIRED_MSG % ', '.join(database_tests)))
+            benchmark_iterations = prepare_benchmark_setting(
+                'BENCHMARK_ITERATIONS', cls.BENCHMARK_ITERATIONS,
+                BENCHMARK_ITERATIONS_ENV_VAR, positive_int, 'positive int')
+            benchmark_warmup = prepare_benchmark_setting(
+                'BENCHMARK_WARMUP', cls.BENCHMARK_WARMUP,
+                BENCHMARK_WARMUP_ENV_VAR, non_negative_int,
+                'non-negative int')
+            profile = prepare_benchmark_setting(
+                'PROFILE', cls.PROFILE, PROFILE_ENV_VAR, profile_mode,
+                ' or '.join(repr(str(mode)) for mode in PROFILE_MODES))
+            check_setting('BATCH', cls.BATCH, batch_value,
+                          'bool or positive int')
+            if cls.CONCURRENCY is not None:
+                check_setting('CONCURRENCY', cls.CONCURRENCY, positive_int,
+                              'positive int')
+            check_setting('BASELINE_THRESHOLD', cls.BASELINE_THRESHOLD,
+                          non_negative_number, 'non-negative number')
+            check_setting('BASELINE_REPEATS', cls.BASELINE_REPEATS,
+                          positive_int, 'positive int')
+            check_setting('BASELINE_ROUNDS', cls.BASELINE_ROUNDS,
+                          positive_int, 'positive int')
+            check_setting('LEAK_CHECK_ITERATIONS', cls.LEAK_CHECK_ITERATIONS,
+                          positive_int, 'positive int')
+            check_setting('LEAK_CHECK_WARMUP', cls.LEAK_CHECK_WARMUP,
+                          non_negative_int, 'non-negative int')
+            check_setting('LEAK_CHECK_MAX_GROWTH_KB',
+                          cls.LEAK_CHECK_MAX_GROWTH_KB, non_negative_number,
+                          'non-negative number')
+            check_setting('BASELINE_MIN_DELTA_MS', cls.BASELINE_MIN_DELTA_MS,
+                          non_negative_number, 'non-negative number')
         except Exception:
             fail_method = generate_fail_test_method(traceback.format_exc())
             fail_method_name = cls.FAIL_METHOD_NAME
@@ -330,7 +1681,40 @@ class GenerateTestMethodsMeta(type):
 
             setattr(cls, fail_method_name, fail_method)
         else:
+            if benchmark_iterations:
+                cls.benchmark_report = BenchmarkReport(
+                    '%s.%s' % (cls.__module__, cls.__name__),
+                    benchmark_iterations, benchmark_warmup or 0,
+                    cls.BENCHMARK_REPORT_FILE or
+                    os.environ.get(BENCHMARK_REPORT_ENV_VAR))
+            baseline_file = cls.BASELINE_FILE or \
+                os.environ.get(BASELINE_FILE_ENV_VAR)
+            if baseline_file:
+                cls.baseline = Baseline(
+                    baseline_file, cls.BASELINE_THRESHOLD,
+                    cls.BASELINE_REPEATS, cls.BASELINE_ROUNDS,
+                    cls.BASELINE_MIN_DELTA_MS,
+                    bool(os.environ.get(BASELINE_RECORD_ENV_VAR)))
+            profile_dir = cls.PROFILE_DIR or \
+                os.environ.get(PROFILE_DIR_ENV_VAR) or DEFAULT_PROFILE_DIR
+            # concurrent requests would disturb measurements of benchmark
+            # and baseline modes
+            concurrency = None
+            if not cls.requires_db and cls.benchmark_report is None and \
+                    cls.baseline is None:
+                concurrency = cls.CONCURRENCY
+            fingerprinted_settings = dict(
+                (name, getattr(cls, name)) for name in FINGERPRINTED_SETTINGS)
+            test_method_names = set()
+            batch_test_methods = []
+            class_config = []
             for urlname, status, method, data in config:
+                # requests marked by requires_db False are run by generated
+                # database free class
+                if data.get('requires_db', cls.requires_db) != \
+                        cls.requires_db:
+                    continue
+                class_config.append((urlname, status, method, data))
                 comment = data.get('comment', None)
                 initialize = data.get('initialize', None)
                 url_args = data.get('url_args', None)
@@ -338,13 +1722,66 @@ class GenerateTestMethodsMeta(type):
                 request_data = data.get('request_data', None)
                 get_user_credentials = data.get('user_credentials', None)
                 redirect_to = data.get('redirect_to', None)
+                max_latency_ms = data.get('max_latency_ms',
+                                          cls.DEFAULT_MAX_LATENCY_MS)
+                max_queries = data.get('max_queries', None)
+                exact_queries = data.get('exact_queries', None)
+                max_memory_kb = data.get('max_memory_kb', None)
+                max_growth_kb = data.get('leak_check', False)
+                leak_check = None
+                if max_growth_kb is not False:
+                    if max_growth_kb is True:
+                        max_growth_kb = cls.LEAK_CHECK_MAX_GROWTH_KB
+                    leak_check = LeakCheck(
+                        cls.LEAK_CHECK_ITERATIONS, cls.LEAK_CHECK_WARMUP,
+                        max_growth_kb, cls.LEAK_CHECK_RSS)
+                max_ttfb_ms = data.get('max_ttfb_ms', None)
+                min_chunks = data.get('min_chunks', None)
+                max_response_bytes = data.get('max_response_bytes', None)
+                entry_profile = 'all' if data.get('profile') else profile
+                max_templates = data.get('max_templates', None)
+                max_template_ms = data.get('max_template_ms', None)
+                max_warm_queries = data.get('max_warm_queries', None)
+                min_cache_speedup = data.get('min_cache_speedup', None)
+                warm_cache_check = None
+                if data.get('warm_cache_check') or \
+                        max_warm_queries is not None or \
+                        min_cache_speedup is not None:
+                    warm_cache_check = WarmCacheCheck(max_warm_queries,
+                                                      min_cache_speedup)
+                fast_auth = cls.FAST_AUTH
                 status_text = STATUS_CODE_TEXT.get(status, 'UNKNOWN')
 
-                test_method_name = prepare_test_name(urlname, method, status)
+                test_method_name = make_unique_name(
+                    prepare_test_name(urlname, method, status, data),
+                    test_method_names)
+                result_key = '%s.%s.%s' % (cls.__module__, cls.__name__,
+                                           test_method_name)
+                config_fingerprint = None
+                if cls.result_cache is not None:
+                    config_fingerprint = prepare_config_fingerprint(
+                        urlname, method, status, data, fingerprinted_settings)
 
                 test_method = generate_test_method(
-                    urlname, status, method, initialize, url_args, url_kwargs,
-                    request_data, get_user_credentials, redirect_to
+                    urlname, status, method, initialize=initialize,
+                    url_args=url_args, url_kwargs=url_kwargs,
+                    request_data=request_data,
+                    user_credentials=get_user_credentials,
+                    redirect_to=redirect_to, max_latency_ms=max_latency_ms,
+                    max_queries=max_queries, exact_queries=exact_queries,
+                    fast_auth=fast_auth, result_cache=cls.result_cache,
+                    result_key=result_key,
+                    benchmark_report=cls.benchmark_report,
+                    baseline=cls.baseline, max_memory_kb=max_memory_kb,
+                    leak_check=leak_check, max_ttfb_ms=max_ttfb_ms,
+                    min_chunks=min_chunks,
+                    max_response_bytes=max_response_bytes,
+                    profile=entry_profile, profile_dir=profile_dir,
+                    max_templates=max_templates,
+                    max_template_ms=max_template_ms,
+                    warm_cache_check=warm_cache_check,
+                    requires_db=cls.requires_db,
+                    config_fingerprint=config_fingerprint
                 )
                 test_method.__name__ = str(test_method_name)
                 test_method.__doc__ = prepare_test_method_doc(
@@ -352,12 +1789,113 @@ class GenerateTestMethodsMeta(type):
                     comment
                 )
 
-                setattr(cls, test_method_name, test_method)
-
-        return cls
-
+                if cls.BATCH or concurrency:
+                    batch_test_methods.append(test_method)
+                else:
+                    setattr(cls, test_method_name, test_method)
+
+            if batch_test_methods:
+                group_size = len(batch_test_methods) \
+                    if isinstance(cls.BATCH, bool) else cls.BATCH
+                groups = [batch_test_methods[start:start + group_size]
+                          for start in range(0, len(batch_test_methods),
+                                             group_size)]
+                for number, group in enumerate(groups, 1):
+                    name = BATCH_METHOD_NAME if len(groups) == 1 else \
+                        '%s_%s' % (BATCH_METHOD_NAME, number)
+                    batch_test_method = generate_batch_test_method(
+                        group, cls.requires_db, concurrency)
+                    batch_test_method.__name__ = str(name)
+                    batch_test_method.__doc__ = \
+                        'Batch of %s smoke requests' % len(group)
+                    setattr(cls, name, batch_test_method)
+
+            cls.memoized_callbacks = collect_memoized_callbacks(class_config)
+
+        return True
+
+
+class SmokeTestMixin(object):
+    """
+    Settings and class fixtures shared by ``SmokeTestCase`` and
+    ``SimpleSmokeTestCase``.
+    """
 
-class SmokeTestCase(six.with_metaclass(GenerateTestMethodsMeta, TestCase)):
+    TESTS_CONFIGURATION = None
+    FAIL_METHOD_NAME = 'test_fail_cause_bad_configuration'
+    SHARED_INITIALIZE = None
+    SNAPSHOT_INITIALIZE = None
+    SNAPSHOT_DIR = None
+    USER_POOL = None
+    INCREMENTAL_CACHE_FILE = None
+    result_cache = None
+    BENCHMARK_ITERATIONS = None
+    BENCHMARK_WARMUP = None
+    BENCHMARK_REPORT_FILE = None
+    benchmark_report = None
+    BASELINE_FILE = None
+    BASELINE_THRESHOLD = 0.2
+    BASELINE_REPEATS = 5
+    BASELINE_ROUNDS = 3
+    BASELINE_MIN_DELTA_MS = 1
+    baseline = None
+    LEAK_CHECK_ITERATIONS = 20
+    LEAK_CHECK_WARMUP = 5
+    LEAK_CHECK_MAX_GROWTH_KB = 1
+    LEAK_CHECK_RSS = False
+    PROFILE = None
+    PROFILE_DIR = None
+    BATCH = False
+    CONCURRENCY = None
+    DEFAULT_MAX_LATENCY_MS = None
+    FAST_AUTH = False
+    FAST_AUTH_PASSWORD_HASHERS = (
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    )
+
+    requires_db = True
+    database_free_class = None
+    memoized_callbacks = ()
+    memoized_results = None
+    snapshot = None
+    pooled_users = None
+    # key of smoke request which is run by the test now (its name in batch
+    # mode differs from name of test method)
+    smoke_request_key = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.fast_auth_cache = {}
+        cls.fast_auth_settings = None
+        if cls.FAST_AUTH and cls.FAST_AUTH_PASSWORD_HASHERS:
+            cls.fast_auth_settings = override_settings(
+                PASSWORD_HASHERS=cls.FAST_AUTH_PASSWORD_HASHERS)
+            cls.fast_auth_settings.enable()
+        try:
+            super(SmokeTestMixin, cls).setUpClass()
+        except Exception:
+            if cls.fast_auth_settings:
+                cls.fast_auth_settings.disable()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        super(SmokeTestMixin, cls).tearDownClass()
+        cls.memoized_results = None
+        cls.pooled_users = None
+        if cls.fast_auth_settings:
+            cls.fast_auth_settings.disable()
+        if cls.result_cache is not None:
+            cls.result_cache.save()
+        if cls.benchmark_report is not None and cls.benchmark_report.results:
+            sys.stderr.write(cls.benchmark_report.format_table())
+            cls.benchmark_report.save()
+        if cls.baseline is not None:
+            cls.baseline.save()
+
+
+class SmokeTestCase(six.with_metaclass(GenerateTestMethodsMeta, SmokeTestMixin,
+                                       TestCase)):
     """
     TestCase which should be derived by any library user. It's required
     to define ``TESTS_CONFIGURATION`` inside subclass. It should be defined as
@@ -366,11 +1904,197 @@ class SmokeTestCase(six.with_metaclass(GenerateTestMethodsMeta, TestCase)):
         (url, status, method,
             {'comment': None, 'initialize': None,
             'url_kwargs': None, 'request_data': None,
-            'user_credentials': None, 'redirect_to': None})
+            'user_credentials': None, 'redirect_to': None,
+            'max_latency_ms': None, 'max_queries': None,
+            'exact_queries': None, 'load_weight': None,
+            'max_memory_kb': None, 'leak_check': False,
+            'max_ttfb_ms': None, 'min_chunks': None,
+            'max_response_bytes': None, 'profile': False,
+            'max_templates': None, 'max_template_ms': None,
+            'warm_cache_check': False, 'max_warm_queries': None,
+            'min_cache_speedup': None, 'requires_db': True})
+
+    ``DEFAULT_MAX_LATENCY_MS`` sets latency budget for every request which
+    does not define its own ``max_latency_ms``.
+
+    ``SHARED_INITIALIZE`` is callable object which takes the class and is
+    called once per class in ``setUpTestData``. Items of returned dict are set
+    as class attributes so they are available for all callbacks.
+
+    ``SNAPSHOT_INITIALIZE`` is called like ``SHARED_INITIALIZE`` (before it)
+    but content of sqlite test database is captured right after it into
+    snapshot file in ``SNAPSHOT_DIR`` (or ``SKD_SMOKE_SNAPSHOT_DIR``
+    environment variable) and the next classes (and runs) restore it instead
+    of calling it again while migrations, schema and its source are not
+    changed. It should return json serializable dict or None.
+
+    ``INCREMENTAL_CACHE_FILE`` (or ``SKD_SMOKE_INCREMENTAL_CACHE``
+    environment variable) enables incremental mode: successful results are
+    stored in this json file and tests are skipped on the next runs while
+    their configuration and source module of resolved view are not changed.
+
+    ``BENCHMARK_ITERATIONS`` (or ``SKD_SMOKE_BENCHMARK_ITERATIONS``
+    environment variable) enables benchmark mode: every request is repeated
+    this number of times after ``BENCHMARK_WARMUP`` warm-up requests and
+    latency percentiles are printed after the class run and saved into
+    ``BENCHMARK_REPORT_FILE`` json file if any.
+
+    ``BASELINE_FILE`` (or ``SKD_SMOKE_BASELINE`` environment variable) enables
+    comparison of median latency of ``BASELINE_REPEATS`` requests and number
+    of queries with baseline stored in this json file. Test fails if its
+    measurement exceeds baseline by more than ``BASELINE_THRESHOLD``
+    (relative) in each of ``BASELINE_ROUNDS`` rounds of requests. Baseline is
+    re-recorded if ``SKD_SMOKE_BASELINE_RECORD`` environment variable is set.
+
+    ``LEAK_CHECK_*`` settings configure ``leak_check`` of requests: number of
+    warm-up and checked iterations, allowed growth of memory per iteration
+    (if ``leak_check`` is True) and check of resident memory of process.
+
+    ``PROFILE`` (or ``SKD_SMOKE_PROFILE`` environment variable) enables
+    profiling of requests by ``cProfile``: 'slow' repeats under profiler
+    requests which exceed ``max_latency_ms``, 'all' profiles every request
+    (like ``profile`` of request does). Profiles are saved as pstats and
+    collapsed stacks into ``PROFILE_DIR`` (or ``SKD_SMOKE_PROFILE_DIR``
+    environment variable) named by test names.
+
+    ``BATCH`` enables batch mode: instead of test method per request one
+    test method runs all requests (or every ``BATCH`` requests if it's int)
+    inside of their own savepoints reusing the same client. Requests are
+    reported individually by ``subTest`` (python 3.4+).
+
+    Requests marked by ``requires_db`` False are moved into generated
+    ``SimpleSmokeTestCase`` subclass named ``<class name>WithoutDatabase``
+    which is added into module of this class. Such requests run without
+    transactions and database access fails them. ``CONCURRENCY`` is applied
+    to them only (see ``SimpleSmokeTestCase``).
+
+    Callbacks decorated by ``memoized`` are called with the class once per
+    class in ``setUpTestData`` (after ``SHARED_INITIALIZE``) and their
+    results are reused by every request referencing them.
+
+    ``USER_POOL`` is ``skd_smoke.users.UserPool`` instance whose users are
+    created once per class in ``setUpTestData`` (after
+    ``SNAPSHOT_INITIALIZE``) and handed out by its ``credentials`` callables.
+
+    ``FAST_AUTH`` enables authentication of every ``user_credentials`` only
+    once per class and uses ``FAST_AUTH_PASSWORD_HASHERS`` (if any) as
+    ``PASSWORD_HASHERS`` setting during the class run.
 
     For more information please refer to project documentation:
     https://github.com/steelkiwi/django-skd-smoke#configuration
     """
 
-    TESTS_CONFIGURATION = None
-    FAIL_METHOD_NAME = 'test_fail_cause_bad_configuration'
+    @classmethod
+    def setUpClass(cls):
+        cls.snapshot = None
+        # plain function defined as class attribute is unbound method in
+        # python 2 so it's unwrapped to be called with class
+        snapshot_initialize = getattr(cls.SNAPSHOT_INITIALIZE, '__func__',
+                                      cls.SNAPSHOT_INITIALIZE)
+        if snapshot_initialize is not None:
+            from skd_smoke.snapshot import SNAPSHOT_DIR_ENV_VAR, \
+                DEFAULT_SNAPSHOT_DIR, FixtureSnapshot
+            # snapshot is attached before transaction of the class is started
+            cls.snapshot = FixtureSnapshot(
+                snapshot_initialize,
+                cls.SNAPSHOT_DIR or os.environ.get(SNAPSHOT_DIR_ENV_VAR) or
+                DEFAULT_SNAPSHOT_DIR)
+            cls.snapshot.attach()
+        try:
+            super(SmokeTestCase, cls).setUpClass()
+        except Exception:
+            if cls.snapshot is not None:
+                cls.snapshot.detach()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        super(SmokeTestCase, cls).tearDownClass()
+        if cls.snapshot is not None:
+            cls.snapshot.detach()
+
+    def _fixture_setup(self):
+        if hasattr(TestCase, 'setUpTestData'):
+            return super(SmokeTestCase, self)._fixture_setup()
+        # Django 1.7 has no setUpTestData and closes connections after every
+        # test so data can't be kept in transaction of the class. It's
+        # created inside of transaction of every test instead (like Django
+        # 1.8 does for databases without transactions).
+        if self.snapshot is not None:
+            # attached snapshot is gone with closed connection
+            self.snapshot.detach()
+            self.snapshot.attach()
+        super(SmokeTestCase, self)._fixture_setup()
+        try:
+            self.setUpTestData()
+        except Exception:
+            self._fixture_teardown()
+            raise
+
+    @classmethod
+    def setUpTestData(cls):
+        if hasattr(TestCase, 'setUpTestData'):
+            super(SmokeTestCase, cls).setUpTestData()
+        if cls.snapshot is not None:
+            cls.set_shared_objects(cls.snapshot.load(cls))
+        if cls.USER_POOL is not None:
+            cls.pooled_users = cls.USER_POOL.create_users()
+        shared_initialize = getattr(cls.SHARED_INITIALIZE, '__func__',
+                                    cls.SHARED_INITIALIZE)
+        if shared_initialize is not None:
+            cls.set_shared_objects(shared_initialize(cls))
+        # memoized callbacks can use shared objects, their data is rolled
+        # back after the class run like data of ``SHARED_INITIALIZE``
+        prepare_memoized_results(cls)
+
+    @classmethod
+    def set_shared_objects(cls, shared_objects):
+        """
+        Sets items of dict returned by ``SNAPSHOT_INITIALIZE`` or
+        ``SHARED_INITIALIZE`` as class attributes.
+
+        :param shared_objects: dict or None
+        """
+        if shared_objects is None:
+            return
+        if not isinstance(shared_objects, dict):
+            raise ImproperlyConfigured(append_doc_link(
+                INCORRECT_SHARED_OBJECTS_MSG %
+                (type(shared_objects), shared_objects)))
+        for name, value in shared_objects.items():
+            setattr(cls, name, value)
+
+
+class SimpleSmokeTestCase(six.with_metaclass(GenerateTestMethodsMeta,
+                                             SmokeTestMixin, SimpleTestCase)):
+    """
+    ``SmokeTestCase`` counterpart based on ``SimpleTestCase`` for requests
+    which do not touch database. Tests run without transactions and
+    database connections fail on access. ``SHARED_INITIALIZE`` is not called
+    and requests can't use ``user_credentials`` or checks of queries.
+
+    ``CONCURRENCY`` runs requests (of every batch if ``BATCH`` is int) by
+    this number of worker threads so requests which wait for i/o overlap.
+    It's ignored in benchmark and baseline modes.
+
+    It's derived by generated classes of requests marked by ``requires_db``
+    False and can be derived directly: its requests do not require database
+    by default.
+    """
+
+    requires_db = False
+
+    @classmethod
+    def setUpClass(cls):
+        super(SimpleSmokeTestCase, cls).setUpClass()
+        forbid_database_access(cls.__name__)
+        try:
+            prepare_memoized_results(cls)
+        except Exception:
+            cls.tearDownClass()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        allow_database_access()
+        super(SimpleSmokeTestCase, cls).tearDownClass()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from skd_smoke.benchmark import percentile
+from skd_smoke.incremental import read_results, merge_results
+
+
+# environment variable which enables baseline comparison for all smoke test
+# cases which do not define ``BASELINE_FILE``
+BASELINE_FILE_ENV_VAR = 'SKD_SMOKE_BASELINE'
+
+# if this environment variable is set baseline is re-recorded instead of
+# comparison
+BASELINE_RECORD_ENV_VAR = 'SKD_SMOKE_BASELINE_RECORD'
+
+LATENCY_REGRESSION_MSG = \
+    'Median latency %.2f ms (the lowest median of %s rounds, %s requests in ' \
+    'total) exceeds baseline %.2f ms by more than %g%%.'
+
+QUERIES_REGRESSION_MSG = \
+    'Request executed %s queries which exceeds baseline %s by more than %g%%.'
+
+
+def median(values):
+    return percentile(sorted(values), 50)
+
+
+class Baseline(object):
+    """
+    Stores median latency and number of queries of smoke tests in json file
+    and compares current measurements with them. Measurement is treated as
+    regression if it exceeds baseline by more than ``threshold`` (relative).
+
+    Noise only slows requests down so latency regression is confirmed by up
+    to ``rounds`` rounds of repeated requests and the lowest median is
+    compared. Latency regressions smaller than ``min_delta_ms`` are ignored
+    as noise too.
+    """
+
+    def __init__(self, path, threshold=0.2, repeats=5, rounds=3,
+                 min_delta_ms=1, record=False):
+        self.path = path
+        self.threshold = threshold
+        self.repeats = repeats
+        self.rounds = rounds
+        self.min_delta_ms = min_delta_ms
+        self.record = record
+        self.results = None
+        self.updated_results = {}
+
+    def load(self):
+        if self.results is None:
+            self.results = read_results(self.path)
+        return self.results
+
+    def check(self, key, timings, queries, measure=None):
+        """
+        Compares measurements of test with its baseline or records them in
+        record mode. Tests without baseline are not checked.
+
+        :param key: stable key of test
+        :param timings: durations of repeated requests in milliseconds
+        :param queries: number of executed sql queries
+        :param measure: callable object which repeats requests and returns \
+            their durations to confirm latency regression
+        :return: list of regression messages
+        """
+        median_ms = median(timings)
+        if self.record:
+            self.updated_results[key] = {'median_ms': median_ms,
+                                         'queries': queries}
+            return []
+
+        result = self.load().get(key)
+        if result is None:
+            return []
+
+        errors = []
+        allowed_ms = max(result['median_ms'] * (1 + self.threshold),
+                         result['median_ms'] + self.min_delta_ms)
+        rounds = 1
+        requests = len(timings)
+        while median_ms > allowed_ms and measure is not None and \
+                rounds < self.rounds:
+            round_timings = measure()
+            rounds += 1
+            requests += len(round_timings)
+            median_ms = min(median_ms, median(round_timings))
+        if median_ms > allowed_ms:
+            errors.append(LATENCY_REGRESSION_MSG %
+                          (median_ms, rounds, requests,
+                           result['median_ms'], self.threshold * 100))
+        if queries > result['queries'] * (1 + self.threshold):
+            errors.append(QUERIES_REGRESSION_MSG %
+                          (queries, result['queries'], self.threshold * 100))
+        return errors
+
+    def save(self):
+        """
+        Merges recorded measurements into json file (see
+        ``merge_results``).
+        """
+        if not self.updated_results:
+            return
+        merge_results(self.path, self.updated_results)
+        self.load().update(self.updated_results)
+        self.updated_results = {}
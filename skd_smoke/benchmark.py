@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from array import array
+from collections import OrderedDict
+
+from skd_smoke.incremental import merge_results
+
+
+# environment variables which enable benchmark mode for all smoke test cases
+# which do not define related class attributes
+BENCHMARK_ITERATIONS_ENV_VAR = 'SKD_SMOKE_BENCHMARK_ITERATIONS'
+BENCHMARK_WARMUP_ENV_VAR = 'SKD_SMOKE_BENCHMARK_WARMUP'
+BENCHMARK_REPORT_ENV_VAR = 'SKD_SMOKE_BENCHMARK_REPORT'
+
+PERCENTILES = (50, 95, 99)
+
+BENCHMARK_TABLE_TITLE = \
+    '\nBenchmark of %s (%s iterations, %s warm-up iterations), ms:\n'
+
+BENCHMARK_TABLE_COLUMNS = ('min', 'p50', 'p95', 'p99', 'max', 'req/s')
+
+
+def format_table(title, header, rows):
+    """
+    Formats report table with left aligned first column and right aligned
+    other columns.
+
+    :param title: title line of table
+    :param header: tuple of column names
+    :param rows: list of tuples of strings
+    :return: table as string
+    """
+    name_width = max(len(row[0]) for row in rows + [header])
+    value_width = max(len(value) for row in rows + [header]
+                      for value in row[1:])
+    lines = [title]
+    for row in [header] + rows:
+        lines.append('%s %s\n' % (
+            row[0].ljust(name_width),
+            ' '.join(value.rjust(value_width) for value in row[1:])))
+    return ''.join(lines)
+
+
+def format_number(value):
+    return '-' if value is None else '%.2f' % value
+
+
+def percentile(sorted_timings, percent):
+    """
+    Calculates percentile of sorted timings using linear interpolation
+    between the closest ranks.
+
+    :param sorted_timings: non-empty sorted sequence of numbers
+    :param percent: percent from 0 to 100
+    :return: percentile value
+    """
+    position = (len(sorted_timings) - 1) * percent / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_timings) - 1)
+    return sorted_timings[lower] + \
+        (sorted_timings[upper] - sorted_timings[lower]) * (position - lower)
+
+
+def summarize_timings(timings, warmup=0):
+    """
+    Calculates statistics of benchmark timings.
+
+    :param timings: non-empty sequence of request durations in milliseconds
+    :param warmup: number of warm-up iterations which are not timed
+    :return: ``OrderedDict`` with iterations, warmup, min_ms, p50_ms, p95_ms, \
+        p99_ms, max_ms, rps and timings_ms keys
+    """
+    sorted_timings = sorted(timings)
+    total_ms = sum(sorted_timings)
+    summary = OrderedDict()
+    summary['iterations'] = len(sorted_timings)
+    summary['warmup'] = warmup
+    summary['min_ms'] = sorted_timings[0]
+    for percent in PERCENTILES:
+        summary['p%s_ms' % percent] = percentile(sorted_timings, percent)
+    summary['max_ms'] = sorted_timings[-1]
+    summary['rps'] = len(sorted_timings) * 1000.0 / total_ms \
+        if total_ms else None
+    summary['timings_ms'] = [round(timing, 3) for timing in timings]
+    return summary
+
+
+def run_benchmark(testcase, send, status, iterations, warmup=0):
+    """
+    Repeats request ``warmup`` times without timing and then ``iterations``
+    times measuring every request. Status of every response is checked so
+    benchmark of broken page is not reported.
+
+    :param testcase: ``TestCase`` instance
+    :param send: callable which sends request and returns tuple of \
+        response, duration in milliseconds and ``ResponseStats`` (see \
+        ``skd_smoke.send_timed_request``)
+    :param status: expected http status code
+    :param iterations: number of timed requests
+    :param warmup: number of requests before timed ones
+    :return: ``array`` of request durations in milliseconds
+    """
+    for _ in range(warmup):
+        response = send()[0]
+        testcase.assertEqual(response.status_code, status)
+    timings = array(str('d'))
+    for _ in range(iterations):
+        response, elapsed_ms, _ = send()
+        timings.append(elapsed_ms)
+        testcase.assertEqual(response.status_code, status)
+    return timings
+
+
+class BenchmarkReport(object):
+    """
+    Collects benchmark statistics of smoke tests of one ``SmokeTestCase``
+    subclass. Statistics are printed as table and merged into json file if
+    its path is supplied.
+    """
+
+    def __init__(self, title, iterations, warmup=0, path=None):
+        self.title = title
+        self.iterations = iterations
+        self.warmup = warmup
+        self.path = path
+        self.results = OrderedDict()
+
+    def record(self, key, timings, templates=None):
+        """
+        Records statistics of request timings.
+
+        :param key: stable key of test
+        :param timings: sequence of request durations in milliseconds
+        :param templates: statistics of templates rendered by request (see \
+            ``TemplateRenderContext.get_report``) if any
+        """
+        summary = summarize_timings(timings, self.warmup)
+        if templates is not None:
+            summary['templates'] = templates
+        self.results[key] = summary
+
+    def format_table(self):
+        rows = []
+        for key, summary in self.results.items():
+            values = (summary['min_ms'], summary['p50_ms'],
+                      summary['p95_ms'], summary['p99_ms'],
+                      summary['max_ms'], summary['rps'])
+            rows.append((key.rsplit('.', 1)[-1],) +
+                        tuple(format_number(value) for value in values))
+        return format_table(
+            BENCHMARK_TABLE_TITLE % (self.title, self.iterations, self.warmup),
+            ('test',) + BENCHMARK_TABLE_COLUMNS, rows)
+
+    def save(self):
+        """
+        Merges collected statistics into json file (see ``merge_results``).
+        """
+        if not self.path or not self.results:
+            return
+        merge_results(self.path, self.results)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+WARM_QUERIES_NOT_REDUCED_MSG = \
+    'Warm request executed %s queries and cold request executed %s queries ' \
+    'so cache does not reduce queries. Queries of warm request:\n%s'
+
+WARM_QUERIES_BUDGET_EXCEEDED_MSG = \
+    'Warm request executed %s queries which exceeds warm queries budget of ' \
+    '%s (cold request executed %s queries). Queries of warm request:\n%s'
+
+CACHE_SPEEDUP_MSG = \
+    'Warm request took %.2f ms and cold request took %.2f ms so speedup ' \
+    '%.2f is less than expected %s.'
+
+# session engines which keep sessions in cache only so their cache is not
+# cleared (users logged in by ``user_credentials`` would be logged out)
+CACHE_SESSION_ENGINES = ('django.contrib.sessions.backends.cache',)
+
+
+def clear_caches():
+    """
+    Clears all cache backends configured by ``CACHES`` setting except the
+    one which stores sessions of ``CACHE_SESSION_ENGINES``.
+    """
+    from django.core.cache import caches
+
+    session_alias = None
+    if settings.SESSION_ENGINE in CACHE_SESSION_ENGINES:
+        session_alias = settings.SESSION_CACHE_ALIAS
+    for alias in settings.CACHES:
+        if alias != session_alias:
+            caches[alias].clear()
+
+
+class WarmCacheCheck(object):
+    """
+    Compares cold request (made after all caches are cleared) with the same
+    warm request made right after it. Warm request should execute fewer
+    queries than cold one (or at most ``max_warm_queries`` if it's supplied)
+    and be ``min_speedup`` times faster (if it's supplied). Caches are
+    cleared again after check so requests do not warm each other.
+    """
+
+    def __init__(self, max_warm_queries=None, min_speedup=None):
+        self.max_warm_queries = max_warm_queries
+        self.min_speedup = min_speedup
+
+    @staticmethod
+    def prepare():
+        clear_caches()
+
+    def run(self, testcase, send, status, cold_ms, cold_queries):
+        """
+        Makes warm request and compares it with cold one.
+
+        :param testcase: ``TestCase`` instance
+        :param send: callable which sends request (see \
+            ``skd_smoke.benchmark.run_benchmark``)
+        :param status: expected http status code
+        :param cold_ms: duration of cold request in milliseconds
+        :param cold_queries: list of sql queries of cold request
+        :return: list of error messages
+        """
+        from skd_smoke import format_queries
+
+        try:
+            with CaptureQueriesContext(connection) as captured:
+                response, warm_ms, _ = send()
+            testcase.assertEqual(response.status_code, status)
+        finally:
+            clear_caches()
+        warm_queries = [query['sql'] for query in captured.captured_queries]
+
+        errors = []
+        if self.max_warm_queries is not None:
+            if len(warm_queries) > self.max_warm_queries:
+                errors.append(WARM_QUERIES_BUDGET_EXCEEDED_MSG % (
+                    len(warm_queries), self.max_warm_queries,
+                    len(cold_queries), format_queries(warm_queries)))
+        elif cold_queries and len(warm_queries) >= len(cold_queries):
+            errors.append(WARM_QUERIES_NOT_REDUCED_MSG % (
+                len(warm_queries), len(cold_queries),
+                format_queries(warm_queries)))
+        if self.min_speedup is not None:
+            speedup = cold_ms / warm_ms if warm_ms else float('inf')
+            if speedup < self.min_speedup:
+                errors.append(CACHE_SPEEDUP_MSG % (
+                    warm_ms, cold_ms, speedup, self.min_speedup))
+        return errors
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import hashlib
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from importlib import import_module
+
+from django.utils.six import text_type
+from django.utils.six.moves.urllib.parse import urlsplit
+
+
+# environment variable which enables incremental mode for all smoke test
+# cases which do not define ``INCREMENTAL_CACHE_FILE``
+INCREMENTAL_CACHE_ENV_VAR = 'SKD_SMOKE_INCREMENTAL_CACHE'
+
+UNCHANGED_ENTRY_SKIP_MSG = \
+    'django-skd-smoke: request configuration and view module are not ' \
+    'changed since the last successful run.'
+
+# fingerprints of view modules calculated in current process
+MODULE_FINGERPRINTS = {}
+
+# result caches by their file paths
+RESULT_CACHES = {}
+
+
+def fingerprint_module(module_name):
+    """
+    Calculates fingerprint of module source file.
+
+    :param module_name: dotted module name or None
+    :return: sha1 hex digest of module source or None if module is not \
+        available
+    """
+    if module_name is None:
+        return None
+    if module_name not in MODULE_FINGERPRINTS:
+        fingerprint = None
+        try:
+            module = sys.modules.get(module_name) or import_module(module_name)
+        except ImportError:
+            module = None
+        path = getattr(module, '__file__', None)
+        if path:
+            if path.endswith(('.pyc', '.pyo')):
+                path = path[:-1]
+            try:
+                with open(path, 'rb') as source:
+                    fingerprint = hashlib.sha1(source.read()).hexdigest()
+            except IOError:
+                pass
+        MODULE_FINGERPRINTS[module_name] = fingerprint
+    return MODULE_FINGERPRINTS[module_name]
+
+
+def get_view_module(url):
+    """
+    Resolves supplied url and returns module of related view.
+
+    :param url: resolved url
+    :return: dotted module name of view or None if url is not resolved
+    """
+    from django.core.urlresolvers import resolve, Resolver404
+
+    try:
+        match = resolve(urlsplit(url).path)
+    except Resolver404:
+        return None
+    return getattr(match.func, '__module__', None)
+
+
+def read_results(path):
+    if not os.path.exists(path):
+        return {}
+    with io.open(path, encoding='utf-8') as results_file:
+        try:
+            return json.load(results_file)
+        except ValueError:
+            return {}
+
+
+def write_results(path, results):
+    """
+    Writes results into json file atomically so concurrent readers never see
+    partially written file.
+
+    :param path: path to json file
+    :param results: json serializable dict
+    """
+    temp_path = '%s.%s.tmp' % (path, os.getpid())
+    with io.open(temp_path, 'w', encoding='utf-8') as results_file:
+        results_file.write(
+            text_type(json.dumps(results, indent=1, sort_keys=True)))
+    # os.replace overwrites existing file on every platform (python 3.3+)
+    getattr(os, 'replace', os.rename)(temp_path, path)
+
+
+@contextmanager
+def lock_results(path):
+    """
+    Holds exclusive ``flock`` of sidecar ``<path>.lock`` file so concurrent
+    processes (e.g. workers of ``SmokeTestRunner``) update results file one
+    by one. Nothing is locked on platforms without ``fcntl``.
+
+    :param path: path to json file
+    """
+    try:
+        import fcntl
+    except ImportError:  # windows
+        yield
+        return
+    with io.open('%s.lock' % path, 'a') as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def merge_results(path, updated_results):
+    """
+    Merges updated results into json file. File is reread and rewritten
+    under ``lock_results`` so results of concurrent processes are not lost.
+
+    :param path: path to json file
+    :param updated_results: dict of updated results
+    :return: merged results
+    """
+    with lock_results(path):
+        results = read_results(path)
+        results.update(updated_results)
+        write_results(path, results)
+    return results
+
+
+class ResultCache(object):
+    """
+    Stores successful results of smoke tests in json file. Every result is
+    stored with fingerprint of request configuration and module and
+    fingerprint of resolved view. Test is treated as unchanged if its result
+    exists with the same configuration fingerprint and its view module has
+    the same fingerprint.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.results = None
+        self.updated_results = {}
+
+    def load(self):
+        if self.results is None:
+            self.results = read_results(self.path)
+        return self.results
+
+    def is_unchanged(self, key, config_fingerprint=None):
+        result = self.load().get(key)
+        if result is None or \
+                result.get('config_fingerprint') != config_fingerprint:
+            return False
+        return result['view_fingerprint'] == \
+            fingerprint_module(result['view_module'])
+
+    def record_success(self, key, url, config_fingerprint=None):
+        view_module = get_view_module(url)
+        self.updated_results[key] = {
+            'config_fingerprint': config_fingerprint,
+            'view_module': view_module,
+            'view_fingerprint': fingerprint_module(view_module),
+        }
+
+    def save(self):
+        """
+        Merges updated results into cache file (see ``merge_results``).
+        """
+        if not self.updated_results:
+            return
+        merge_results(self.path, self.updated_results)
+        self.load().update(self.updated_results)
+        self.updated_results = {}
+
+
+def get_result_cache(path):
+    """
+    Returns shared ``ResultCache`` instance for supplied path.
+
+    :param path: path to json file or None
+    :return: ``ResultCache`` instance or None if path is None
+    """
+    if not path:
+        return None
+    path = os.path.abspath(path)
+    if path not in RESULT_CACHES:
+        RESULT_CACHES[path] = ResultCache(path)
+    return RESULT_CACHES[path]
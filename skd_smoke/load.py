@@ -0,0 +1,333 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import socket
+import sys
+import threading
+from bisect import bisect
+from collections import namedtuple, OrderedDict
+from random import Random
+from timeit import default_timer
+
+from django.conf import settings
+from django.core.servers.basehttp import WSGIServer
+from django.shortcuts import resolve_url
+from django.test import LiveServerTestCase
+from django.test.client import Client
+from django.utils import six
+from django.utils.crypto import get_random_string
+from django.utils.six.moves import http_client
+from django.utils.six.moves.socketserver import ThreadingMixIn
+from django.utils.six.moves.urllib.parse import urlencode
+
+from skd_smoke import prepare_configuration, prepare_test_name, \
+    make_unique_name, check_setting, positive_int, positive_number, \
+    non_negative_number, INCORRECT_USER_CREDENTIALS
+from skd_smoke.benchmark import PERCENTILES, format_table, format_number, \
+    percentile
+from skd_smoke.incremental import merge_results
+
+
+LOAD_TABLE_TITLE = \
+    '\nLoad test of %s (%s threads, %.1f seconds), latency in ms:\n'
+
+LOAD_TABLE_COLUMNS = ('requests', 'errors,%', 'req/s', 'min', 'p50', 'p95',
+                      'p99', 'max')
+
+LOAD_ERROR_RATE_EXCEEDED_MSG = \
+    'Error rate %.2f%% of load test exceeds allowed %.2f%%.'
+
+TOTAL_ROW_NAME = 'total'
+
+# methods whose data is sent in query string like ``django.test.Client`` does
+QUERY_STRING_METHODS = {'GET', 'HEAD', 'TRACE'}
+
+LoadRequest = namedtuple(
+    'LoadRequest', 'name method path body headers status weight')
+
+
+def prepare_load_request(testcase, name, urlname, status, method, data):
+    """
+    Calls callbacks of configuration entry once in the same order as
+    generated smoke test does and prepares http request to replay it.
+    Logged in user is represented by session cookie. Request which sends
+    body gets csrf cookie and header cause live server checks csrf token.
+
+    :param testcase: ``SmokeLoadTestCase`` instance
+    :param name: name of request in report
+    :param urlname: plain url or urlname or namespace:urlname
+    :param status: expected http status code
+    :param method: http method (get, post, etc.)
+    :param data: dict of not required configuration parameters
+    :return: ``LoadRequest`` instance
+    """
+    initialize = data.get('initialize')
+    if initialize:
+        initialize(testcase)
+
+    url_args = data.get('url_args')
+    if callable(url_args):
+        url_args = url_args(testcase)
+    url_kwargs = data.get('url_kwargs')
+    if callable(url_kwargs):
+        url_kwargs = url_kwargs(testcase)
+    path = resolve_url(urlname, *(url_args or []), **(url_kwargs or {}))
+
+    cookies = {}
+    headers = {}
+    user_credentials = data.get('user_credentials')
+    if user_credentials:
+        if callable(user_credentials):
+            credentials = user_credentials(testcase)
+        else:
+            credentials = user_credentials
+        client = Client()
+        testcase.assertTrue(client.login(**credentials),
+                            INCORRECT_USER_CREDENTIALS % credentials)
+        session_cookie = settings.SESSION_COOKIE_NAME
+        cookies[session_cookie] = client.cookies[session_cookie].value
+
+    request_data = data.get('request_data')
+    if callable(request_data):
+        request_data = request_data(testcase)
+    encoded_data = urlencode(request_data or {}, doseq=True)
+
+    method = method.upper()
+    body = None
+    if method in QUERY_STRING_METHODS:
+        if encoded_data:
+            path = '%s?%s' % (path, encoded_data)
+    else:
+        body = encoded_data
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        csrf_token = get_random_string(32)
+        cookies[settings.CSRF_COOKIE_NAME] = csrf_token
+        headers['X-CSRFToken'] = csrf_token
+
+    if cookies:
+        headers['Cookie'] = '; '.join('%s=%s' % item
+                                      for item in sorted(cookies.items()))
+    return LoadRequest(name, method, path, body, headers, status,
+                       data.get('load_weight', 1))
+
+
+def run_load_worker(host, port, requests, deadline, seed, results,
+                    timeout=30):
+    """
+    Sends randomly chosen requests with respect to their weights until
+    deadline. Connection is kept open while server allows it.
+
+    :param host: host of live server
+    :param port: port of live server
+    :param requests: list of ``LoadRequest`` instances
+    :param deadline: ``timeit.default_timer`` value to stop at
+    :param seed: seed of random requests order
+    :param results: list to append (request index, duration in \
+        milliseconds, True if expected status is returned) tuples to
+    :param timeout: socket timeout in seconds
+    """
+    random = Random(seed)
+    cumulative_weights = []
+    total_weight = 0
+    for request in requests:
+        total_weight += request.weight
+        cumulative_weights.append(total_weight)
+
+    connection = None
+    while default_timer() < deadline:
+        index = min(bisect(cumulative_weights, random.random() * total_weight),
+                    len(requests) - 1)
+        request = requests[index]
+        if connection is None:
+            connection = http_client.HTTPConnection(host, port,
+                                                    timeout=timeout)
+        started_at = default_timer()
+        try:
+            connection.request(request.method, request.path, request.body,
+                               request.headers)
+            response = connection.getresponse()
+            response.read()
+            success = response.status == request.status
+            if response.will_close:
+                connection.close()
+                connection = None
+        except (socket.error, http_client.HTTPException):
+            success = False
+            connection.close()
+            connection = None
+        results.append((index, (default_timer() - started_at) * 1000,
+                        success))
+    if connection is not None:
+        connection.close()
+
+
+def summarize_load(timings, errors, duration):
+    """
+    Calculates statistics of load test requests.
+
+    :param timings: list of request durations in milliseconds
+    :param errors: number of failed requests
+    :param duration: duration of load test in seconds
+    :return: ``OrderedDict`` with requests, errors, error_rate, rps, min_ms, \
+        p50_ms, p95_ms, p99_ms and max_ms keys
+    """
+    sorted_timings = sorted(timings)
+    summary = OrderedDict()
+    summary['requests'] = len(sorted_timings)
+    summary['errors'] = errors
+    summary['error_rate'] = \
+        float(errors) / len(sorted_timings) if sorted_timings else None
+    summary['rps'] = \
+        float(len(sorted_timings)) / duration if duration else None
+    summary['min_ms'] = sorted_timings[0] if sorted_timings else None
+    for percent in PERCENTILES:
+        summary['p%s_ms' % percent] = percentile(sorted_timings, percent) \
+            if sorted_timings else None
+    summary['max_ms'] = sorted_timings[-1] if sorted_timings else None
+    return summary
+
+
+def prepare_load_report(requests, results, duration):
+    """
+    Groups results of load test workers by requests.
+
+    :param requests: list of ``LoadRequest`` instances
+    :param results: list of (request index, duration, success) tuples
+    :param duration: duration of load test in seconds
+    :return: ``OrderedDict`` of summaries by request names with total \
+        summary in the end
+    """
+    timings = [[] for _ in requests]
+    errors = [0] * len(requests)
+    for index, elapsed_ms, success in results:
+        timings[index].append(elapsed_ms)
+        if not success:
+            errors[index] += 1
+
+    report = OrderedDict()
+    for index, request in enumerate(requests):
+        report[request.name] = summarize_load(
+            timings[index], errors[index], duration)
+    report[TOTAL_ROW_NAME] = summarize_load(
+        [elapsed_ms for _, elapsed_ms, _ in results], sum(errors), duration)
+    return report
+
+
+def format_load_report(title, concurrency, duration, report):
+    rows = []
+    for name, summary in report.items():
+        error_rate = summary['error_rate']
+        rows.append((name, '%s' % summary['requests'], format_number(
+            None if error_rate is None else error_rate * 100)) + tuple(
+            format_number(summary[key])
+            for key in ('rps', 'min_ms', 'p50_ms', 'p95_ms', 'p99_ms',
+                        'max_ms')))
+    return format_table(LOAD_TABLE_TITLE % (title, concurrency, duration),
+                        ('request',) + LOAD_TABLE_COLUMNS, rows)
+
+
+def run_load_test(self):
+    """
+    Test method of ``SmokeLoadTestCase`` subclasses.
+    """
+    config = prepare_configuration(self.TESTS_CONFIGURATION)
+    check_setting('LOAD_CONCURRENCY', self.LOAD_CONCURRENCY, positive_int,
+                  'positive int')
+    check_setting('LOAD_DURATION', self.LOAD_DURATION, positive_number,
+                  'positive number')
+    if self.LOAD_MAX_ERROR_RATE is not None:
+        check_setting('LOAD_MAX_ERROR_RATE', self.LOAD_MAX_ERROR_RATE,
+                      non_negative_number, 'non-negative number')
+
+    # fixtures are created before load so they are not measured
+    names = set()
+    requests = []
+    for urlname, status, method, data in config:
+        name = make_unique_name(prepare_test_name(urlname, method, status,
+                                                  data), names)
+        requests.append(prepare_load_request(self, name, urlname, status,
+                                             method, data))
+
+    server = self.server_thread
+    results = [[] for _ in range(self.LOAD_CONCURRENCY)]
+    started_at = default_timer()
+    deadline = started_at + self.LOAD_DURATION
+    workers = [threading.Thread(
+        target=run_load_worker,
+        args=(server.host, server.port, requests, deadline, seed,
+              results[seed]))
+        for seed in range(self.LOAD_CONCURRENCY)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    duration = default_timer() - started_at
+
+    title = '%s.%s' % (type(self).__module__, type(self).__name__)
+    report = prepare_load_report(
+        requests, [result for worker_results in results
+                   for result in worker_results], duration)
+    sys.stderr.write(format_load_report(title, self.LOAD_CONCURRENCY,
+                                        duration, report))
+    if self.LOAD_REPORT_FILE:
+        merge_results(self.LOAD_REPORT_FILE, dict(
+            ('%s.%s' % (title, name), summary)
+            for name, summary in report.items()))
+
+    error_rate = report[TOTAL_ROW_NAME]['error_rate'] or 0
+    if self.LOAD_MAX_ERROR_RATE is not None and \
+            error_rate > self.LOAD_MAX_ERROR_RATE:
+        self.fail(LOAD_ERROR_RATE_EXCEEDED_MSG %
+                  (error_rate * 100, self.LOAD_MAX_ERROR_RATE * 100))
+
+
+class ThreadedWSGIServer(ThreadingMixIn, WSGIServer):
+    """
+    ``WSGIServer`` which handles every request in its own thread.
+    """
+
+    daemon_threads = True
+
+
+class LoadTestMeta(type):
+    """
+    Metaclass which adds ``test_load`` method to subclasses only so
+    ``SmokeLoadTestCase`` itself is not collected by test loader.
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        cls = super(LoadTestMeta, mcs).__new__(mcs, name, bases, attrs)
+        parents = [b for b in bases if isinstance(b, LoadTestMeta)]
+        if parents and not hasattr(cls, 'test_load'):
+            cls.test_load = run_load_test
+        return cls
+
+
+class SmokeLoadTestCase(six.with_metaclass(LoadTestMeta, LiveServerTestCase)):
+    """
+    ``LiveServerTestCase`` which replays ``TESTS_CONFIGURATION`` (the same as
+    ``SmokeTestCase`` one) against live server from ``LOAD_CONCURRENCY``
+    threads during ``LOAD_DURATION`` seconds. Requests are chosen randomly
+    according to their ``load_weight``. All callbacks are called once before
+    load. Throughput, error rate (response status differs from expected one)
+    and latency percentiles of every request and in total are printed and
+    saved into ``LOAD_REPORT_FILE`` json file if any. Test fails if total
+    error rate exceeds ``LOAD_MAX_ERROR_RATE`` (if any). Live server handles
+    every request in its own thread.
+    """
+
+    TESTS_CONFIGURATION = None
+    LOAD_CONCURRENCY = 4
+    LOAD_DURATION = 10
+    LOAD_MAX_ERROR_RATE = None
+    LOAD_REPORT_FILE = None
+
+    @classmethod
+    def setUpClass(cls):
+        super(SmokeLoadTestCase, cls).setUpClass()
+        # live server of Django 1.7 and 1.8 handles requests one by one so
+        # load would measure their queue only. It's switched to threaded
+        # server before the first request.
+        httpd = getattr(cls.server_thread, 'httpd', None)
+        if httpd is not None and not isinstance(httpd, ThreadingMixIn):
+            httpd.__class__ = ThreadedWSGIServer
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from functools import WRAPPER_ASSIGNMENTS, update_wrapper
+
+
+# parameters of request which can be memoized callbacks, they are listed in
+# order of their calls by test method
+MEMOIZED_PARAMS = ('initialize', 'url_args', 'url_kwargs',
+                   'user_credentials', 'request_data')
+
+
+class MemoizedCallback(object):
+    """
+    Callback of request which is called once per class and whose result is
+    reused by every request referencing it (see ``memoized``). Results are
+    keyed by wrapped callable so the same function memoized several times
+    is called once too.
+    """
+
+    def __init__(self, func):
+        if isinstance(func, MemoizedCallback):
+            func = func.func
+        self.func = func
+        # names are kept so test names do not depend on memoization, callable
+        # objects may have no name (e.g. ``partial`` in python 2)
+        update_wrapper(self, func, [attr for attr in WRAPPER_ASSIGNMENTS
+                                    if hasattr(func, attr)])
+
+    def __call__(self, testcase):
+        results = getattr(testcase, 'memoized_results', None)
+        if results is None or self.func not in results:
+            # results are prepared once per class, result of callback which
+            # is not referenced by configuration of the class is not stored
+            # cause its data would be rolled back after the test
+            return self.func(testcase)
+        return results[self.func]
+
+
+def memoized(func):
+    """
+    Decorator of ``initialize``, ``url_args``, ``url_kwargs``,
+    ``user_credentials`` and ``request_data`` callbacks which creates data
+    shared by several requests. Decorated callback is called with test class
+    (instead of test case instance) only once per class: in
+    ``setUpTestData`` of ``SmokeTestCase`` and in ``setUpClass`` of
+    ``SimpleSmokeTestCase``. Its result is reused by every request of the
+    class and dropped after the class run.
+
+    :param func: callable object which takes test case
+    :return: ``MemoizedCallback`` instance
+    """
+    return MemoizedCallback(func)
+
+
+def collect_memoized_callbacks(config):
+    """
+    Collects memoized callbacks referenced by supplied configuration.
+
+    :param config: list of (url, status, method, data) tuples
+    :return: list of unique ``MemoizedCallback`` instances in order of calls
+    """
+    callbacks = []
+    funcs = set()
+    for _, _, _, data in config:
+        for param in MEMOIZED_PARAMS:
+            callback = data.get(param)
+            if isinstance(callback, MemoizedCallback) and \
+                    callback.func not in funcs:
+                funcs.add(callback.func)
+                callbacks.append(callback)
+    return callbacks
+
+
+def prepare_memoized_results(cls):
+    """
+    Calls memoized callbacks of supplied class and of its bases once and
+    stores their results into ``memoized_results`` of the class.
+
+    :param cls: ``SmokeTestCase`` or ``SimpleSmokeTestCase`` subclass
+    """
+    cls.memoized_results = results = {}
+    for klass in reversed(cls.__mro__):
+        for callback in klass.__dict__.get('memoized_callbacks', ()):
+            if callback.func not in results:
+                results[callback.func] = callback.func(cls)
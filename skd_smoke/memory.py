@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import gc
+import os
+import sys
+
+
+# tracemalloc is a part of standard library since python 3.4, it's imported
+# on use only so modules which don't check memory don't pay for its import
+TRACEMALLOC_AVAILABLE = sys.version_info >= (3, 4)
+
+# number of allocation sites listed in failure messages
+MEMORY_TOP_LINES = 10
+
+MEMORY_STATISTIC_LINE = '%s: %+.1f KiB in %+d blocks'
+
+LEAK_DETECTED_MSG = \
+    'Memory held after request grows by %.2f KiB per iteration (%s ' \
+    'iterations after %s warm-up iterations) which exceeds allowed %s KiB. ' \
+    'Growth by allocation sites during the last part of iterations:\n%s'
+
+RSS_LEAK_DETECTED_MSG = \
+    'Resident memory of process grows by %.2f KiB per iteration (%s ' \
+    'iterations after %s warm-up iterations) which exceeds allowed %s KiB.'
+
+
+def get_trace_filters():
+    import tracemalloc
+
+    return [tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            tracemalloc.Filter(False, '<unknown>')]
+
+
+def compare_snapshots(snapshot, old_snapshot):
+    """
+    Calculates growth of memory between supplied snapshots grouped by source
+    lines of allocations.
+
+    :param snapshot: ``tracemalloc.Snapshot`` instance
+    :param old_snapshot: previous ``tracemalloc.Snapshot`` instance
+    :return: list of ``tracemalloc.StatisticDiff``, the biggest growth first
+    """
+    filters = get_trace_filters()
+    statistics = snapshot.filter_traces(filters).compare_to(
+        old_snapshot.filter_traces(filters), 'lineno')
+    return sorted(statistics, key=lambda statistic: statistic.size_diff,
+                  reverse=True)
+
+
+def format_memory_statistics(statistics, limit=MEMORY_TOP_LINES):
+    """
+    Formats allocation sites with positive growth.
+
+    :param statistics: list of ``tracemalloc.StatisticDiff`` sorted by growth
+    :param limit: maximum number of listed allocation sites
+    :return: one line per allocation site
+    """
+    return '\n'.join(
+        MEMORY_STATISTIC_LINE % (statistic.traceback,
+                                 statistic.size_diff / 1024.0,
+                                 statistic.count_diff)
+        for statistic in statistics[:limit] if statistic.size_diff > 0)
+
+
+def get_rss_kb():
+    """
+    Returns current resident set size of process in KiB. Only linux is
+    supported.
+
+    :return: resident set size or None if it's not available
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf(str('SC_PAGE_SIZE')) / 1024.0
+    except (IOError, OSError, IndexError, ValueError, AttributeError):
+        return None
+
+
+class TraceMemoryContext(object):
+    """
+    Context manager which traces memory allocations with ``tracemalloc``
+    inside its block. Tracing is started on enter and stopped on exit unless
+    it was already started by somebody else. After exit ``peak_kb`` contains
+    peak of traced memory in KiB relative to the memory on enter and
+    ``statistics`` contains growth of allocations which are still held
+    grouped by source lines.
+
+    Peak can't be reset on python < 3.9 so if tracing was already started
+    peak may include allocations made before enter.
+    """
+
+    def __init__(self, frames=1):
+        self.frames = frames
+        self.started = False
+        self.initial_snapshot = None
+        self.initial_memory = 0
+        self.peak_kb = None
+        self.statistics = None
+
+    def __enter__(self):
+        import tracemalloc
+
+        self.started = not tracemalloc.is_tracing()
+        if self.started:
+            tracemalloc.start(self.frames)
+        elif hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        self.initial_snapshot = tracemalloc.take_snapshot()
+        # memory of snapshot itself is not counted
+        self.initial_memory = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        import tracemalloc
+
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_kb = max(peak - self.initial_memory, 0) / 1024.0
+        self.statistics = compare_snapshots(tracemalloc.take_snapshot(),
+                                            self.initial_snapshot)
+        self.initial_snapshot = None
+        if self.started:
+            tracemalloc.stop()
+
+
+class LeakCheck(object):
+    """
+    Repeats request ``warmup`` times to fill caches and then ``iterations``
+    times tracing memory allocations. Iterations are split into ``segments``
+    consecutive parts and memory which is still held after ``gc.collect()``
+    is snapshotted after warm-up and after every part. Leak grows steadily so
+    the smallest growth per iteration of all parts is checked against
+    ``max_growth_kb``, one-off growth (lazy caches, resized dicts, etc.)
+    happens in some parts only. If ``rss`` is True growth of resident memory
+    of process is checked the same way.
+    """
+
+    def __init__(self, iterations=20, warmup=5, max_growth_kb=1, rss=False,
+                 segments=4, frames=1):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.max_growth_kb = max_growth_kb
+        self.rss = rss
+        self.segments = min(segments, iterations)
+        self.frames = frames
+
+    @staticmethod
+    def repeat(testcase, send, status, iterations):
+        for _ in range(iterations):
+            response = send()[0]
+            testcase.assertEqual(response.status_code, status)
+
+    @staticmethod
+    def measure():
+        import tracemalloc
+
+        gc.collect()
+        return tracemalloc.take_snapshot(), get_rss_kb()
+
+    def run(self, testcase, send, status):
+        """
+        Repeats request and checks memory growth.
+
+        :param testcase: ``TestCase`` instance
+        :param send: callable which sends request (see ``run_benchmark``)
+        :param status: expected http status code
+        :return: list of leak messages
+        """
+        import tracemalloc
+
+        size, rest = divmod(self.iterations, self.segments)
+        parts = [size + (1 if number < rest else 0)
+                 for number in range(self.segments)]
+        # warm-up iterations are traced too so objects which are held
+        # between requests (e.g. the last response) are in all snapshots
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(self.frames)
+        try:
+            self.repeat(testcase, send, status, self.warmup)
+            measurements = [self.measure()]
+            for part in parts:
+                self.repeat(testcase, send, status, part)
+                measurements.append(self.measure())
+        finally:
+            if started:
+                tracemalloc.stop()
+
+        growths_kb = []
+        rss_growths_kb = []
+        for part, (old_snapshot, old_rss_kb), (snapshot, rss_kb) in zip(
+                parts, measurements, measurements[1:]):
+            statistics = compare_snapshots(snapshot, old_snapshot)
+            growths_kb.append(sum(statistic.size_diff
+                                  for statistic in statistics) /
+                              1024.0 / part)
+            if old_rss_kb is not None and rss_kb is not None:
+                rss_growths_kb.append((rss_kb - old_rss_kb) / part)
+
+        errors = []
+        if min(growths_kb) > self.max_growth_kb:
+            errors.append(LEAK_DETECTED_MSG % (
+                min(growths_kb), self.iterations, self.warmup,
+                self.max_growth_kb, format_memory_statistics(statistics)))
+        if self.rss and rss_growths_kb and \
+                min(rss_growths_kb) > self.max_growth_kb:
+            errors.append(RSS_LEAK_DETECTED_MSG % (
+                min(rss_growths_kb), self.iterations, self.warmup,
+                self.max_growth_kb))
+        return errors
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import errno
+import io
+import os
+from collections import Counter, defaultdict
+
+
+# environment variables which enable profiling for all smoke test cases
+# which do not define related class attributes
+PROFILE_ENV_VAR = 'SKD_SMOKE_PROFILE'
+PROFILE_DIR_ENV_VAR = 'SKD_SMOKE_PROFILE_DIR'
+
+# 'slow' profiles requests which exceed latency budget, 'all' profiles every
+# request
+PROFILE_MODES = ('slow', 'all')
+
+DEFAULT_PROFILE_DIR = 'smoke-profiles'
+
+# branches of call graph which took less time are not written into collapsed
+# stacks (in seconds)
+MIN_COLLAPSED_TIME = 1e-6
+
+PROFILE_SAVED_MSG = \
+    'Profile of request is saved into %s and %s (collapsed stacks).'
+
+
+class ProfileContext(object):
+    """
+    Context manager which profiles its block by ``cProfile``.
+    """
+
+    def __init__(self):
+        import cProfile
+
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self.profile
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profile.disable()
+
+
+def format_frame(function):
+    filename, lineno, name = function
+    if filename == '~':  # built-in function
+        return name
+    return '%s (%s:%s)' % (name, filename, lineno)
+
+
+def collapse_stats(stats, min_time=MIN_COLLAPSED_TIME):
+    """
+    Converts profile into collapsed stacks which are used by flame graph
+    tools. ``cProfile`` records only caller/callee pairs so own time of
+    every function is split between stacks in proportion to cumulative time
+    of calls along them. Recursive calls are folded into the first call.
+
+    :param stats: ``stats`` attribute of ``pstats.Stats`` instance
+    :param min_time: branches which took less time in seconds are dropped
+    :return: list of "frame;frame;frame microseconds" lines
+    """
+    callees = defaultdict(list)
+    roots = []
+    for function, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            roots.append(function)
+        for caller, (_, _, _, cumulative_time) in callers.items():
+            callees[caller].append((function, cumulative_time))
+
+    stacks = Counter()
+
+    def walk(function, path, frames, time):
+        path = path + (function,)
+        frames = frames + (format_frame(function),)
+        _, _, own_time, cumulative_time, _ = stats[function]
+        share = time / cumulative_time if cumulative_time else 0
+        stacks[';'.join(frames)] += own_time * share
+        for callee, callee_time in sorted(callees[function]):
+            callee_time *= share
+            if callee not in path and callee_time >= min_time:
+                walk(callee, path, frames, callee_time)
+
+    for root in sorted(roots):
+        walk(root, (), (), stats[root][3])
+    return ['%s %d' % (stack, round(time * 1000000))
+            for stack, time in sorted(stacks.items())
+            if round(time * 1000000) > 0]
+
+
+def save_profile(profile, directory, name):
+    """
+    Saves profile into ``<name>.pstats`` and ``<name>.collapsed`` files in
+    supplied directory. Directory is created if it's missing.
+
+    :param profile: ``cProfile.Profile`` instance
+    :param directory: directory of profiles
+    :param name: stable name of profiled request
+    :return: tuple of pstats and collapsed stacks file paths
+    """
+    import pstats
+
+    try:
+        os.makedirs(directory)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    base_path = os.path.join(directory, name)
+    stats_path = base_path + '.pstats'
+    collapsed_path = base_path + '.collapsed'
+    profile.dump_stats(stats_path)
+    stats = pstats.Stats(profile)
+    with io.open(collapsed_path, 'w', encoding='utf-8') as collapsed_file:
+        for line in collapse_stats(stats.stats):
+            collapsed_file.write('%s\n' % line)
+    return stats_path, collapsed_path
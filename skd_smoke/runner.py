@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import multiprocessing
+import os
+import unittest
+from optparse import make_option
+
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.utils.encoding import force_text
+from django.utils.six.moves.queue import Empty
+
+from skd_smoke import SmokeTestCase, SimpleSmokeTestCase
+from skd_smoke.baseline import BASELINE_RECORD_ENV_VAR
+
+
+# seconds to wait for worker message before checking if workers are alive
+WORKER_MESSAGE_TIMEOUT = 1
+
+WORKER_CRASHED_MSG = \
+    'django-skd-smoke worker process #%s exited unexpectedly with exit ' \
+    'code %s before this test was finished.'
+
+STOP_WORKER_EVENT = 'stopWorker'
+
+# options are declared once for argparse (Django 1.8) and optparse
+# (Django 1.7) parsers of test command
+SMOKE_RUNNER_OPTIONS = (
+    ('--smoke-processes', {
+        'action': 'store', 'dest': 'smoke_processes', 'type': int,
+        'default': None,
+        'help': 'Number of processes to run smoke tests. Defaults to the '
+                'number of CPU cores.'}),
+    ('--smoke-record-baseline', {
+        'action': 'store_true', 'dest': 'smoke_record_baseline',
+        'default': False,
+        'help': 'Re-record performance baseline of smoke tests instead of '
+                'comparison.'}),
+)
+
+
+def iter_tests(suite):
+    """
+    Iterates over all tests of supplied suite including nested suites.
+
+    :param suite: ``unittest.TestSuite`` or test case instance
+    :return: generator of test case instances
+    """
+    if isinstance(suite, unittest.TestSuite):
+        for test in suite:
+            for nested_test in iter_tests(test):
+                yield nested_test
+    else:
+        yield suite
+
+
+def split_smoke_tests(suite):
+    """
+    Splits supplied suite into tests generated by ``SmokeTestCase``
+    subclasses and all other tests preserving their order.
+
+    :param suite: ``unittest.TestSuite``
+    :return: tuple of two lists (smoke tests, other tests)
+    """
+    smoke_tests = []
+    other_tests = []
+    for test in iter_tests(suite):
+        if isinstance(test, SmokeTestCase):
+            smoke_tests.append(test)
+        else:
+            other_tests.append(test)
+    return smoke_tests, other_tests
+
+
+def suite_requires_db(suite):
+    """
+    Checks if supplied suite needs test databases. Only tests of
+    ``SimpleSmokeTestCase`` subclasses are known to work without them cause
+    their database access fails instead of touching non-test database.
+
+    :param suite: ``unittest.TestSuite``
+    :return: False if all tests are database free smoke tests
+    """
+    return not all(isinstance(test, SimpleSmokeTestCase)
+                   for test in iter_tests(suite))
+
+
+def split_into_shards(tests, number):
+    """
+    Splits tests into contiguous shards of almost equal size. Contiguous
+    shards keep tests of the same class together so class level fixtures are
+    built by as few workers as possible.
+
+    :param tests: list of tests
+    :param number: desired number of shards
+    :return: list of at most ``number`` non-empty lists
+    """
+    number = max(1, min(number, len(tests)))
+    size, rest = divmod(len(tests), number)
+    shards = []
+    start = 0
+    for shard_number in range(number):
+        end = start + size + (1 if shard_number < rest else 0)
+        shards.append(tests[start:end])
+        start = end
+    return [shard for shard in shards if shard]
+
+
+def get_fork_context():
+    """
+    Returns multiprocessing context which forks worker processes or ``None``
+    if fork is not supported by platform. Workers rely on fork to inherit
+    already built test suite and configured django.
+    """
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if get_context is None:
+        # python 2 always forks on posix platforms
+        if hasattr(os, 'fork'):
+            return multiprocessing
+        return None
+    try:
+        return get_context('fork')
+    except ValueError:
+        return None
+
+
+def setup_worker_databases(worker_number, verbosity, keepdb):
+    """
+    Creates own test database for every connection of forked worker process.
+    In-memory sqlite databases are skipped cause memory of forked process
+    already contains their private copy.
+
+    :param worker_number: number of worker used as test database name suffix
+    :param verbosity: verbosity of database creation
+    :param keepdb: if True existing test databases are reused
+    :return: list of (connection, parent test database name) tuples
+    """
+    # keepdb is not supported by Django 1.7 so it's passed only if it's set
+    keepdb_kwargs = {'keepdb': True} if keepdb else {}
+    old_names = []
+    for alias in connections:
+        connection = connections[alias]
+        test_database_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite' and \
+                is_in_memory_db(test_database_name):
+            continue
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = \
+            '%s_%s' % (test_database_name, worker_number)
+        connection.creation.create_test_db(
+            verbosity=verbosity, autoclobber=True, **keepdb_kwargs)
+        old_names.append((connection, test_database_name))
+    return old_names
+
+
+def teardown_worker_databases(old_names, verbosity, keepdb):
+    keepdb_kwargs = {'keepdb': True} if keepdb else {}
+    for connection, old_name in old_names:
+        connection.creation.destroy_test_db(old_name, verbosity,
+                                            **keepdb_kwargs)
+
+
+def is_in_memory_db(name):
+    """
+    Checks if sqlite database name is in-memory one (the same way as
+    ``is_in_memory_db`` of sqlite connection which is absent in Django 1.7).
+
+    :param name: sqlite database name
+    :return: True if database is in-memory
+    """
+    return name == ':memory:' or 'mode=memory' in force_text(name)
+
+
+class RemoteTestError(Exception):
+    """
+    Error which carries formatted traceback of test failure or error
+    occurred in worker process.
+    """
+
+
+class RemoteErrorHolder(object):
+    """
+    Placeholder for errors of worker process which are not related to any
+    test (e.g. ``setUpClass`` errors). Mimics ``unittest`` error holder.
+    """
+    failureException = None
+
+    def __init__(self, description):
+        self.description = description
+
+    def id(self):
+        return self.description
+
+    def shortDescription(self):
+        return None
+
+    def countTestCases(self):
+        return 0
+
+    def __str__(self):
+        return self.description
+
+
+class QueueTestResult(unittest.TestResult):
+    """
+    Test result of worker process which sends every event to parent process
+    through supplied queue as ``(worker number, event, test index, details)``
+    tuple.
+    """
+
+    def __init__(self, queue, worker_number, indexes):
+        super(QueueTestResult, self).__init__()
+        self.queue = queue
+        self.worker_number = worker_number
+        self.indexes = indexes
+
+    def send(self, event, test, details=None):
+        index = self.indexes.get(id(test))
+        if index is None:
+            details = (str(test), details)
+        self.queue.put((self.worker_number, event, index, details))
+
+    def startTest(self, test):
+        super(QueueTestResult, self).startTest(test)
+        self.send('startTest', test)
+
+    def stopTest(self, test):
+        super(QueueTestResult, self).stopTest(test)
+        self.send('stopTest', test)
+
+    def addSuccess(self, test):
+        self.send('addSuccess', test)
+
+    def addError(self, test, err):
+        self.send('addError', test, self._exc_info_to_string(err, test))
+
+    def addFailure(self, test, err):
+        self.send('addFailure', test, self._exc_info_to_string(err, test))
+
+    def addSkip(self, test, reason):
+        self.send('addSkip', test, reason)
+
+    def addExpectedFailure(self, test, err):
+        self.send('addExpectedFailure', test,
+                  self._exc_info_to_string(err, test))
+
+    def addUnexpectedSuccess(self, test):
+        self.send('addUnexpectedSuccess', test)
+
+    def addSubTest(self, test, subtest, err):
+        if err is not None:
+            if issubclass(err[0], test.failureException):
+                event = 'addFailure'
+            else:
+                event = 'addError'
+            self.send(event, test, self._exc_info_to_string(err, subtest))
+
+
+def replay_event(result, test, event, details):
+    """
+    Replays event received from worker process on supplied result.
+
+    :param result: result of main process
+    :param test: related test instance
+    :param event: name of ``unittest.TestResult`` method
+    :param details: formatted traceback, skip reason or None
+    """
+    method = getattr(result, event)
+    if event in ('addError', 'addFailure', 'addExpectedFailure'):
+        method(test, (RemoteTestError, RemoteTestError(details), None))
+    elif event == 'addSkip':
+        method(test, details)
+    else:
+        method(test)
+
+
+def run_worker(queue, worker_number, indexed_tests, verbosity, keepdb):
+    """
+    Runs supplied tests in worker process against its own test databases.
+
+    :param queue: queue to send test events to parent process
+    :param worker_number: worker number starting from 1
+    :param indexed_tests: list of (index, test) tuples
+    :param verbosity: verbosity of test databases creation
+    :param keepdb: if True existing test databases are reused
+    """
+    indexes = dict((id(test), index) for index, test in indexed_tests)
+    result = QueueTestResult(queue, worker_number, indexes)
+    old_names = setup_worker_databases(worker_number, verbosity, keepdb)
+    try:
+        unittest.TestSuite([test for _, test in indexed_tests]).run(result)
+    finally:
+        teardown_worker_databases(old_names, verbosity, keepdb)
+        queue.put((worker_number, STOP_WORKER_EVENT, None, None))
+
+
+class ParallelSmokeSuite(unittest.TestSuite):
+    """
+    Test suite which runs its own tests in main process and then distributes
+    supplied smoke tests across worker processes. Events of workers are
+    replayed on the result of main process so all tests are reported
+    together.
+    """
+
+    def __init__(self, tests, smoke_tests, processes, verbosity=1,
+                 keepdb=False):
+        super(ParallelSmokeSuite, self).__init__(tests)
+        self.smoke_tests = smoke_tests
+        self.processes = processes
+        self.verbosity = verbosity
+        self.keepdb = keepdb
+
+    def countTestCases(self):
+        return super(ParallelSmokeSuite, self).countTestCases() + \
+            len(self.smoke_tests)
+
+    def run(self, result, debug=False):
+        super(ParallelSmokeSuite, self).run(result)
+        context = get_fork_context()
+        if self.processes <= 1 or context is None:
+            unittest.TestSuite(self.smoke_tests).run(result)
+        elif self.smoke_tests and not result.shouldStop:
+            self.run_workers(context, result)
+        return result
+
+    def run_workers(self, context, result):
+        indexed_tests = list(enumerate(self.smoke_tests))
+        shards = split_into_shards(indexed_tests, self.processes)
+
+        # workers must not share database connections with main process
+        for connection in connections.all():
+            connection.close()
+
+        queue = context.Queue()
+        workers = {}
+        for worker_number, shard in enumerate(shards, 1):
+            worker = context.Process(
+                target=run_worker,
+                args=(queue, worker_number, shard,
+                      max(self.verbosity - 1, 0), self.keepdb))
+            worker.daemon = True
+            worker.start()
+            workers[worker_number] = (worker, shard)
+
+        # events of every test are replayed together after its end so output
+        # of concurrent workers is not interleaved
+        pending_events = {}
+        finished_tests = set()
+        while workers:
+            try:
+                worker_number, event, index, details = queue.get(
+                    timeout=WORKER_MESSAGE_TIMEOUT)
+            except Empty:
+                self.check_workers(workers, finished_tests, result)
+                continue
+
+            if event == STOP_WORKER_EVENT:
+                workers.pop(worker_number)[0].join()
+            elif index is None:
+                description, details = details
+                replay_event(result, RemoteErrorHolder(description), event,
+                             details)
+            elif event == 'stopTest':
+                test = self.smoke_tests[index]
+                for pending_event, pending_details in \
+                        pending_events.pop(index, []):
+                    replay_event(result, test, pending_event, pending_details)
+                replay_event(result, test, event, details)
+                finished_tests.add(index)
+            else:
+                pending_events.setdefault(index, []).append((event, details))
+
+    def check_workers(self, workers, finished_tests, result):
+        for worker_number, (worker, shard) in list(workers.items()):
+            if worker.is_alive():
+                continue
+            workers.pop(worker_number)
+            message = WORKER_CRASHED_MSG % (worker_number, worker.exitcode)
+            for index, test in shard:
+                if index not in finished_tests:
+                    result.startTest(test)
+                    replay_event(result, test, 'addError', message)
+                    result.stopTest(test)
+
+
+class SmokeTestRunner(DiscoverRunner):
+    """
+    Test runner which distributes generated tests of ``SmokeTestCase``
+    subclasses across ``smoke_processes`` worker processes. Every worker runs
+    its tests against its own test databases. All other tests are run in
+    main process as usual. To use it set ``TEST_RUNNER`` setting to
+    ``'skd_smoke.runner.SmokeTestRunner'``.
+
+    If ``smoke_record_baseline`` is True baseline of smoke tests is
+    re-recorded instead of comparison.
+
+    Test databases are not created if all selected tests are generated by
+    ``SimpleSmokeTestCase`` subclasses (e.g. only ``*WithoutDatabase``
+    classes are selected).
+    """
+
+    # Django 1.7 reads options of test runner from optparse ``option_list``
+    # while Django 1.8 calls ``add_arguments``
+    if hasattr(DiscoverRunner, 'option_list'):
+        option_list = DiscoverRunner.option_list + tuple(
+            make_option(flag, **kwargs)
+            for flag, kwargs in SMOKE_RUNNER_OPTIONS)
+
+    def __init__(self, smoke_processes=None, smoke_record_baseline=False,
+                 **kwargs):
+        super(SmokeTestRunner, self).__init__(**kwargs)
+        self.smoke_processes = smoke_processes or multiprocessing.cpu_count()
+        self.smoke_record_baseline = smoke_record_baseline
+        self.old_record_baseline = None
+        self.requires_db = True
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super(SmokeTestRunner, cls).add_arguments(parser)
+        for flag, kwargs in SMOKE_RUNNER_OPTIONS:
+            parser.add_argument(flag, **kwargs)
+
+    def setup_test_environment(self, **kwargs):
+        super(SmokeTestRunner, self).setup_test_environment(**kwargs)
+        # baseline mode is read from environment when test methods are
+        # created so environment is changed before tests loading
+        if self.smoke_record_baseline:
+            self.old_record_baseline = os.environ.get(BASELINE_RECORD_ENV_VAR)
+            os.environ[BASELINE_RECORD_ENV_VAR] = '1'
+
+    def teardown_test_environment(self, **kwargs):
+        super(SmokeTestRunner, self).teardown_test_environment(**kwargs)
+        if self.smoke_record_baseline:
+            if self.old_record_baseline is None:
+                os.environ.pop(BASELINE_RECORD_ENV_VAR, None)
+            else:
+                os.environ[BASELINE_RECORD_ENV_VAR] = self.old_record_baseline
+
+    def build_suite(self, *args, **kwargs):
+        suite = super(SmokeTestRunner, self).build_suite(*args, **kwargs)
+        self.requires_db = suite_requires_db(suite)
+        return suite
+
+    def setup_databases(self, **kwargs):
+        if not self.requires_db:
+            return None
+        return super(SmokeTestRunner, self).setup_databases(**kwargs)
+
+    def teardown_databases(self, old_config, **kwargs):
+        if old_config is None:
+            return
+        super(SmokeTestRunner, self).teardown_databases(old_config, **kwargs)
+
+    def run_suite(self, suite, **kwargs):
+        smoke_tests, other_tests = split_smoke_tests(suite)
+        parallel_suite = ParallelSmokeSuite(
+            other_tests, smoke_tests, self.smoke_processes, self.verbosity,
+            getattr(self, 'keepdb', False))
+        return super(SmokeTestRunner, self).run_suite(parallel_suite, **kwargs)
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import errno
+import glob
+import hashlib
+import inspect
+import json
+import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+
+# environment variable which sets directory of snapshots for all smoke test
+# cases which do not define ``SNAPSHOT_DIR``
+SNAPSHOT_DIR_ENV_VAR = 'SKD_SMOKE_SNAPSHOT_DIR'
+
+DEFAULT_SNAPSHOT_DIR = 'smoke-snapshots'
+
+# name of snapshot database attached to connection of test database
+SNAPSHOT_ALIAS = 'skd_smoke_snapshot'
+
+# table of snapshot which stores json of dict returned by fixture builder
+SNAPSHOT_VALUES_TABLE = 'skd_smoke_snapshot_values'
+
+# tables which are not restored from snapshot
+NOT_SNAPSHOT_TABLES = ('django_migrations',)
+
+INCORRECT_SNAPSHOT_VALUES_MSG = \
+    'django-skd-smoke: SNAPSHOT_INITIALIZE should return json serializable ' \
+    'dict or None cause it is stored into snapshot, but it returned %s with ' \
+    'next value: %s.'
+
+
+def describe_builder(builder):
+    """
+    Returns qualified name of fixture builder.
+
+    :param builder: callable object
+    :return: string
+    """
+    name = getattr(builder, '__qualname__', None) or \
+        getattr(builder, '__name__', None) or type(builder).__name__
+    return '%s.%s' % (getattr(builder, '__module__', None), name)
+
+
+def get_migrations_source():
+    """
+    Returns source code of all migrations of installed apps in stable order.
+
+    :return: string
+    """
+    from django.db.migrations.loader import MigrationLoader
+
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    sources = []
+    for key, migration in sorted(loader.disk_migrations.items()):
+        module = sys.modules[type(migration).__module__]
+        sources.append('%s.%s\n%s' % (key[0], key[1],
+                                      inspect.getsource(module)))
+    return '\n'.join(sources)
+
+
+def prepare_snapshot_key(builder):
+    """
+    Prepares hash of migrations, schema of test database and source of
+    fixture builder. Snapshot is reused (even by next runs) while it's not
+    changed.
+
+    :param builder: callable object
+    :return: hex digest of 12 characters
+    """
+    digest = hashlib.sha1()
+    digest.update(get_migrations_source().encode('utf-8'))
+    # schema covers apps without migrations too
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT type, name, sql FROM sqlite_master '
+                       'ORDER BY type, name')
+        digest.update(json.dumps(cursor.fetchall()).encode('utf-8'))
+    try:
+        source = inspect.getsource(builder)
+    except (IOError, TypeError):
+        # e.g. callable object or builder defined in interactive session
+        source = describe_builder(builder)
+    digest.update(source.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+def quote_name(name):
+    return connection.ops.quote_name(name)
+
+
+class FixtureSnapshot(object):
+    """
+    Captures content of sqlite test database right after fixture builder is
+    called into snapshot file and restores it instead of calling builder
+    again. Snapshot file is named by builder and keyed by
+    ``prepare_snapshot_key``. Builder is called as usual for other database
+    backends.
+
+    Snapshot file is attached to connection of test database (it's allowed
+    outside of transaction only) by ``attach`` and detached by ``detach``,
+    ``load`` is called inside of transaction of test class so restored data
+    is rolled back after the class run.
+    """
+
+    def __init__(self, builder, directory):
+        self.builder = builder
+        self.directory = directory
+        self.name = describe_builder(builder)
+        self.path = None
+        self.attached = False
+
+    def attach(self):
+        """
+        Prepares path of snapshot file (for sqlite only) and attaches it to
+        connection of test database if it exists.
+        """
+        if connection.vendor != 'sqlite' or connection.in_atomic_block:
+            return
+        if self.path is None:
+            self.path = os.path.join(self.directory, '%s-%s.sqlite3' % (
+                self.name, prepare_snapshot_key(self.builder)))
+        if os.path.exists(self.path):
+            with connection.cursor() as cursor:
+                cursor.execute('ATTACH DATABASE %%s AS %s' % SNAPSHOT_ALIAS,
+                               [self.path])
+            self.attached = True
+
+    def detach(self):
+        """
+        Detaches snapshot file from connection of test database if it's
+        attached and connection is not closed yet.
+        """
+        if not self.attached:
+            return
+        # attached database is gone with connection if it's already closed
+        # (e.g. by ``tearDownClass`` of ``TestCase``)
+        if connection.connection is not None:
+            with connection.cursor() as cursor:
+                cursor.execute('DETACH DATABASE %s' % SNAPSHOT_ALIAS)
+        self.attached = False
+
+    def load(self, cls):
+        """
+        Restores snapshot if it's attached, otherwise calls builder and
+        captures its result into snapshot (if database is sqlite).
+
+        :param cls: test class which is passed into builder
+        :return: dict returned by builder or None
+        """
+        if self.attached:
+            return self.restore()
+        values = self.builder(cls)
+        try:
+            if values is not None and not isinstance(values, dict):
+                raise TypeError(type(values))
+            serialized = json.dumps(values)
+        except (TypeError, ValueError):
+            raise ImproperlyConfigured(INCORRECT_SNAPSHOT_VALUES_MSG %
+                                       (type(values), values))
+        if self.path is not None:
+            self.capture(serialized)
+        return values
+
+    def restore(self):
+        """
+        Replaces content of tables with their content from attached
+        snapshot.
+
+        :return: dict returned by builder or None
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT name FROM %s.sqlite_master WHERE type = %%s AND '
+                'name != %%s' % SNAPSHOT_ALIAS,
+                ['table', SNAPSHOT_VALUES_TABLE])
+            tables = [row[0] for row in cursor.fetchall()]
+            for table in tables:
+                cursor.execute('DELETE FROM main.%s' % quote_name(table))
+                cursor.execute('INSERT INTO main.%s SELECT * FROM %s.%s' % (
+                    quote_name(table), SNAPSHOT_ALIAS, quote_name(table)))
+            cursor.execute('SELECT value FROM %s.%s' % (
+                SNAPSHOT_ALIAS, SNAPSHOT_VALUES_TABLE))
+            return json.loads(cursor.fetchone()[0])
+
+    def capture(self, serialized_values):
+        """
+        Writes content of all tables (including uncommitted changes) and
+        values returned by builder into snapshot file. Outdated snapshots of
+        the same builder (snapshots with other keys) are removed, snapshot
+        with the current key may be attached by other process so it's
+        replaced.
+
+        :param serialized_values: json of dict returned by builder
+        """
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+        import sqlite3
+
+        temp_path = '%s.%s.tmp' % (self.path, os.getpid())
+        # snapshot is written by its own connection cause writes into
+        # attached database would be rolled back with test data
+        snapshot = sqlite3.connect(temp_path)
+        try:
+            with connection.cursor() as cursor:
+                # views are not copied, they select from copied tables
+                cursor.execute(
+                    'SELECT name FROM sqlite_master WHERE type = %s AND '
+                    'name != %s ORDER BY name', ['table', 'sqlite_sequence'])
+                tables = [row[0] for row in cursor.fetchall()]
+                for table in tables:
+                    if table in NOT_SNAPSHOT_TABLES:
+                        continue
+                    cursor.execute('SELECT * FROM %s' % quote_name(table))
+                    columns = [column[0] for column in cursor.description]
+                    snapshot.execute('CREATE TABLE %s (%s)' % (
+                        quote_name(table),
+                        ', '.join(quote_name(name) for name in columns)))
+                    snapshot.executemany(
+                        'INSERT INTO %s VALUES (%s)' % (
+                            quote_name(table), ', '.join('?' * len(columns))),
+                        cursor.fetchall())
+            snapshot.execute('CREATE TABLE %s (value)' % SNAPSHOT_VALUES_TABLE)
+            snapshot.execute('INSERT INTO %s VALUES (?)' %
+                             SNAPSHOT_VALUES_TABLE, [serialized_values])
+            snapshot.commit()
+        finally:
+            snapshot.close()
+        for outdated_path in glob.glob(os.path.join(
+                self.directory, '%s-*.sqlite3' % self.name)):
+            if outdated_path == self.path:
+                continue
+            try:
+                os.remove(outdated_path)
+            except OSError as e:
+                # it could be removed by other process at the same time
+                if e.errno != errno.ENOENT:
+                    raise
+        # os.replace overwrites existing file on every platform (python 3.3+)
+        getattr(os, 'replace', os.rename)(temp_path, self.path)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+import zlib
+from collections import namedtuple
+from timeit import default_timer
+
+
+# maximum size of decompressed block which is held in memory at once
+DECOMPRESSED_BLOCK_SIZE = 64 * 1024
+
+ResponseStats = namedtuple(
+    'ResponseStats',
+    'streaming ttfb_ms total_ms chunks size uncompressed_size complete')
+
+
+class GzipSizeCounter(object):
+    """
+    Counts size of decompressed gzip content fed chunk by chunk.
+    Decompressed data is dropped by blocks of ``DECOMPRESSED_BLOCK_SIZE``
+    bytes so large content is not materialized.
+    """
+
+    def __init__(self):
+        self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.size = 0
+
+    def feed(self, chunk):
+        while chunk:
+            self.size += len(self.decompressor.decompress(
+                chunk, DECOMPRESSED_BLOCK_SIZE))
+            chunk = self.decompressor.unconsumed_tail
+
+
+def get_content_length(response):
+    if not response.has_header('Content-Length'):
+        return None
+    try:
+        return int(response['Content-Length'])
+    except ValueError:
+        return None
+
+
+def consume_response(response, started_at, max_size=None):
+    """
+    Reads content of supplied response. Streaming response
+    (``StreamingHttpResponse``, ``FileResponse``) is consumed chunk by chunk
+    without joining chunks and closed then. Empty chunks are not counted
+    and do not stop time to first byte. Content of usual response is already
+    buffered so it's a single chunk which arrives with response.
+
+    Size is taken from ``Content-Length`` header if it's present. Otherwise
+    streaming response is read until its size exceeds ``max_size`` (if any).
+    Size of gzip encoded content is counted both as is and decompressed.
+
+    :param response: response of ``django.test.Client`` method
+    :param started_at: ``timeit.default_timer`` value before request
+    :param max_size: size in bytes to stop reading of streaming response at
+    :return: ``ResponseStats`` instance with time to first byte and total \
+        time in milliseconds, number of non-empty chunks, size of content \
+        in bytes, size of decompressed content (if it's gzip encoded) and \
+        False if reading was stopped at ``max_size``
+    """
+    content_length = get_content_length(response)
+    counter = GzipSizeCounter() \
+        if response.get('Content-Encoding') == 'gzip' else None
+
+    if not getattr(response, 'streaming', False):
+        total_ms = (default_timer() - started_at) * 1000
+        content = response.content
+        if counter is not None:
+            counter.feed(content)
+        size = len(content) if content_length is None else content_length
+        return ResponseStats(False, total_ms, total_ms, 1 if content else 0,
+                             size, counter and counter.size, True)
+
+    if max_size is not None and content_length is not None and \
+            content_length > max_size:
+        response.close()
+        total_ms = (default_timer() - started_at) * 1000
+        return ResponseStats(True, total_ms, total_ms, 0, content_length,
+                             None, True)
+
+    ttfb_ms = None
+    chunks = 0
+    size = 0
+    complete = True
+    try:
+        for chunk in response.streaming_content:
+            if not chunk:
+                continue
+            if ttfb_ms is None:
+                ttfb_ms = (default_timer() - started_at) * 1000
+            chunks += 1
+            size += len(chunk)
+            if counter is not None:
+                counter.feed(chunk)
+            if max_size is not None and size > max_size:
+                complete = False
+                break
+    finally:
+        response.close()
+    total_ms = (default_timer() - started_at) * 1000
+    return ResponseStats(True, total_ms if ttfb_ms is None else ttfb_ms,
+                         total_ms, chunks, size, counter and counter.size,
+                         complete)
+
+
+def describe_size(stats):
+    """
+    Describes size of response content for failure messages.
+
+    :param stats: ``ResponseStats`` instance
+    :return: humanized size
+    """
+    description = '%s bytes' % stats.size
+    if not stats.complete:
+        description = 'more than %s (reading was stopped)' % description
+    if stats.uncompressed_size is not None:
+        description = '%s gzipped, %s%s bytes uncompressed' % (
+            description, '' if stats.complete else 'more than ',
+            stats.uncompressed_size)
+    return description
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from collections import OrderedDict
+from timeit import default_timer
+
+from django.template.base import Template
+from django.test.signals import template_rendered
+
+
+# name of template which is created from string
+UNNAMED_TEMPLATE = '<unnamed>'
+
+TEMPLATE_STATISTIC_LINE = \
+    '%s: %s renders, %.2f ms in total, %.2f ms without nested templates'
+
+
+def get_template_name(template):
+    return getattr(template, 'name', None) or UNNAMED_TEMPLATE
+
+
+class TemplateRenderContext(object):
+    """
+    Context manager which instruments rendering of django templates inside
+    its block. Rendered templates are counted by ``template_rendered`` signal
+    which is sent in test environment. ``Template.render`` is wrapped to time
+    every render, nested renders (``include``, inclusion tags) are timed
+    too. After exit ``count`` contains number of rendered templates,
+    ``total_ms`` contains duration of outermost renders and ``templates``
+    contains statistics by template names.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        # template name -> [renders, total ms, ms without nested templates]
+        self.templates = OrderedDict()
+        self.original_render = None
+        self.nested_ms = []
+
+    def get_statistics(self, name):
+        if name not in self.templates:
+            self.templates[name] = [0, 0.0, 0.0]
+        return self.templates[name]
+
+    def on_template_rendered(self, sender, template, context, **kwargs):
+        self.count += 1
+        self.get_statistics(get_template_name(template))[0] += 1
+
+    def __enter__(self):
+        original_render = self.original_render = Template.__dict__['render']
+        nested_ms = self.nested_ms
+
+        def timed_render(template, context):
+            nested_ms.append(0.0)
+            started_at = default_timer()
+            try:
+                return original_render(template, context)
+            finally:
+                elapsed_ms = (default_timer() - started_at) * 1000
+                own_ms = elapsed_ms - nested_ms.pop()
+                statistics = self.get_statistics(get_template_name(template))
+                statistics[1] += elapsed_ms
+                statistics[2] += own_ms
+                if nested_ms:
+                    nested_ms[-1] += elapsed_ms
+                else:
+                    self.total_ms += elapsed_ms
+
+        Template.render = timed_render
+        template_rendered.connect(self.on_template_rendered)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        template_rendered.disconnect(self.on_template_rendered)
+        Template.render = self.original_render
+        self.original_render = None
+
+    def get_report(self):
+        """
+        Returns statistics of templates for json reports.
+
+        :return: list of dicts with name, renders, total_ms and own_ms keys, \
+            the slowest template first
+        """
+        return [{'name': name, 'renders': renders, 'total_ms': total_ms,
+                 'own_ms': own_ms}
+                for name, (renders, total_ms, own_ms) in sorted(
+                    self.templates.items(),
+                    key=lambda item: item[1][1], reverse=True)]
+
+
+def format_template_statistics(report):
+    """
+    Formats statistics of templates.
+
+    :param report: result of ``TemplateRenderContext.get_report``
+    :return: one line per template
+    """
+    return '\n'.join(
+        TEMPLATE_STATISTIC_LINE % (statistics['name'], statistics['renders'],
+                                   statistics['total_ms'],
+                                   statistics['own_ms'])
+        for statistics in report)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from itertools import cycle
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils import six
+
+
+DEFAULT_POOL_PASSWORD = 'smoke-password'
+
+DEFAULT_USERNAME_FORMAT = 'smoke_%(role)s_%(number)s'
+
+# items of role spec which are not fields of user model
+ROLE_RELATIONS = ('groups', 'permissions')
+
+# number of usernames in one query while created users are fetched, sqlite
+# does not allow more than 999 query parameters
+FETCH_BATCH_SIZE = 500
+
+INCORRECT_ROLES_MSG = \
+    'django-skd-smoke: UserPool roles should be not empty dict of role ' \
+    'names and dicts of user fields, groups and permissions but they are ' \
+    '%s with next value: %s.'
+
+INCORRECT_POOL_SIZE_MSG = \
+    'django-skd-smoke: UserPool size should be positive int but it is %s ' \
+    'with next value: %s.'
+
+UNKNOWN_ROLE_MSG = \
+    'django-skd-smoke: UserPool does not define role "%s", defined roles: ' \
+    '%s.'
+
+UNKNOWN_PERMISSIONS_MSG = \
+    'django-skd-smoke: UserPool permissions do not exist: %s. Permissions ' \
+    'should be defined as "app_label.codename".'
+
+POOL_IS_NOT_CREATED_MSG = \
+    'django-skd-smoke: users of UserPool are not created for %s, define ' \
+    'USER_POOL of SmokeTestCase to create them once per class.'
+
+
+class PooledUsers(object):
+    """
+    Users of ``UserPool`` created for test class. Users of every role are
+    handed out in turn, every smoke request gets the same user of role for
+    all its callbacks.
+    """
+
+    def __init__(self, users):
+        self.users = users
+        self.cycles = dict((role, cycle(role_users))
+                           for role, role_users in users.items())
+        self.assigned = {}
+
+    def get(self, request_key, role):
+        key = (request_key, role)
+        if key not in self.assigned:
+            self.assigned[key] = next(self.cycles[role])
+        return self.assigned[key]
+
+
+class PoolCredentials(object):
+    """
+    ``user_credentials`` callable which returns credentials of pool user of
+    supplied role. It's named by role so names of tests do not depend on
+    identity of pool.
+    """
+
+    def __init__(self, pool, role):
+        self.pool = pool
+        self.role = role
+        self.__name__ = str('%s_credentials' % role)
+
+    def __call__(self, testcase):
+        user = self.pool.get_user(testcase, self.role)
+        return {'username': user.get_username(),
+                'password': self.pool.password}
+
+
+class UserPool(object):
+    """
+    Declarative pool of test users: ``size`` users of every role are created
+    by single ``bulk_create`` call once per test class with the same password
+    hash computed only once. Roles are defined as dict of role names and
+    dicts of user fields (e.g. ``{'is_staff': True}``), names of ``groups``
+    (missing groups are created) and ``permissions`` as
+    "app_label.codename".
+    """
+
+    def __init__(self, roles, size=1, password=DEFAULT_POOL_PASSWORD,
+                 username_format=DEFAULT_USERNAME_FORMAT):
+        if not isinstance(roles, dict) or not roles or not all(
+                isinstance(spec, dict) for spec in roles.values()):
+            raise ImproperlyConfigured(INCORRECT_ROLES_MSG %
+                                       (type(roles), roles))
+        if not isinstance(size, six.integer_types) or \
+                isinstance(size, bool) or size <= 0:
+            raise ImproperlyConfigured(INCORRECT_POOL_SIZE_MSG %
+                                       (type(size), size))
+        self.roles = roles
+        self.size = size
+        self.password = password
+        self.username_format = username_format
+        self.password_hashes = {}
+
+    def get_password_hash(self):
+        """
+        Returns hash of pool password made by default hasher. Hash is
+        computed once per hasher (e.g. ``FAST_AUTH`` replaces hashers).
+
+        :return: encoded password
+        """
+        from django.contrib.auth.hashers import get_hasher, make_password
+
+        algorithm = get_hasher().algorithm
+        if algorithm not in self.password_hashes:
+            self.password_hashes[algorithm] = make_password(self.password)
+        return self.password_hashes[algorithm]
+
+    def create_users(self):
+        """
+        Creates users of all roles and adds them into their groups and
+        permissions.
+
+        :return: ``PooledUsers`` instance
+        """
+        from django.contrib.auth import get_user_model
+
+        user_model = get_user_model()
+        password_hash = self.get_password_hash()
+        new_users = []
+        roles = {}
+        for role, spec in sorted(self.roles.items()):
+            fields = dict((name, value) for name, value in spec.items()
+                          if name not in ROLE_RELATIONS)
+            for number in range(1, self.size + 1):
+                username = self.username_format % {'role': role,
+                                                   'number': number}
+                user = user_model(password=password_hash, **fields)
+                setattr(user, user_model.USERNAME_FIELD, username)
+                new_users.append(user)
+                roles[username] = role
+        user_model._default_manager.bulk_create(new_users)
+
+        # primary keys of created users are not set by bulk_create (except
+        # postgresql) so users are fetched
+        usernames = sorted(roles)
+        lookup = '%s__in' % user_model.USERNAME_FIELD
+        users = dict((role, []) for role in self.roles)
+        for start in range(0, len(usernames), FETCH_BATCH_SIZE):
+            for user in user_model._default_manager.filter(**{
+                    lookup: usernames[start:start + FETCH_BATCH_SIZE]}):
+                users[roles[user.get_username()]].append(user)
+        for role_users in users.values():
+            role_users.sort(key=lambda user: user.pk)
+
+        self.add_relations(user_model, users)
+        return PooledUsers(users)
+
+    def add_relations(self, user_model, users):
+        """
+        Adds users into groups and permissions of their roles by single
+        ``bulk_create`` call per relation.
+
+        :param user_model: user model
+        :param users: dict of role names and lists of users
+        """
+        from django.contrib.auth.models import Group, Permission
+
+        group_names = set()
+        permission_names = set()
+        for spec in self.roles.values():
+            group_names.update(spec.get('groups', ()))
+            permission_names.update(spec.get('permissions', ()))
+
+        groups = {}
+        if group_names:
+            groups = dict((group.name, group) for group in
+                          Group.objects.filter(name__in=group_names))
+            missing_names = group_names.difference(groups)
+            if missing_names:
+                Group.objects.bulk_create(Group(name=name)
+                                          for name in missing_names)
+                groups = dict((group.name, group) for group in
+                              Group.objects.filter(name__in=group_names))
+
+        permissions = {}
+        if permission_names:
+            query = Q()
+            for name in permission_names:
+                app_label, _, codename = name.partition('.')
+                query |= Q(content_type__app_label=app_label,
+                           codename=codename)
+            permissions = dict(
+                ('%s.%s' % (permission.content_type.app_label,
+                            permission.codename), permission)
+                for permission in Permission.objects.filter(
+                    query).select_related('content_type'))
+            missing_names = permission_names.difference(permissions)
+            if missing_names:
+                raise ImproperlyConfigured(UNKNOWN_PERMISSIONS_MSG %
+                                           ', '.join(sorted(missing_names)))
+
+        for relation, objects in (('groups', groups),
+                                  ('user_permissions', permissions)):
+            if not objects:
+                continue
+            spec_name = 'groups' if relation == 'groups' else 'permissions'
+            field = user_model._meta.get_field(relation)
+            through = getattr(user_model, relation).through
+            user_attname = '%s_id' % field.m2m_field_name()
+            object_attname = '%s_id' % field.m2m_reverse_field_name()
+            through.objects.bulk_create(
+                through(**{user_attname: user.pk,
+                           object_attname: objects[name].pk})
+                for role, spec in self.roles.items()
+                for name in spec.get(spec_name, ())
+                for user in users[role])
+
+    def get_user(self, testcase, role):
+        """
+        Returns user of supplied role which is handed out to the current
+        smoke request. Requests are distinguished by ``smoke_request_key``
+        of test case so requests of the same batch test method get their
+        own users.
+
+        :param testcase: ``SmokeTestCase`` instance
+        :param role: name of role
+        :return: user instance
+        """
+        pooled_users = getattr(testcase, 'pooled_users', None)
+        if pooled_users is None:
+            raise ImproperlyConfigured(POOL_IS_NOT_CREATED_MSG %
+                                       type(testcase).__name__)
+        return pooled_users.get(
+            getattr(testcase, 'smoke_request_key', None) or
+            testcase._testMethodName, role)
+
+    def credentials(self, role):
+        """
+        Returns ``user_credentials`` callable for supplied role.
+
+        :param role: name of role
+        :return: ``PoolCredentials`` instance
+        """
+        if role not in self.roles:
+            raise ImproperlyConfigured(UNKNOWN_ROLE_MSG % (
+                role, ', '.join(sorted(self.roles))))
+        return PoolCredentials(self, role)
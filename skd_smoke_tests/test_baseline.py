@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import ANY, Mock, patch
+
+from skd_smoke import generate_test_method, SmokeTestCase, \
+    prepare_test_name, INCORRECT_SETTING_MSG
+from skd_smoke.baseline import Baseline, median, LATENCY_REGRESSION_MSG, \
+    QUERIES_REGRESSION_MSG, BASELINE_FILE_ENV_VAR, BASELINE_RECORD_ENV_VAR
+from skd_smoke.runner import SmokeTestRunner
+
+
+class BaselineTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'baseline.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record_baseline(self, key='key', timings=(10, 10), queries=5):
+        baseline = Baseline(self.path, record=True)
+        self.assertEqual(baseline.check(key, timings, queries), [])
+        baseline.save()
+
+    def test_median(self):
+        self.assertEqual(median([3, 1, 2]), 2)
+        self.assertEqual(median([4, 1, 3, 2]), 2.5)
+
+    def test_record_and_compare(self):
+        self.record_baseline()
+        baseline = Baseline(self.path, threshold=0.2)
+
+        self.assertEqual(baseline.check('key', [11, 12, 100], 6), [])
+        self.assertEqual(baseline.check('unknown_key', [100], 100), [])
+        self.assertEqual(
+            baseline.check('key', [13, 13], 7),
+            [LATENCY_REGRESSION_MSG % (13, 1, 2, 10, 20),
+             QUERIES_REGRESSION_MSG % (7, 5, 20)])
+
+    def test_small_latency_regression_is_ignored(self):
+        self.record_baseline(timings=[1])
+        baseline = Baseline(self.path, threshold=0.2, min_delta_ms=1)
+
+        self.assertEqual(baseline.check('key', [1.9], 5), [])
+        self.assertEqual(len(baseline.check('key', [2.1], 5)), 1)
+
+    def test_latency_regression_is_confirmed_by_rounds(self):
+        self.record_baseline()
+        baseline = Baseline(self.path, rounds=3)
+
+        measure = Mock(side_effect=[[20], [11]])
+        self.assertEqual(baseline.check('key', [20], 5, measure), [])
+        self.assertEqual(measure.call_count, 2)
+
+        # confirming rounds have their own number of requests
+        measure = Mock(return_value=[15, 14, 16])
+        self.assertEqual(
+            baseline.check('key', [20], 5, measure),
+            [LATENCY_REGRESSION_MSG % (15, 3, 7, 10, 20)])
+        self.assertEqual(measure.call_count, 2)
+
+    def test_save_merges_results(self):
+        self.record_baseline('first')
+        self.record_baseline('second', queries=1)
+
+        baseline = Baseline(self.path)
+        self.assertEqual(set(baseline.load()), {'first', 'second'})
+        self.assertEqual(baseline.load()['first'],
+                         {'median_ms': 10, 'queries': 5})
+
+    @patch('skd_smoke.benchmark.run_benchmark')
+    @patch('skd_smoke.CaptureQueriesContext')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_fails_on_regression(
+            self, mock_django_resolve_url, mock_context, mock_run_benchmark):
+        mock_django_resolve_url.return_value = '/url/'
+        captured = mock_context.return_value.__enter__.return_value
+        captured.captured_queries = [{'sql': 'SELECT 1', 'time': '0.001'}]
+        mock_run_benchmark.return_value = [2, 3]
+        baseline = Mock(repeats=3)
+        baseline.check.return_value = ['first', 'second']
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, result_key='key',
+                                    baseline=baseline)
+        test(testcase_mock)
+
+        mock_run_benchmark.assert_called_once_with(testcase_mock, ANY, 200, 2)
+        key, timings, queries, measure = baseline.check.call_args[0]
+        self.assertEqual((key, len(timings), timings[1:], queries),
+                         ('key', 3, [2, 3], 1))
+        testcase_mock.fail.assert_called_once_with('first\nsecond')
+
+        measure()
+        mock_run_benchmark.assert_called_with(testcase_mock, ANY, 200, 3)
+
+    def test_baseline_mode_from_environment(self):
+        with patch.dict(os.environ, {BASELINE_FILE_ENV_VAR: self.path,
+                                     BASELINE_RECORD_ENV_VAR: '1'}):
+            CorrectConfig = type(
+                str('CorrectConfig'),
+                (SmokeTestCase,),
+                {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),),
+                 'BASELINE_THRESHOLD': 0.5})
+            self.assertTrue(hasattr(CorrectConfig,
+                                    prepare_test_name('urlname', 'GET', 200)))
+
+        baseline = CorrectConfig.baseline
+        self.assertEqual(baseline.path, self.path)
+        self.assertEqual(baseline.threshold, 0.5)
+        self.assertTrue(baseline.record)
+
+    def test_incorrect_baseline_threshold(self):
+        IncorrectConfig = type(
+            str('IncorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),),
+             'BASELINE_THRESHOLD': -1})
+        fail_method = getattr(IncorrectConfig,
+                              SmokeTestCase.FAIL_METHOD_NAME)
+        testcase_mock = Mock(spec=IncorrectConfig)
+        fail_method(testcase_mock)
+
+        self.assertIn(INCORRECT_SETTING_MSG % (
+            'BASELINE_THRESHOLD', 'non-negative number', type(-1), -1),
+            testcase_mock.fail.call_args[0][0])
+
+    @patch('django.test.runner.DiscoverRunner.setup_test_environment')
+    @patch('django.test.runner.DiscoverRunner.teardown_test_environment')
+    def test_runner_records_baseline(self, *mocks):
+        runner = SmokeTestRunner(smoke_record_baseline=True)
+        with patch.dict(os.environ, {BASELINE_RECORD_ENV_VAR: ''}):
+            runner.setup_test_environment()
+            self.assertEqual(os.environ[BASELINE_RECORD_ENV_VAR], '1')
+            runner.teardown_test_environment()
+            self.assertEqual(os.environ[BASELINE_RECORD_ENV_VAR], '')
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+from unittest import TestCase, SkipTest
+
+from mock import MagicMock, Mock, patch
+
+from skd_smoke import SmokeTestCase, generate_batch_test_method, \
+    run_in_savepoint, BATCH_METHOD_NAME, BATCH_FAILURES_MSG, \
+    INCORRECT_SETTING_MSG
+from skd_smoke_tests.utils import create_test_method
+
+
+class BatchTestCase(TestCase):
+
+    @patch('skd_smoke.transaction')
+    def test_run_in_savepoint(self, mock_transaction):
+        testcase_mock = Mock()
+        test_method = create_test_method('first', AssertionError('failed'))
+
+        with self.assertRaises(AssertionError):
+            run_in_savepoint(testcase_mock, test_method)
+
+        test_method.assert_called_once_with(testcase_mock)
+        atomic = mock_transaction.atomic.return_value
+        atomic.__enter__.assert_called_once_with()
+        mock_transaction.set_rollback.assert_called_once_with(True)
+
+    @patch('skd_smoke.run_in_savepoint')
+    def test_batch_test_method_with_sub_tests(self, mock_run_in_savepoint):
+        testcase_mock = MagicMock()
+        first = create_test_method('first')
+        second = create_test_method('second')
+
+        batch_test_method = generate_batch_test_method([first, second])
+        batch_test_method(testcase_mock)
+
+        self.assertEqual([call[0][0] for call in
+                          testcase_mock.subTest.call_args_list],
+                         ['first', 'second'])
+        self.assertEqual([call[0] for call in
+                          mock_run_in_savepoint.call_args_list],
+                         [(testcase_mock, first), (testcase_mock, second)])
+        self.assertEqual(testcase_mock.client.cookies, {})
+        testcase_mock.fail.assert_not_called()
+
+    @patch('skd_smoke.run_in_savepoint')
+    def test_batch_test_method_without_sub_tests(self,
+                                                 mock_run_in_savepoint):
+        testcase_mock = Mock(spec=['client', 'fail'])
+        testcase_mock.client.cookies = {'sessionid': 'session'}
+        first = create_test_method('first')
+        skipped = create_test_method('skipped')
+        failed = create_test_method('failed')
+        mock_run_in_savepoint.side_effect = \
+            lambda testcase, test_method: test_method()
+        skipped.side_effect = SkipTest('unchanged')
+        failed.side_effect = AssertionError('200 != 404')
+
+        batch_test_method = generate_batch_test_method(
+            [first, skipped, failed])
+        batch_test_method(testcase_mock)
+
+        self.assertEqual(mock_run_in_savepoint.call_count, 3)
+        self.assertEqual(testcase_mock.client.cookies, {})
+        message = testcase_mock.fail.call_args[0][0]
+        self.assertTrue(message.startswith(
+            BATCH_FAILURES_MSG % (1, 3, 'failed (GET failed 200 "OK" {})')))
+        self.assertIn('AssertionError: 200 != 404', message)
+        self.assertNotIn('skipped', message)
+
+    def test_batch_configuration(self):
+        configuration = tuple(('urlname%s' % number, 200, 'GET')
+                              for number in range(5))
+        BatchConfig = type(str('BatchConfig'), (SmokeTestCase,), {
+            'BATCH': 2, 'TESTS_CONFIGURATION': configuration})
+        SingleBatchConfig = type(str('SingleBatchConfig'), (SmokeTestCase,), {
+            'BATCH': True, 'TESTS_CONFIGURATION': configuration})
+
+        for config in (BatchConfig, SingleBatchConfig):
+            config.generate_test_methods()
+
+        names = [name for name in BatchConfig.__dict__
+                 if name.startswith('test_')]
+        self.assertEqual(sorted(names), ['%s_%s' % (BATCH_METHOD_NAME, number)
+                                         for number in (1, 2, 3)])
+        self.assertEqual(getattr(BatchConfig, '%s_3' % BATCH_METHOD_NAME)
+                         .__doc__, 'Batch of 1 smoke requests')
+        names = [name for name in SingleBatchConfig.__dict__
+                 if name.startswith('test_')]
+        self.assertEqual(names, [BATCH_METHOD_NAME])
+
+    def test_incorrect_batch_setting(self):
+        BatchConfig = type(str('BatchConfig'), (SmokeTestCase,), {
+            'BATCH': 0, 'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+        BatchConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=BatchConfig)
+        getattr(BatchConfig, SmokeTestCase.FAIL_METHOD_NAME)(testcase_mock)
+        self.assertIn(INCORRECT_SETTING_MSG % (
+            'BATCH', 'bool or positive int', type(0), 0),
+            testcase_mock.fail.call_args[0][0])
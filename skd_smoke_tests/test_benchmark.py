@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import ANY, Mock, patch
+
+from skd_smoke import generate_test_method, SmokeTestCase, \
+    prepare_test_name, INCORRECT_BENCHMARK_SETTING_MSG
+from skd_smoke.benchmark import BenchmarkReport, percentile, \
+    summarize_timings, run_benchmark, BENCHMARK_ITERATIONS_ENV_VAR, \
+    BENCHMARK_WARMUP_ENV_VAR
+
+
+class BenchmarkTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'benchmark.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_percentile(self):
+        timings = [1, 2, 3, 4, 5]
+        self.assertEqual(percentile(timings, 0), 1)
+        self.assertEqual(percentile(timings, 50), 3)
+        self.assertEqual(percentile(timings, 95), 4.8)
+        self.assertEqual(percentile(timings, 100), 5)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_summarize_timings(self):
+        summary = summarize_timings([4, 1, 3, 2], warmup=2)
+        self.assertEqual(summary['iterations'], 4)
+        self.assertEqual(summary['warmup'], 2)
+        self.assertEqual(summary['min_ms'], 1)
+        self.assertEqual(summary['p50_ms'], 2.5)
+        self.assertEqual(summary['max_ms'], 4)
+        self.assertEqual(summary['rps'], 400)
+        self.assertEqual(summary['timings_ms'], [4, 1, 3, 2])
+
+    def test_run_benchmark(self):
+        response = Mock(status_code=200)
+        send = Mock(side_effect=[(response, 5, None), (response, 1, None),
+                                 (response, 3, None)])
+        testcase_mock = Mock(assertEqual=Mock())
+
+        timings = run_benchmark(testcase_mock, send, 200, iterations=2,
+                                warmup=1)
+
+        self.assertEqual(list(timings), [1, 3])
+        self.assertEqual(send.call_count, 3)
+        self.assertEqual(testcase_mock.assertEqual.call_count, 3)
+
+    def test_benchmark_report(self):
+        report = BenchmarkReport('module.Class', 2, 1, self.path)
+        report.record('module.Class.test_first', [1, 3])
+        report.save()
+        other_report = BenchmarkReport('module.Other', 2, 1, self.path)
+        other_report.record('module.Other.test_second', [2, 2])
+        other_report.save()
+
+        table = report.format_table()
+        self.assertIn('module.Class (2 iterations, 1 warm-up', table)
+        self.assertIn('test_first', table)
+        self.assertNotIn('module.Class.test_first', table)
+
+        with open(self.path) as report_file:
+            results = json.load(report_file)
+        self.assertEqual(set(results), {'module.Class.test_first',
+                                        'module.Other.test_second'})
+        self.assertEqual(results['module.Class.test_first']['p50_ms'], 2)
+
+    @patch('skd_smoke.benchmark.run_benchmark')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_records_benchmark(
+            self, mock_django_resolve_url, mock_run_benchmark):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_run_benchmark.return_value = timings = [1, 2]
+        report = Mock(iterations=10, warmup=2)
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, result_key='key',
+                                    benchmark_report=report)
+        test(testcase_mock)
+
+        mock_run_benchmark.assert_called_once_with(
+            testcase_mock, ANY, 200, 10, 2)
+        report.record.assert_called_once_with('key', timings, [])
+
+    def test_benchmark_mode_from_environment(self):
+        with patch.dict(os.environ, {BENCHMARK_ITERATIONS_ENV_VAR: '5',
+                                     BENCHMARK_WARMUP_ENV_VAR: '1'}):
+            CorrectConfig = type(
+                str('CorrectConfig'),
+                (SmokeTestCase,),
+                {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+            self.assertTrue(hasattr(CorrectConfig,
+                                    prepare_test_name('urlname', 'GET', 200)))
+
+        report = CorrectConfig.benchmark_report
+        self.assertEqual(report.iterations, 5)
+        self.assertEqual(report.warmup, 1)
+        self.assertIsNone(report.path)
+
+    def test_benchmark_mode_is_disabled_by_default(self):
+        CorrectConfig = type(
+            str('CorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+        self.assertTrue(hasattr(CorrectConfig,
+                                prepare_test_name('urlname', 'GET', 200)))
+        self.assertIsNone(CorrectConfig.benchmark_report)
+
+    def test_incorrect_benchmark_iterations(self):
+        IncorrectConfig = type(
+            str('IncorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),),
+             'BENCHMARK_ITERATIONS': 0})
+        fail_method = getattr(IncorrectConfig,
+                              SmokeTestCase.FAIL_METHOD_NAME)
+        testcase_mock = Mock(spec=IncorrectConfig)
+        fail_method(testcase_mock)
+
+        message = testcase_mock.fail.call_args[0][0]
+        self.assertIn(INCORRECT_BENCHMARK_SETTING_MSG % (
+            'BENCHMARK_ITERATIONS', BENCHMARK_ITERATIONS_ENV_VAR,
+            'positive int', type(0), 0), message)
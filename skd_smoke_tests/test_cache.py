@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import sys
+from unittest import TestCase
+
+from mock import ANY, Mock, patch
+
+from skd_smoke import generate_test_method, SmokeTestCase
+from skd_smoke.cache import WarmCacheCheck, WARM_QUERIES_NOT_REDUCED_MSG, \
+    WARM_QUERIES_BUDGET_EXCEEDED_MSG, CACHE_SPEEDUP_MSG
+
+
+def create_captured_context(*queries):
+    context = Mock()
+    context.return_value.__enter__ = Mock(return_value=Mock(
+        captured_queries=[{'sql': sql} for sql in queries]))
+    context.return_value.__exit__ = Mock(return_value=False)
+    return context
+
+
+class CacheTestCase(TestCase):
+
+    @patch('skd_smoke.cache.settings', CACHES={'default': {}, 'other': {}})
+    def test_prepare_clears_all_caches(self, mock_settings):
+        caches = {'default': Mock(), 'other': Mock()}
+        # django.core.cache can't be imported without configured settings
+        with patch.dict(sys.modules,
+                        {'django.core.cache': Mock(caches=caches)}):
+            WarmCacheCheck.prepare()
+        caches['default'].clear.assert_called_once_with()
+        caches['other'].clear.assert_called_once_with()
+
+    @patch('skd_smoke.cache.settings', CACHES={'default': {}, 'sessions': {}},
+           SESSION_ENGINE='django.contrib.sessions.backends.cache',
+           SESSION_CACHE_ALIAS='sessions')
+    def test_cache_of_sessions_is_not_cleared(self, mock_settings):
+        caches = {'default': Mock(), 'sessions': Mock()}
+        with patch.dict(sys.modules,
+                        {'django.core.cache': Mock(caches=caches)}):
+            WarmCacheCheck.prepare()
+        caches['default'].clear.assert_called_once_with()
+        caches['sessions'].clear.assert_not_called()
+
+        # sessions of cached_db engine are loaded from database
+        mock_settings.SESSION_ENGINE = \
+            'django.contrib.sessions.backends.cached_db'
+        with patch.dict(sys.modules,
+                        {'django.core.cache': Mock(caches=caches)}):
+            WarmCacheCheck.prepare()
+        caches['sessions'].clear.assert_called_once_with()
+
+    @patch('skd_smoke.cache.clear_caches')
+    def test_warm_cache_check(self, mock_clear_caches):
+        response = Mock(status_code=200)
+        send = Mock(return_value=(response, 2, None))
+        testcase_mock = Mock(assertEqual=Mock())
+
+        with patch('skd_smoke.cache.CaptureQueriesContext',
+                   create_captured_context('SELECT 1')):
+            errors = WarmCacheCheck().run(
+                testcase_mock, send, 200, 10, ['SELECT 1', 'SELECT 2'])
+        self.assertEqual(errors, [])
+        send.assert_called_once_with()
+        testcase_mock.assertEqual.assert_called_once_with(200, 200)
+        mock_clear_caches.assert_called_once_with()
+
+        send.return_value = (response, 5, None)
+        with patch('skd_smoke.cache.CaptureQueriesContext',
+                   create_captured_context('SELECT 1', 'SELECT 2')):
+            errors = WarmCacheCheck(min_speedup=3).run(
+                testcase_mock, send, 200, 10, ['SELECT 1', 'SELECT 2'])
+        self.assertEqual(errors, [
+            WARM_QUERIES_NOT_REDUCED_MSG % (2, 2, '1. SELECT 1\n2. SELECT 2'),
+            CACHE_SPEEDUP_MSG % (5, 10, 2, 3)])
+
+        with patch('skd_smoke.cache.CaptureQueriesContext',
+                   create_captured_context('SELECT 1')):
+            errors = WarmCacheCheck(max_warm_queries=0).run(
+                testcase_mock, send, 200, 10, ['SELECT 1'])
+        self.assertEqual(errors, [
+            WARM_QUERIES_BUDGET_EXCEEDED_MSG % (1, 0, 1, '1. SELECT 1')])
+
+    @patch('skd_smoke.CaptureQueriesContext', create_captured_context())
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_warm_cache_check(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+        initialize = Mock()
+        warm_cache_check = Mock(run=Mock(return_value=['first', 'second']))
+        warm_cache_check.prepare.side_effect = \
+            lambda: initialize.assert_not_called()
+
+        test = generate_test_method('urlname', 200, initialize=initialize,
+                                    warm_cache_check=warm_cache_check)
+        test(testcase_mock)
+
+        warm_cache_check.prepare.assert_called_once_with()
+        warm_cache_check.run.assert_called_once_with(
+            testcase_mock, ANY, 200, ANY, [])
+        testcase_mock.fail.assert_called_once_with('first\nsecond')
+
+    def test_warm_cache_check_configuration(self):
+        CacheConfig = type(str('CacheConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (
+                ('first', 200, 'GET', {'warm_cache_check': True}),
+                ('second', 200, 'GET', {'max_warm_queries': 1,
+                                        'min_cache_speedup': 2}),
+                ('third', 200, 'GET', {'warm_cache_check': False}),
+            )})
+
+        with patch('skd_smoke.generate_test_method') as mock_generate:
+            CacheConfig.generate_test_methods()
+
+        checks = [call[1]['warm_cache_check']
+                  for call in mock_generate.call_args_list]
+        self.assertEqual((checks[0].max_warm_queries, checks[0].min_speedup),
+                         (None, None))
+        self.assertEqual((checks[1].max_warm_queries, checks[1].min_speedup),
+                         (1, 2))
+        self.assertIsNone(checks[2])
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import sys
+import threading
+from unittest import TestCase, SkipTest
+
+from mock import Mock, patch
+from django.core.signals import got_request_exception
+from django.test import Client
+from django.test.signals import template_rendered
+
+from skd_smoke import SmokeTestCase, SimpleSmokeTestCase, ThreadTestCase, \
+    ThreadClientMixin, run_concurrently, generate_batch_test_method, \
+    BATCH_METHOD_NAME, BATCH_FAILURES_MSG, CONCURRENT_PARAMS_MSG, \
+    INCORRECT_SETTING_MSG
+from skd_smoke_tests.utils import create_test_method
+
+
+class FakeClient(object):
+    pass
+
+
+class FakeResponse(object):
+    status_code = 200
+    cookies = {}
+
+
+class FakeHandlerClient(Client):
+    """
+    Django test client whose handler serves ``/slow/`` and ``/boom/`` like
+    django handler does: ``/boom/`` renders template and raises exception
+    while ``/slow/`` is in flight, ``/slow/`` renders its template after it.
+    """
+
+    slow_started = None
+    boom_done = None
+
+    def __init__(self, *args, **kwargs):
+        super(FakeHandlerClient, self).__init__(*args, **kwargs)
+        self.handler = self.handle
+
+    def handle(self, environ):
+        if environ['PATH_INFO'] == '/slow/':
+            self.slow_started.set()
+            self.boom_done.wait(5)
+            template_rendered.send(sender=None, template='slow.html',
+                                   context={})
+            return FakeResponse()
+        try:
+            template_rendered.send(sender=None, template='boom.html',
+                                   context={})
+            raise ValueError('boom')
+        except ValueError:
+            got_request_exception.send(sender=None, request=None)
+        finally:
+            self.boom_done.set()
+        response = FakeResponse()
+        response.status_code = 500
+        return response
+
+
+class ConcurrencyTestCase(TestCase):
+
+    @patch('skd_smoke.forbid_database_access')
+    def test_run_concurrently(self, mock_forbid_database_access):
+        testcase_mock = Mock(client_class=FakeClient)
+        testcase_mock.__class__.__name__ = str('Config')
+        threads = set()
+        error = AssertionError('200 != 404')
+
+        def record_thread(testcase):
+            threads.add(threading.current_thread())
+
+        first = create_test_method('first', record_thread)
+        failed = create_test_method('failed', error)
+        third = create_test_method('third', record_thread)
+
+        outcomes = run_concurrently(testcase_mock, [first, failed, third], 2)
+
+        self.assertEqual(outcomes[0], None)
+        self.assertIs(outcomes[1][1], error)
+        self.assertEqual(outcomes[2], None)
+        self.assertNotIn(threading.current_thread(), threads)
+        self.assertEqual(mock_forbid_database_access.call_count, 2)
+
+        # every request gets its own client and proxy of test case
+        thread_testcases = [test_method.call_args[0][0]
+                            for test_method in (first, failed, third)]
+        self.assertEqual(len(set(map(id, thread_testcases))), 3)
+        self.assertEqual(len(set(id(thread_testcase.client)
+                                 for thread_testcase in thread_testcases)), 3)
+        self.assertIsInstance(thread_testcases[0].client, ThreadClientMixin)
+        self.assertIsInstance(thread_testcases[0].client, FakeClient)
+        self.assertIs(thread_testcases[0].fail, testcase_mock.fail)
+
+    @patch('skd_smoke.forbid_database_access', Mock())
+    def test_exception_of_concurrent_request(self):
+        FakeHandlerClient.slow_started = threading.Event()
+        FakeHandlerClient.boom_done = threading.Event()
+        testcase_mock = Mock(client_class=FakeHandlerClient)
+        templates = {}
+
+        def request(path):
+            def test_method(testcase):
+                if path == '/boom/':
+                    FakeHandlerClient.slow_started.wait(5)
+                response = testcase.client.request(PATH_INFO=path)
+                templates[path] = response.templates
+            return test_method
+
+        outcomes = run_concurrently(
+            testcase_mock, [request('/slow/'), request('/boom/')], 2)
+
+        self.assertEqual(outcomes[0], None)
+        self.assertIsInstance(outcomes[1][1], ValueError)
+        self.assertEqual(templates, {'/slow/': ['slow.html']})
+        self.assertFalse(got_request_exception.has_listeners())
+
+    def test_thread_test_case(self):
+        testcase_mock = Mock()
+        thread_testcase = ThreadTestCase(testcase_mock, FakeClient)
+
+        thread_testcase.extra = 'thread'
+        self.assertIsNot(thread_testcase.client, testcase_mock.client)
+        self.assertIs(thread_testcase.fail, testcase_mock.fail)
+        self.assertNotEqual(testcase_mock.extra, 'thread')
+
+    @patch('skd_smoke.run_concurrently')
+    def test_concurrent_batch_test_method(self, mock_run_concurrently):
+        testcase_mock = Mock(spec=['client', 'fail'])
+        first = create_test_method('first')
+        skipped = create_test_method('skipped')
+        failed = create_test_method('failed')
+        exc_info = []
+        for error in (SkipTest('unchanged'), AssertionError('200 != 404')):
+            try:
+                raise error
+            except Exception:
+                exc_info.append(sys.exc_info())
+        mock_run_concurrently.return_value = [None] + exc_info
+
+        batch_test_method = generate_batch_test_method(
+            [first, skipped, failed], False, 4)
+        batch_test_method(testcase_mock)
+
+        mock_run_concurrently.assert_called_once_with(
+            testcase_mock, [first, skipped, failed], 4)
+        for test_method in (first, skipped, failed):
+            test_method.assert_not_called()
+        message = testcase_mock.fail.call_args[0][0]
+        self.assertTrue(message.startswith(
+            BATCH_FAILURES_MSG % (1, 3, 'failed (GET failed 200 "OK" {})')))
+        self.assertIn('AssertionError: 200 != 404', message)
+
+    def test_concurrency_configuration(self):
+        configuration = tuple(('urlname%s' % number, 200, 'GET')
+                              for number in range(5))
+        ConcurrentConfig = type(str('ConcurrentConfig'),
+                                (SimpleSmokeTestCase,), {
+            'CONCURRENCY': 8, 'BATCH': 2,
+            'TESTS_CONFIGURATION': configuration})
+        DatabaseConfig = type(str('DatabaseConfig'), (SmokeTestCase,), {
+            'CONCURRENCY': 8, 'TESTS_CONFIGURATION': configuration})
+        BenchmarkConfig = type(str('BenchmarkConfig'),
+                               (SimpleSmokeTestCase,), {
+            'CONCURRENCY': 8, 'BENCHMARK_ITERATIONS': 2,
+            'TESTS_CONFIGURATION': configuration})
+
+        with patch('skd_smoke.generate_batch_test_method') as mock_generate:
+            for config in (ConcurrentConfig, DatabaseConfig, BenchmarkConfig):
+                config.generate_test_methods()
+
+        self.assertEqual([(len(call[0][0]),) + call[0][1:]
+                          for call in mock_generate.call_args_list],
+                         [(2, False, 8), (2, False, 8), (1, False, 8)])
+        names = [name for name in ConcurrentConfig.__dict__
+                 if name.startswith('test_')]
+        self.assertEqual(len(names), 3)
+        # requests which require database and requests of benchmark are
+        # not run concurrently
+        for config in (DatabaseConfig, BenchmarkConfig):
+            names = [name for name in config.__dict__
+                     if name.startswith('test_')]
+            self.assertEqual(len(names), 5)
+            self.assertNotIn(BATCH_METHOD_NAME, names)
+
+    def test_process_params_of_concurrent_request(self):
+        ConcurrentConfig = type(str('ConcurrentConfig'),
+                                (SimpleSmokeTestCase,), {
+            'CONCURRENCY': 8,
+            'TESTS_CONFIGURATION': (
+                ('urlname', 200, 'GET', {'max_templates': 3,
+                                         'leak_check': False}),
+            )})
+        ConcurrentConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=ConcurrentConfig)
+        getattr(ConcurrentConfig, ConcurrentConfig.FAIL_METHOD_NAME)(
+            testcase_mock)
+        self.assertIn(CONCURRENT_PARAMS_MSG % ('urlname', 'max_templates'),
+                      testcase_mock.fail.call_args[0][0])
+
+    def test_incorrect_concurrency_setting(self):
+        ConcurrentConfig = type(str('ConcurrentConfig'),
+                                (SimpleSmokeTestCase,), {
+            'CONCURRENCY': 0,
+            'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+        ConcurrentConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=ConcurrentConfig)
+        getattr(ConcurrentConfig, ConcurrentConfig.FAIL_METHOD_NAME)(
+            testcase_mock)
+        self.assertIn(INCORRECT_SETTING_MSG % (
+            'CONCURRENCY', 'positive int', type(0), 0),
+            testcase_mock.fail.call_args[0][0])
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import sys
+import unittest
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from skd_smoke import SmokeTestCase, SimpleSmokeTestCase, \
+    DATABASE_FREE_CLASS_NAME, DATABASE_PARAMS_MSG, DATABASE_REQUIRED_MSG, \
+    DATABASE_ACCESS_FORBIDDEN_MSG, FORBIDDEN_CONNECTION_METHODS, \
+    prepare_test_name
+from skd_smoke.runner import suite_requires_db
+
+
+def helper(testcase):
+    return testcase
+
+
+class DatabaseFreeTestCase(TestCase):
+
+    def tearDown(self):
+        module = sys.modules[__name__]
+        name = DATABASE_FREE_CLASS_NAME % 'MixedConfig'
+        if hasattr(module, name):
+            delattr(module, name)
+
+    def test_database_free_class_generation(self):
+        MixedConfig = type(str('MixedConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (
+                ('db', 200, 'GET'),
+                ('static', 200, 'GET', {'requires_db': False}),
+                ('explicit_db', 200, 'GET', {'requires_db': True}),
+            ),
+            'DEFAULT_MAX_LATENCY_MS': 100,
+            'helper': helper,
+            '__module__': __name__,
+        })
+
+        database_free_class = MixedConfig.database_free_class
+        self.assertIs(getattr(sys.modules[__name__],
+                              str('MixedConfigWithoutDatabase')),
+                      database_free_class)
+        self.assertTrue(issubclass(database_free_class, SimpleSmokeTestCase))
+        self.assertEqual(database_free_class.__module__, __name__)
+        self.assertEqual(database_free_class.TESTS_CONFIGURATION,
+                         [('static', 200, 'GET', {'requires_db': False})])
+        self.assertEqual(database_free_class.DEFAULT_MAX_LATENCY_MS, 100)
+        self.assertIs(database_free_class.__dict__['helper'], helper)
+        self.assertIsNone(database_free_class.database_free_class)
+
+        loader = unittest.TestLoader()
+        self.assertEqual(loader.getTestCaseNames(MixedConfig),
+                         [prepare_test_name('db', 'GET', 200),
+                          prepare_test_name('explicit_db', 'GET', 200)])
+        # requires_db does not change test names
+        self.assertEqual(loader.getTestCaseNames(database_free_class),
+                         [prepare_test_name('static', 'GET', 200)])
+
+    def test_without_database_free_requests(self):
+        DatabaseConfig = type(str('DatabaseConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('db', 200, 'GET'),)})
+        BrokenConfig = type(str('BrokenConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': None})
+
+        self.assertIsNone(DatabaseConfig.database_free_class)
+        self.assertIsNone(BrokenConfig.database_free_class)
+
+    def test_database_params_of_database_free_request(self):
+        DatabaseFreeConfig = type(str('DatabaseFreeConfig'),
+                                  (SimpleSmokeTestCase,), {
+            'TESTS_CONFIGURATION': (
+                ('static', 200, 'GET', {'exact_queries': 0,
+                                        'warm_cache_check': False}),
+            )})
+        DatabaseFreeConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=DatabaseFreeConfig)
+        getattr(DatabaseFreeConfig, DatabaseFreeConfig.FAIL_METHOD_NAME)(
+            testcase_mock)
+        self.assertIn(DATABASE_PARAMS_MSG % ('static', 'exact_queries'),
+                      testcase_mock.fail.call_args[0][0])
+
+    def test_request_requiring_database_of_simple_test_case(self):
+        DatabaseFreeConfig = type(str('DatabaseFreeConfig'),
+                                  (SimpleSmokeTestCase,), {
+            'TESTS_CONFIGURATION': (
+                ('static', 200, 'GET'),
+                ('db', 200, 'GET', {'requires_db': True}),
+            )})
+        DatabaseFreeConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=DatabaseFreeConfig)
+        getattr(DatabaseFreeConfig, DatabaseFreeConfig.FAIL_METHOD_NAME)(
+            testcase_mock)
+        self.assertIn(DATABASE_REQUIRED_MSG % 'db',
+                      testcase_mock.fail.call_args[0][0])
+
+    def test_database_access_is_forbidden(self):
+        DatabaseFreeConfig = type(str('DatabaseFreeConfig'),
+                                  (SimpleSmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('static', 200, 'GET'),)})
+        connection = Mock()
+        original_methods = [getattr(connection, name)
+                            for name in FORBIDDEN_CONNECTION_METHODS]
+
+        with patch('skd_smoke.connections', {'default': connection}):
+            DatabaseFreeConfig.setUpClass()
+            for name in FORBIDDEN_CONNECTION_METHODS:
+                with self.assertRaises(AssertionError) as cm:
+                    getattr(connection, name)()
+                self.assertEqual(str(cm.exception),
+                                 DATABASE_ACCESS_FORBIDDEN_MSG %
+                                 ('DatabaseFreeConfig', 'default'))
+            DatabaseFreeConfig.tearDownClass()
+
+        self.assertEqual([getattr(connection, name)
+                          for name in FORBIDDEN_CONNECTION_METHODS],
+                         original_methods)
+
+    def test_suite_requires_db(self):
+        DatabaseFreeConfig = type(str('DatabaseFreeConfig'),
+                                  (SimpleSmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('static', 200, 'GET'),)})
+        DatabaseConfig = type(str('DatabaseConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('db', 200, 'GET'),)})
+        loader = unittest.TestLoader()
+        database_free_suite = loader.loadTestsFromTestCase(DatabaseFreeConfig)
+        database_suite = loader.loadTestsFromTestCase(DatabaseConfig)
+
+        self.assertFalse(suite_requires_db(database_free_suite))
+        self.assertTrue(suite_requires_db(
+            unittest.TestSuite([database_free_suite, database_suite])))
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import os
+import shutil
+import tempfile
+from unittest import TestCase, skipUnless
+
+from mock import Mock, patch
+from six import get_function_closure
+
+from skd_smoke import generate_test_method, SmokeTestCase, prepare_test_name
+from skd_smoke.incremental import ResultCache, fingerprint_module, \
+    get_result_cache, UNCHANGED_ENTRY_SKIP_MSG, INCREMENTAL_CACHE_ENV_VAR, \
+    MODULE_FINGERPRINTS, merge_results, read_results
+
+
+class IncrementalTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.json')
+        MODULE_FINGERPRINTS.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        MODULE_FINGERPRINTS.clear()
+
+    def test_fingerprint_module(self):
+        fingerprint = fingerprint_module('skd_smoke.incremental')
+        self.assertEqual(len(fingerprint), 40)
+        self.assertIsNone(fingerprint_module(None))
+        self.assertIsNone(fingerprint_module('not_existing_module'))
+
+    @patch('skd_smoke.incremental.get_view_module')
+    def test_result_cache(self, mock_get_view_module):
+        mock_get_view_module.return_value = 'skd_smoke.incremental'
+        cache = ResultCache(self.path)
+        self.assertFalse(cache.is_unchanged('key'))
+
+        cache.record_success('key', '/url/')
+        cache.save()
+        mock_get_view_module.assert_called_once_with('/url/')
+
+        new_cache = ResultCache(self.path)
+        self.assertTrue(new_cache.is_unchanged('key'))
+        self.assertFalse(new_cache.is_unchanged('other_key'))
+
+        # view module is changed
+        MODULE_FINGERPRINTS['skd_smoke.incremental'] = 'changed'
+        self.assertFalse(new_cache.is_unchanged('key'))
+
+    @patch('skd_smoke.incremental.get_view_module', Mock(return_value=None))
+    def test_result_cache_with_changed_configuration(self):
+        cache = ResultCache(self.path)
+        cache.record_success('key', '/url/', 'fingerprint')
+        cache.save()
+
+        new_cache = ResultCache(self.path)
+        self.assertTrue(new_cache.is_unchanged('key', 'fingerprint'))
+        self.assertFalse(new_cache.is_unchanged('key', 'other'))
+        self.assertFalse(new_cache.is_unchanged('key'))
+
+    @patch('skd_smoke.incremental.get_view_module')
+    def test_result_cache_merges_results_on_save(self, mock_get_view_module):
+        mock_get_view_module.return_value = None
+        first_cache = ResultCache(self.path)
+        second_cache = ResultCache(self.path)
+
+        first_cache.record_success('first', '/first/')
+        second_cache.record_success('second', '/second/')
+        first_cache.save()
+        second_cache.save()
+
+        cache = ResultCache(self.path)
+        self.assertTrue(cache.is_unchanged('first'))
+        self.assertTrue(cache.is_unchanged('second'))
+
+    @skipUnless(hasattr(os, 'fork'), 'fork is not supported by platform')
+    def test_merge_results_of_concurrent_processes(self):
+        processes, merges = 4, 25
+        pids = []
+        for number in range(processes):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    for merge in range(merges):
+                        merge_results(self.path,
+                                      {'%s.%s' % (number, merge): merge})
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+        self.assertEqual(len(read_results(self.path)), processes * merges)
+
+    def test_get_result_cache(self):
+        self.assertIsNone(get_result_cache(None))
+        self.assertIs(get_result_cache(self.path), get_result_cache(self.path))
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_skips_unchanged_test(
+            self, mock_django_resolve_url):
+        result_cache = Mock()
+        result_cache.is_unchanged.return_value = True
+        testcase_mock = Mock(skipTest=Mock(side_effect=ValueError))
+
+        test = generate_test_method('urlname', 200, result_cache=result_cache,
+                                    result_key='key')
+        with self.assertRaises(ValueError):
+            test(testcase_mock)
+
+        testcase_mock.skipTest.assert_called_once_with(
+            UNCHANGED_ENTRY_SKIP_MSG)
+        mock_django_resolve_url.assert_not_called()
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_records_success(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        result_cache = Mock()
+        result_cache.is_unchanged.return_value = False
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, result_cache=result_cache,
+                                    result_key='key',
+                                    config_fingerprint='fingerprint')
+        test(testcase_mock)
+
+        result_cache.is_unchanged.assert_called_once_with('key',
+                                                          'fingerprint')
+        result_cache.record_success.assert_called_once_with(
+            'key', '/url/', 'fingerprint')
+
+    def test_incremental_mode_from_environment(self):
+        with patch.dict(os.environ, {INCREMENTAL_CACHE_ENV_VAR: self.path}):
+            CorrectConfig = type(
+                str('CorrectConfig'),
+                (SmokeTestCase,),
+                {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+
+        self.assertIs(CorrectConfig.result_cache, get_result_cache(self.path))
+        self.assertTrue(hasattr(CorrectConfig,
+                                prepare_test_name('urlname', 'GET', 200)))
+
+    def test_budgets_change_fingerprint_but_not_test_name(self):
+        def create_config(data, **settings):
+            attrs = dict(settings, INCREMENTAL_CACHE_FILE=self.path,
+                         TESTS_CONFIGURATION=(('urlname', 200, 'GET', data),))
+            config = type(str('BudgetConfig'), (SmokeTestCase,), attrs)
+            name = prepare_test_name('urlname', 'GET', 200, data)
+            entry = get_function_closure(getattr(config, name))[0]
+            return entry.cell_contents.config_fingerprint
+
+        fingerprint = create_config({'max_queries': 5})
+        self.assertEqual(fingerprint, create_config(
+            {'max_queries': 5, 'comment': 'comment is ignored'}))
+        self.assertNotEqual(fingerprint, create_config({'max_queries': 6}))
+        self.assertNotEqual(fingerprint, create_config(
+            {'max_queries': 5}, DEFAULT_MAX_LATENCY_MS=100))
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import socket
+from unittest import TestCase
+
+from mock import Mock, patch
+from django.core.servers.basehttp import WSGIServer, WSGIRequestHandler
+from django.utils.six.moves.socketserver import ThreadingMixIn
+
+from skd_smoke import INCORRECT_USER_CREDENTIALS
+from skd_smoke.load import SmokeLoadTestCase, LoadRequest, \
+    prepare_load_request, run_load_worker, prepare_load_report, \
+    format_load_report, run_load_test, TOTAL_ROW_NAME
+
+
+def create_request(name='first', method='GET', path='/url/', body=None,
+                   status=200, weight=1):
+    return LoadRequest(name, method, path, body, {}, status, weight)
+
+
+class LoadTestCase(TestCase):
+
+    @patch('skd_smoke.load.settings',
+           SESSION_COOKIE_NAME='sessionid', CSRF_COOKIE_NAME='csrftoken')
+    @patch('skd_smoke.load.resolve_url')
+    def test_prepare_get_load_request(self, mock_resolve_url, mock_settings):
+        mock_resolve_url.return_value = '/url/'
+        initialize = Mock()
+        testcase_mock = Mock()
+
+        request = prepare_load_request(
+            testcase_mock, 'name', 'urlname', 200, 'get',
+            {'initialize': initialize,
+             'url_args': lambda testcase: [1],
+             'url_kwargs': {'slug': 'slug'},
+             'request_data': lambda testcase: {'q': ['a', 'b']},
+             'load_weight': 2})
+
+        initialize.assert_called_once_with(testcase_mock)
+        mock_resolve_url.assert_called_once_with('urlname', 1, slug='slug')
+        self.assertEqual(request, LoadRequest(
+            'name', 'GET', '/url/?q=a&q=b', None, {}, 200, 2))
+
+    @patch('skd_smoke.load.Client')
+    @patch('skd_smoke.load.settings',
+           SESSION_COOKIE_NAME='sessionid', CSRF_COOKIE_NAME='csrftoken')
+    @patch('skd_smoke.load.resolve_url')
+    def test_prepare_post_load_request(self, mock_resolve_url, mock_settings,
+                                       mock_client):
+        mock_resolve_url.return_value = '/url/'
+        client = mock_client.return_value
+        client.login.return_value = True
+        client.cookies = {'sessionid': Mock(value='session')}
+        credentials = {'username': 'user', 'password': '1234'}
+        testcase_mock = Mock(assertTrue=Mock())
+
+        request = prepare_load_request(
+            testcase_mock, 'name', 'urlname', 302, 'POST',
+            {'user_credentials': credentials,
+             'request_data': {'title': 'Title'}})
+
+        client.login.assert_called_once_with(**credentials)
+        testcase_mock.assertTrue.assert_called_once_with(
+            True, INCORRECT_USER_CREDENTIALS % credentials)
+        self.assertEqual(request.body, 'title=Title')
+        self.assertEqual(request.weight, 1)
+        headers = request.headers
+        self.assertEqual(headers['Content-Type'],
+                         'application/x-www-form-urlencoded')
+        self.assertEqual(
+            headers['Cookie'],
+            'csrftoken=%s; sessionid=session' % headers['X-CSRFToken'])
+
+    @patch('skd_smoke.load.default_timer')
+    @patch('skd_smoke.load.http_client.HTTPConnection')
+    def test_run_load_worker(self, mock_connection_class, mock_timer):
+        # deadline is checked before every request and request is timed
+        mock_timer.side_effect = [0, 0, 0.001, 1, 1, 1.002, 2, 2, 2.003, 10]
+        connection = mock_connection_class.return_value
+        connection.getresponse.side_effect = [
+            Mock(status=200, will_close=False),
+            Mock(status=500, will_close=True),
+            socket.error(),
+        ]
+        requests = [create_request(), create_request('second', weight=0)]
+        results = []
+
+        run_load_worker('localhost', 8081, requests, 5, 1, results)
+
+        self.assertEqual([(index, round(elapsed_ms, 6), success)
+                          for index, elapsed_ms, success in results],
+                         [(0, 1, True), (0, 2, False), (0, 3, False)])
+        connection.request.assert_called_with('GET', '/url/', None, {})
+        # connection is reopened after it's closed by server and after error
+        self.assertEqual(mock_connection_class.call_count, 2)
+        self.assertEqual(connection.close.call_count, 2)
+
+    def test_prepare_load_report(self):
+        requests = [create_request(), create_request('second')]
+        results = [(0, 1, True), (0, 3, False), (0, 2, True), (1, 4, True)]
+
+        report = prepare_load_report(requests, results, 2)
+
+        self.assertEqual(list(report), ['first', 'second', TOTAL_ROW_NAME])
+        self.assertEqual(report['first']['requests'], 3)
+        self.assertEqual(report['first']['errors'], 1)
+        self.assertEqual(report['first']['error_rate'], 1.0 / 3)
+        self.assertEqual(report['first']['rps'], 1.5)
+        self.assertEqual(report['first']['p50_ms'], 2)
+        self.assertEqual(report[TOTAL_ROW_NAME]['requests'], 4)
+        self.assertEqual(report[TOTAL_ROW_NAME]['max_ms'], 4)
+
+        empty_report = prepare_load_report(requests, [], 2)
+        self.assertIsNone(empty_report['first']['p99_ms'])
+        self.assertIn('first', format_load_report('Class', 4, 2,
+                                                  empty_report))
+
+    def test_load_test_method_is_added_to_subclasses_only(self):
+        self.assertFalse(hasattr(SmokeLoadTestCase, 'test_load'))
+
+        LoadConfig = type(str('LoadConfig'), (SmokeLoadTestCase,),
+                          {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+        self.assertEqual(LoadConfig.__dict__['test_load'], run_load_test)
+
+    @patch('django.test.LiveServerTestCase.setUpClass')
+    def test_live_server_is_threaded(self, mock_setup_class):
+        httpd = WSGIServer(('localhost', 0), WSGIRequestHandler)
+        self.addCleanup(httpd.server_close)
+        LoadConfig = type(str('LoadConfig'), (SmokeLoadTestCase,),
+                          {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),),
+                           'server_thread': Mock(httpd=httpd)})
+
+        LoadConfig.setUpClass()
+
+        mock_setup_class.assert_called_once_with()
+        self.assertIsInstance(httpd, ThreadingMixIn)
+        self.assertTrue(httpd.daemon_threads)
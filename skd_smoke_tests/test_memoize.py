@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from skd_smoke import SmokeTestCase, SimpleSmokeTestCase, memoized, \
+    prepare_test_name
+from skd_smoke.memoize import MemoizedCallback, collect_memoized_callbacks, \
+    prepare_memoized_results
+
+
+def get_article_kwargs(testcase):
+    return {'pk': 1}
+
+
+class MemoizeTestCase(TestCase):
+
+    def test_memoized_callback(self):
+        func = Mock(return_value={'pk': 1})
+        func.__name__ = str('create_article')
+        callback = memoized(func)
+        testcase_mock = Mock(memoized_results={func: {'pk': 2}})
+
+        self.assertIsInstance(callback, MemoizedCallback)
+        self.assertEqual(callback.__name__, 'create_article')
+        self.assertEqual(callback(testcase_mock), {'pk': 2})
+        func.assert_not_called()
+        # result is not stored if callback is not prepared for the class
+        for results in (None, {}):
+            testcase_mock = Mock(memoized_results=results)
+            self.assertEqual(callback(testcase_mock), {'pk': 1})
+            self.assertEqual(results, None if results is None else {})
+        self.assertEqual(func.call_count, 2)
+
+    def test_memoized_callback_keeps_test_name(self):
+        self.assertEqual(
+            prepare_test_name('articles:article', 'GET', 200,
+                              {'url_kwargs': memoized(get_article_kwargs)}),
+            prepare_test_name('articles:article', 'GET', 200,
+                              {'url_kwargs': get_article_kwargs}))
+
+    def test_collect_memoized_callbacks(self):
+        create_owner = memoized(Mock())
+        get_credentials = memoized(Mock())
+        config = [
+            ('a', 200, 'GET', {'url_kwargs': create_owner,
+                               'user_credentials': get_credentials,
+                               'initialize': get_article_kwargs}),
+            ('b', 200, 'GET', {'user_credentials': get_credentials,
+                               'request_data': memoized(create_owner)}),
+            ('c', 200, 'GET', {}),
+        ]
+
+        self.assertEqual(collect_memoized_callbacks(config),
+                         [create_owner, get_credentials])
+
+    def test_prepare_memoized_results(self):
+        create_owner = Mock(return_value={'pk': 1})
+        get_credentials = Mock(return_value={'username': 'owner'})
+        Config = type(str('Config'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (
+                ('a', 200, 'GET', {'url_kwargs': memoized(create_owner)}),
+                ('b', 200, 'GET', {'url_kwargs': memoized(create_owner)}),
+                ('static', 200, 'GET', {'requires_db': False,
+                                        'url_kwargs': get_article_kwargs}),
+            )})
+        ChildConfig = type(str('ChildConfig'), (Config,), {
+            'TESTS_CONFIGURATION': (
+                ('c', 200, 'GET', {'url_kwargs': memoized(create_owner),
+                                   'user_credentials': memoized(
+                                       get_credentials)}),
+            )})
+        ChildConfig.generate_test_methods()
+        Config.database_free_class.generate_test_methods()
+
+        self.assertEqual(len(Config.memoized_callbacks), 1)
+        self.assertEqual(Config.database_free_class.memoized_callbacks, [])
+        prepare_memoized_results(ChildConfig)
+
+        # every function is called once per class
+        create_owner.assert_called_once_with(ChildConfig)
+        get_credentials.assert_called_once_with(ChildConfig)
+        self.assertEqual(ChildConfig.memoized_results, {
+            create_owner: {'pk': 1},
+            get_credentials: {'username': 'owner'}})
+        self.assertIsNone(Config.memoized_results)
+
+    @patch('skd_smoke.prepare_memoized_results')
+    def test_memoized_results_of_class_run(self,
+                                           mock_prepare_memoized_results):
+        Config = type(str('Config'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('a', 200, 'GET'),)})
+        DatabaseFreeConfig = type(str('DatabaseFreeConfig'),
+                                  (SimpleSmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('static', 200, 'GET'),)})
+
+        Config.setUpTestData()
+        mock_prepare_memoized_results.assert_called_once_with(Config)
+        mock_prepare_memoized_results.reset_mock()
+
+        with patch('skd_smoke.forbid_database_access'), \
+                patch('skd_smoke.allow_database_access'):
+            DatabaseFreeConfig.setUpClass()
+            mock_prepare_memoized_results.assert_called_once_with(
+                DatabaseFreeConfig)
+            DatabaseFreeConfig.memoized_results = {}
+            DatabaseFreeConfig.tearDownClass()
+        # results are invalidated after the class run
+        self.assertIsNone(DatabaseFreeConfig.memoized_results)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+from unittest import TestCase, skipIf
+
+from mock import ANY, Mock, patch
+
+from skd_smoke import SmokeTestCase, generate_test_method, memory_budget, \
+    leak_check_value, MEMORY_BUDGET_EXCEEDED_MSG, \
+    LATENCY_BUDGET_EXCEEDED_MSG, TRACED_TIMINGS_MSG
+from skd_smoke.memory import TRACEMALLOC_AVAILABLE, TraceMemoryContext, \
+    LeakCheck, format_memory_statistics
+
+try:
+    import tracemalloc
+except ImportError:  # python < 3.4
+    tracemalloc = None
+
+
+class MemoryTestCase(TestCase):
+
+    @skipIf(not TRACEMALLOC_AVAILABLE, 'tracemalloc is not available')
+    def test_trace_memory_context(self):
+        self.assertFalse(tracemalloc.is_tracing())
+        with TraceMemoryContext() as memory:
+            self.assertTrue(tracemalloc.is_tracing())
+            held = [bytearray(1024) for _ in range(100)]
+            temporary = bytearray(1024 * 1024)
+            del temporary
+        self.assertFalse(tracemalloc.is_tracing())
+
+        self.assertGreater(memory.peak_kb, 1024 + 100)
+        self.assertLess(memory.peak_kb, 2 * 1024)
+        top_statistic = memory.statistics[0]
+        self.assertEqual(top_statistic.traceback[0].filename, __file__)
+        self.assertGreaterEqual(top_statistic.size_diff, 100 * 1024)
+        self.assertIn('%s:' % __file__,
+                      format_memory_statistics(memory.statistics))
+        del held
+
+    @skipIf(not TRACEMALLOC_AVAILABLE, 'tracemalloc is not available')
+    def test_trace_memory_context_keeps_started_tracing(self):
+        tracemalloc.start()
+        try:
+            with TraceMemoryContext():
+                pass
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_budget_requires_tracemalloc(self):
+        self.assertEqual(memory_budget(100), TRACEMALLOC_AVAILABLE)
+        self.assertFalse(memory_budget(0))
+        with patch('skd_smoke.memory.TRACEMALLOC_AVAILABLE', False):
+            self.assertFalse(memory_budget(100))
+
+    @patch('skd_smoke.memory.TraceMemoryContext')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_exceeded_memory_budget(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        memory = mock_context.return_value.__enter__.return_value
+        memory.peak_kb = 150.0
+        memory.statistics = []
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_memory_kb=100)
+        test(testcase_mock)
+
+        testcase_mock.fail.assert_called_once_with(
+            MEMORY_BUDGET_EXCEEDED_MSG % (150, 100, ''))
+
+    @patch('skd_smoke.memory.TraceMemoryContext')
+    @patch('skd_smoke.resolve_url')
+    def test_latency_of_traced_request_is_measured_without_tracing(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        memory = mock_context.return_value.__enter__.return_value
+        memory.peak_kb = 50.0
+        client_mock = Mock(get=Mock(side_effect=[Mock(status_code=200),
+                                                 Mock(status_code=500)]))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_memory_kb=100,
+                                    max_latency_ms=100)
+        # traced request takes 1 second, repeated one takes 50 ms
+        with patch('skd_smoke.default_timer',
+                   side_effect=[0, 1, 2, 2.05]):
+            test(testcase_mock)
+
+        self.assertEqual(client_mock.get.call_count, 2)
+        mock_context.assert_called_once_with()
+        # response of the first request is checked
+        testcase_mock.assertEqual.assert_called_once_with(200, 200)
+        testcase_mock.fail.assert_not_called()
+
+    @patch('skd_smoke.memory.TraceMemoryContext')
+    @patch('skd_smoke.resolve_url')
+    def test_traced_request_with_side_effects_is_not_repeated(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        memory = mock_context.return_value.__enter__.return_value
+        memory.peak_kb = 50.0
+        client_mock = Mock(post=Mock(return_value=Mock(status_code=201)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 201, 'POST',
+                                    max_memory_kb=100, max_latency_ms=100)
+        with patch('skd_smoke.default_timer', side_effect=[0, 1]):
+            test(testcase_mock)
+
+        client_mock.post.assert_called_once_with('/url/', data={})
+        testcase_mock.fail.assert_called_once_with(
+            LATENCY_BUDGET_EXCEEDED_MSG % (1000, 100) + '\n' +
+            TRACED_TIMINGS_MSG % 'POST')
+
+    @patch('skd_smoke.memory.TraceMemoryContext')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_without_memory_budget(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200)
+        test(testcase_mock)
+
+        mock_context.assert_not_called()
+        testcase_mock.fail.assert_not_called()
+
+    @skipIf(not TRACEMALLOC_AVAILABLE, 'tracemalloc is not available')
+    def test_leak_check_detects_leak(self):
+        leaks = []
+
+        def leaking_send():
+            leaks.append(bytearray(4096))
+            return Mock(status_code=200), 1, None
+
+        testcase_mock = Mock(assertEqual=Mock())
+        errors = LeakCheck(iterations=8, warmup=2).run(
+            testcase_mock, leaking_send, 200)
+
+        self.assertEqual(len(leaks), 10)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('%s:' % __file__, errors[0])
+        self.assertEqual(testcase_mock.assertEqual.call_count, 10)
+        self.assertFalse(tracemalloc.is_tracing())
+
+    @skipIf(not TRACEMALLOC_AVAILABLE, 'tracemalloc is not available')
+    def test_leak_check_ignores_one_off_growth(self):
+        cache = {}
+
+        def caching_send():
+            if len(cache) < 6:
+                cache[len(cache)] = bytearray(4096)
+            return Mock(status_code=200), 1, None
+
+        errors = LeakCheck(iterations=8, warmup=2).run(
+            Mock(assertEqual=Mock()), caching_send, 200)
+
+        self.assertEqual(errors, [])
+
+    def test_leak_check_value_requires_tracemalloc(self):
+        self.assertTrue(leak_check_value(False))
+        self.assertEqual(leak_check_value(True), TRACEMALLOC_AVAILABLE)
+        self.assertEqual(leak_check_value(0.5), TRACEMALLOC_AVAILABLE)
+        self.assertFalse(leak_check_value('yes'))
+        with patch('skd_smoke.memory.TRACEMALLOC_AVAILABLE', False):
+            self.assertFalse(leak_check_value(True))
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_leak(self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+        leak_check = Mock(run=Mock(return_value=['first', 'second']))
+
+        test = generate_test_method('urlname', 200, leak_check=leak_check)
+        test(testcase_mock)
+
+        leak_check.run.assert_called_once_with(testcase_mock, ANY, 200)
+        testcase_mock.fail.assert_called_once_with('first\nsecond')
+
+    @patch('skd_smoke.memory.TRACEMALLOC_AVAILABLE', True)
+    def test_leak_check_configuration(self):
+        LeakConfig = type(str('LeakConfig'), (SmokeTestCase,), {
+            'LEAK_CHECK_ITERATIONS': 10,
+            'TESTS_CONFIGURATION': (
+                ('first', 200, 'GET', {'leak_check': True}),
+                ('second', 200, 'GET', {'leak_check': 0.5}),
+                ('third', 200, 'GET'),
+            )})
+
+        with patch('skd_smoke.generate_test_method') as mock_generate:
+            LeakConfig.generate_test_methods()
+
+        leak_checks = [call[1]['leak_check']
+                       for call in mock_generate.call_args_list]
+        self.assertEqual([(check.iterations, check.max_growth_kb)
+                          for check in leak_checks[:2]], [(10, 1), (10, 0.5)])
+        self.assertIsNone(leak_checks[2])
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import io
+import os
+import pstats
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from skd_smoke import generate_test_method, SmokeTestCase, \
+    LATENCY_BUDGET_EXCEEDED_MSG, INCORRECT_BENCHMARK_SETTING_MSG
+from skd_smoke.profiling import PROFILE_SAVED_MSG, PROFILE_ENV_VAR, \
+    ProfileContext, collapse_stats, save_profile
+
+
+def leaf():
+    return sum(range(1000))
+
+
+def branch():
+    return leaf() + leaf()
+
+
+class ProfilingTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_collapse_stats(self):
+        main = ('main.py', 1, 'main')
+        first = ('main.py', 10, 'first')
+        second = ('main.py', 20, 'second')
+        builtin = ('~', 0, '<built-in method sum>')
+        stats = {
+            main: (1, 1, 0.001, 0.010, {}),
+            first: (2, 2, 0.002, 0.006, {main: (1, 1, 0.001, 0.003),
+                                         second: (1, 1, 0.001, 0.003)}),
+            second: (1, 1, 0.001, 0.004, {main: (1, 1, 0.001, 0.004)}),
+            builtin: (2, 2, 0.004, 0.004, {first: (2, 2, 0.004, 0.004)}),
+        }
+
+        self.assertEqual(collapse_stats(stats), [
+            'main (main.py:1) 1000',
+            'main (main.py:1);first (main.py:10) 1000',
+            'main (main.py:1);first (main.py:10);<built-in method sum> 2000',
+            'main (main.py:1);second (main.py:20) 1000',
+            'main (main.py:1);second (main.py:20);first (main.py:10) 1000',
+            'main (main.py:1);second (main.py:20);first (main.py:10);'
+            '<built-in method sum> 2000',
+        ])
+
+    def test_collapse_stats_with_recursion(self):
+        function = ('main.py', 1, 'recursive')
+        stats = {function: (1, 3, 0.003, 0.003, {function: (2, 2, 0, 0)})}
+        self.assertEqual(collapse_stats(stats), [])
+
+        root = ('main.py', 10, 'root')
+        stats[root] = (1, 1, 0, 0.003, {})
+        callers = {function: (2, 2, 0, 0), root: (1, 1, 0.003, 0.003)}
+        stats[function] = (1, 3, 0.003, 0.003, callers)
+        self.assertEqual(collapse_stats(stats), [
+            'root (main.py:10);recursive (main.py:1) 3000'])
+
+    def test_save_profile(self):
+        with ProfileContext() as profile:
+            branch()
+        directory = os.path.join(self.directory, 'profiles')
+
+        stats_path, collapsed_path = save_profile(profile, directory, 'name')
+
+        self.assertEqual(stats_path, os.path.join(directory, 'name.pstats'))
+        functions = [name for _, _, name in pstats.Stats(stats_path).stats]
+        self.assertIn('leaf', functions)
+        with io.open(collapsed_path, encoding='utf-8') as collapsed_file:
+            content = collapsed_file.read()
+        self.assertIn('branch (%s:' % __file__.replace('.pyc', '.py'),
+                      content)
+        # existing directory is reused
+        save_profile(profile, directory, 'name')
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_profiles_slow_request(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+
+        def slow_get(url, data=None):
+            branch()
+            return Mock(status_code=200)
+
+        client_mock = Mock(get=Mock(side_effect=slow_get))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method(
+            'urlname', 200, max_latency_ms=0.000001, result_key='key',
+            profile='slow', profile_dir=self.directory)
+        with patch('skd_smoke.default_timer', side_effect=[0, 1, 1, 2]):
+            test(testcase_mock)
+
+        # request is repeated under profiler
+        self.assertEqual(client_mock.get.call_count, 2)
+        paths = (os.path.join(self.directory, 'key.pstats'),
+                 os.path.join(self.directory, 'key.collapsed'))
+        testcase_mock.fail.assert_called_once_with('%s\n%s' % (
+            LATENCY_BUDGET_EXCEEDED_MSG % (1000, 0.000001),
+            PROFILE_SAVED_MSG % paths))
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_profiles_every_request(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, result_key='key',
+                                    profile='all', profile_dir=self.directory)
+        test(testcase_mock)
+
+        client_mock.get.assert_called_once_with('/url/', data={})
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['key.collapsed', 'key.pstats'])
+        testcase_mock.fail.assert_not_called()
+
+    @patch('skd_smoke.resolve_url')
+    def test_latency_of_profiled_request_is_measured_without_profiler(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method(
+            'urlname', 200, max_latency_ms=100, result_key='key',
+            profile='all', profile_dir=self.directory)
+        # profiled request takes 1 second, repeated one takes 50 ms
+        with patch('skd_smoke.default_timer', side_effect=[0, 1, 2, 2.05]):
+            test(testcase_mock)
+
+        self.assertEqual(client_mock.get.call_count, 2)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         ['key.collapsed', 'key.pstats'])
+        testcase_mock.fail.assert_not_called()
+
+    def test_profile_configuration(self):
+        ProfileConfig = type(str('ProfileConfig'), (SmokeTestCase,), {
+            'PROFILE_DIR': self.directory,
+            'TESTS_CONFIGURATION': (
+                ('first', 200, 'GET', {'profile': True}),
+                ('second', 200, 'GET', {'profile': False}),
+            )})
+
+        with patch.dict(os.environ, {PROFILE_ENV_VAR: 'slow'}), \
+                patch('skd_smoke.generate_test_method') as mock_generate:
+            ProfileConfig.generate_test_methods()
+
+        self.assertEqual([(call[1]['profile'], call[1]['profile_dir'])
+                          for call in mock_generate.call_args_list],
+                         [('all', self.directory), ('slow', self.directory)])
+
+    def test_incorrect_profile_setting(self):
+        ProfileConfig = type(str('ProfileConfig'), (SmokeTestCase,), {
+            'PROFILE': 'fast',
+            'TESTS_CONFIGURATION': (('first', 200, 'GET'),)})
+
+        with patch('skd_smoke.generate_test_method') as mock_generate:
+            ProfileConfig.generate_test_methods()
+
+        mock_generate.assert_not_called()
+        testcase_mock = Mock(spec=ProfileConfig)
+        getattr(ProfileConfig, SmokeTestCase.FAIL_METHOD_NAME)(testcase_mock)
+        self.assertIn(INCORRECT_BENCHMARK_SETTING_MSG % (
+            'PROFILE', PROFILE_ENV_VAR, "'slow' or 'all'", type('fast'),
+            'fast'), testcase_mock.fail.call_args[0][0])
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import sys
+import unittest
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from skd_smoke import SmokeTestCase
+from skd_smoke.runner import split_into_shards, split_smoke_tests, \
+    QueueTestResult, replay_event, RemoteErrorHolder, ParallelSmokeSuite, \
+    RemoteTestError, is_in_memory_db, setup_worker_databases, \
+    teardown_worker_databases
+
+
+class ListQueue(list):
+
+    def put(self, item):
+        self.append(item)
+
+
+class SmokeTestRunnerTestCase(TestCase):
+
+    class ExampleTestCase(TestCase):
+        # is not discovered by test loader cause it's nested
+
+        def test_success(self):
+            pass
+
+        def test_failure(self):
+            self.fail('failure message')
+
+        def test_error(self):
+            raise ValueError('error message')
+
+        @unittest.skip('skip reason')
+        def test_skip(self):
+            pass
+
+    def test_split_into_shards(self):
+        self.assertEqual(split_into_shards(list(range(7)), 3),
+                         [[0, 1, 2], [3, 4], [5, 6]])
+        self.assertEqual(split_into_shards(list(range(2)), 4), [[0], [1]])
+        self.assertEqual(split_into_shards([], 4), [])
+
+    def test_split_smoke_tests(self):
+        SmokeConfig = type(
+            str('SmokeConfig'), (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('a', 200, 'GET'), ('b', 200, 'GET'))})
+        loader = unittest.TestLoader()
+        smoke_suite = loader.loadTestsFromTestCase(SmokeConfig)
+        other_suite = loader.loadTestsFromTestCase(self.ExampleTestCase)
+        suite = unittest.TestSuite([other_suite, smoke_suite])
+
+        smoke_tests, other_tests = split_smoke_tests(suite)
+
+        self.assertEqual(smoke_tests, list(smoke_suite))
+        self.assertEqual(other_tests, list(other_suite))
+
+    def test_is_in_memory_db(self):
+        self.assertTrue(is_in_memory_db(':memory:'))
+        self.assertTrue(is_in_memory_db(
+            'file:memorydb_default?mode=memory&cache=shared'))
+        self.assertFalse(is_in_memory_db('/tmp/test_db.sqlite3'))
+
+    def test_worker_databases_without_keepdb(self):
+        connection = Mock(vendor='postgresql', settings_dict={'NAME': 'test'})
+        with patch('skd_smoke.runner.connections',
+                   {'default': connection}):
+            old_names = setup_worker_databases(2, 0, False)
+        self.assertEqual(old_names, [(connection, 'test')])
+        self.assertEqual(connection.settings_dict['TEST'],
+                         {'NAME': 'test_2'})
+        # keepdb is passed only if it's set cause Django 1.7 lacks it
+        connection.creation.create_test_db.assert_called_once_with(
+            verbosity=0, autoclobber=True)
+
+        teardown_worker_databases(old_names, 0, True)
+        connection.creation.destroy_test_db.assert_called_once_with(
+            'test', 0, keepdb=True)
+
+    def test_queue_test_result_events_replay(self):
+        tests = list(unittest.TestLoader().loadTestsFromTestCase(
+            self.ExampleTestCase))
+        queue = ListQueue()
+        indexes = dict((id(test), index) for index, test in enumerate(tests))
+        unittest.TestSuite(tests).run(QueueTestResult(queue, 1, indexes))
+
+        result = unittest.TestResult()
+        for worker_number, event, index, details in queue:
+            self.assertEqual(worker_number, 1)
+            replay_event(result, tests[index], event, details)
+
+        self.assertEqual(result.testsRun, 4)
+        self.assertEqual(len(result.failures), 1)
+        self.assertIn('failure message', result.failures[0][1])
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn('ValueError: error message', result.errors[0][1])
+        self.assertEqual(len(result.skipped), 1)
+        self.assertEqual(result.skipped[0][1], 'skip reason')
+
+    def test_queue_test_result_error_without_test(self):
+        queue = ListQueue()
+        holder = Mock(__str__=Mock(return_value='setUpClass (module.Class)'))
+        try:
+            raise ValueError('setup error')
+        except ValueError:
+            QueueTestResult(queue, 2, {}).addError(holder, sys.exc_info())
+
+        _, event, index, details = queue[0]
+        self.assertEqual(event, 'addError')
+        self.assertIsNone(index)
+        description, traceback = details
+        self.assertEqual(description, 'setUpClass (module.Class)')
+        self.assertIn('setup error', traceback)
+
+        result = unittest.TestResult()
+        replay_event(result, RemoteErrorHolder(description), event, traceback)
+        self.assertEqual(str(result.errors[0][0]), 'setUpClass (module.Class)')
+
+    def test_parallel_suite_runs_serially_with_one_process(self):
+        smoke_test = Mock(countTestCases=Mock(return_value=1))
+        other_test = Mock(countTestCases=Mock(return_value=1))
+        suite = ParallelSmokeSuite([other_test], [smoke_test], 1)
+        self.assertEqual(suite.countTestCases(), 2)
+        result = unittest.TestResult()
+
+        with patch.object(ParallelSmokeSuite, 'run_workers') as run_workers:
+            suite.run(result)
+
+        run_workers.assert_not_called()
+        other_test.assert_called_once_with(result)
+        smoke_test.assert_called_once_with(result)
+
+    def test_parallel_suite_reports_crashed_worker(self):
+        test = Mock()
+        worker = Mock(exitcode=-9)
+        worker.is_alive.return_value = False
+        workers = {1: (worker, [(0, test)])}
+        result = unittest.TestResult()
+
+        ParallelSmokeSuite([], [test], 2).check_workers(workers, set(), result)
+
+        self.assertEqual(workers, {})
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn(RemoteTestError.__name__, result.errors[0][1])
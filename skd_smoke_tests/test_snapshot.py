@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import os
+import shutil
+import sqlite3
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+from django.core.exceptions import ImproperlyConfigured
+
+from skd_smoke import SmokeTestCase, INCORRECT_SETTING_MSG
+from skd_smoke.snapshot import FixtureSnapshot, INCORRECT_SNAPSHOT_VALUES_MSG
+
+
+class FakeCursor(object):
+    """
+    Cursor of sqlite3 connection with django placeholders.
+    """
+
+    def __init__(self, db):
+        self.cursor = db.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cursor.close()
+
+    def execute(self, sql, params=()):
+        return self.cursor.execute(sql.replace('%s', '?'), params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class FakeConnection(object):
+    vendor = 'sqlite'
+    in_atomic_block = False
+
+    def __init__(self):
+        self.db = self.connection = sqlite3.connect(':memory:',
+                                                    isolation_level=None)
+        self.ops = Mock(quote_name=lambda name: '"%s"' % name)
+
+    def cursor(self):
+        return FakeCursor(self.db)
+
+
+def create_articles(cls):
+    connection = cls.connection
+    connection.db.executemany('INSERT INTO article VALUES (?, ?)',
+                              [(1, 'first'), (2, 'second')])
+    return {'first_pk': 1}
+
+
+class SnapshotTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.connection = FakeConnection()
+        self.connection.db.execute(
+            'CREATE TABLE article (id integer PRIMARY KEY, headline text)')
+        self.connection.db.execute(
+            'CREATE TABLE django_migrations (id integer PRIMARY KEY)')
+        patchers = [
+            patch('skd_smoke.snapshot.connection', self.connection),
+            patch('skd_smoke.snapshot.get_migrations_source',
+                  Mock(return_value='0001_initial')),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def select_articles(self):
+        return self.connection.db.execute(
+            'SELECT * FROM article ORDER BY id').fetchall()
+
+    def test_capture_and_restore(self):
+        builder = Mock(side_effect=create_articles)
+        builder.__name__ = str('create_articles')
+        cls = Mock(connection=self.connection)
+
+        snapshot = FixtureSnapshot(builder, self.directory)
+        snapshot.attach()
+        self.assertFalse(snapshot.attached)
+        self.assertEqual(snapshot.load(cls), {'first_pk': 1})
+        builder.assert_called_once_with(cls)
+        self.assertEqual(os.listdir(self.directory),
+                         [os.path.basename(snapshot.path)])
+
+        # data of builder is rolled back after the class run
+        self.connection.db.execute('DELETE FROM article')
+        self.connection.db.execute('INSERT INTO article VALUES (3, "old")')
+
+        snapshot = FixtureSnapshot(builder, self.directory)
+        snapshot.attach()
+        self.assertTrue(snapshot.attached)
+        self.assertEqual(snapshot.load(cls), {'first_pk': 1})
+        snapshot.detach()
+        self.assertFalse(snapshot.attached)
+        self.assertEqual(builder.call_count, 1)
+        self.assertEqual(self.select_articles(),
+                         [(1, 'first'), (2, 'second')])
+
+    def test_views_are_not_captured(self):
+        self.connection.db.execute(
+            'CREATE VIEW headline AS SELECT headline FROM article')
+        cls = Mock(connection=self.connection)
+        snapshot = FixtureSnapshot(create_articles, self.directory)
+        snapshot.attach()
+        snapshot.load(cls)
+        self.connection.db.execute('DELETE FROM article')
+
+        snapshot = FixtureSnapshot(create_articles, self.directory)
+        snapshot.attach()
+        self.assertEqual(snapshot.load(cls), {'first_pk': 1})
+        snapshot.detach()
+        self.assertEqual(self.connection.db.execute(
+            'SELECT * FROM headline ORDER BY headline').fetchall(),
+            [('first',), ('second',)])
+
+    def test_detach_after_connection_is_closed(self):
+        builder = Mock(side_effect=create_articles)
+        builder.__name__ = str('create_articles')
+        cls = Mock(connection=self.connection)
+        snapshot = FixtureSnapshot(builder, self.directory)
+        snapshot.attach()
+        snapshot.load(cls)
+
+        snapshot = FixtureSnapshot(builder, self.directory)
+        snapshot.attach()
+        self.assertTrue(snapshot.attached)
+        # connection is closed by tearDownClass of TestCase
+        self.connection.connection = None
+        snapshot.detach()
+        self.assertFalse(snapshot.attached)
+
+    def test_outdated_snapshot_is_removed(self):
+        cls = Mock(connection=self.connection)
+        paths = []
+        for key in ('first', 'second'):
+            with patch('skd_smoke.snapshot.prepare_snapshot_key',
+                       Mock(return_value=key)):
+                snapshot = FixtureSnapshot(create_articles, self.directory)
+                snapshot.attach()
+                snapshot.load(cls)
+                paths.append(os.path.basename(snapshot.path))
+            self.connection.db.execute('DELETE FROM article')
+
+        self.assertNotEqual(paths[0], paths[1])
+        self.assertEqual(os.listdir(self.directory), [paths[1]])
+
+    @patch('skd_smoke.snapshot.prepare_snapshot_key',
+           Mock(return_value='current'))
+    def test_current_snapshot_is_not_removed(self):
+        snapshot = FixtureSnapshot(create_articles, self.directory)
+        snapshot.attach()
+        # snapshot is written by other process after attach check
+        other_path = snapshot.path.replace('current', 'outdated')
+        for path in (snapshot.path, other_path):
+            open(path, 'w').close()
+
+        with patch('skd_smoke.snapshot.os.remove',
+                   Mock(wraps=os.remove)) as mock_remove:
+            snapshot.load(Mock(connection=self.connection))
+
+        mock_remove.assert_called_once_with(other_path)
+        self.assertEqual(os.listdir(self.directory),
+                         [os.path.basename(snapshot.path)])
+
+    def test_snapshot_key_depends_on_builder_source(self):
+        def create_nothing(cls):
+            pass
+
+        paths = []
+        for builder in (create_articles, create_nothing):
+            snapshot = FixtureSnapshot(builder, self.directory)
+            snapshot.attach()
+            paths.append(snapshot.path.rsplit('-', 1)[1])
+        self.assertNotEqual(paths[0], paths[1])
+
+    def test_builder_is_called_for_other_backends(self):
+        self.connection.vendor = 'postgresql'
+        cls = Mock(connection=self.connection)
+
+        for _ in range(2):
+            snapshot = FixtureSnapshot(create_articles, self.directory)
+            snapshot.attach()
+            self.assertEqual(snapshot.load(cls), {'first_pk': 1})
+            self.connection.db.execute('DELETE FROM article')
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_incorrect_values_of_builder(self):
+        snapshot = FixtureSnapshot(lambda cls: ['article'], self.directory)
+        snapshot.attach()
+
+        with self.assertRaises(ImproperlyConfigured) as cm:
+            snapshot.load(Mock())
+        self.assertEqual(str(cm.exception), INCORRECT_SNAPSHOT_VALUES_MSG % (
+            list, ['article']))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_snapshot_is_loaded_before_shared_initialize(self):
+        calls = []
+        CorrectConfig = type(str('CorrectConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+            'SHARED_INITIALIZE': lambda cls: calls.append(cls.first_pk)})
+        CorrectConfig.snapshot = Mock()
+        CorrectConfig.snapshot.load.return_value = {'first_pk': 1}
+
+        CorrectConfig.setUpTestData()
+
+        CorrectConfig.snapshot.load.assert_called_once_with(CorrectConfig)
+        self.assertEqual(calls, [1])
+
+    def test_incorrect_snapshot_initialize(self):
+        IncorrectConfig = type(str('IncorrectConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+            'SNAPSHOT_INITIALIZE': 'initialize'})
+        IncorrectConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=IncorrectConfig)
+        getattr(IncorrectConfig, IncorrectConfig.FAIL_METHOD_NAME)(
+            testcase_mock)
+        self.assertIn(INCORRECT_SETTING_MSG % (
+            'SNAPSHOT_INITIALIZE', 'callable', type('initialize'),
+            'initialize'), testcase_mock.fail.call_args[0][0])
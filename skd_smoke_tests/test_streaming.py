@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+import gzip
+import io
+from unittest import TestCase
+
+from mock import MagicMock, Mock, patch
+
+from skd_smoke import generate_test_method, TTFB_BUDGET_EXCEEDED_MSG, \
+    NOT_ENOUGH_CHUNKS_MSG, NOT_STREAMING_RESPONSE_MSG, \
+    RESPONSE_SIZE_EXCEEDED_MSG
+from skd_smoke.streaming import ResponseStats, consume_response, \
+    describe_size
+
+
+def create_response(content=b'', headers=None):
+    headers = headers or {}
+    response = MagicMock(status_code=200, streaming=False, content=content)
+    response.has_header.side_effect = lambda header: header in headers
+    response.get.side_effect = headers.get
+    response.__getitem__.side_effect = headers.__getitem__
+    return response
+
+
+def create_streaming_response(chunks, headers=None):
+    response = create_response(headers=headers)
+    response.streaming = True
+    response.streaming_content = iter(chunks)
+    return response
+
+
+def compress(content):
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb') as gzip_file:
+        gzip_file.write(content)
+    return buffer.getvalue()
+
+
+class StreamingTestCase(TestCase):
+
+    @patch('skd_smoke.streaming.default_timer')
+    def test_consume_streaming_response(self, mock_timer):
+        mock_timer.side_effect = [0.005, 0.02]
+        response = create_streaming_response([b'', b'ab', b'', b'cde'])
+
+        stats = consume_response(response, 0.001)
+
+        self.assertEqual(stats, ResponseStats(True, 4, 19, 2, 5, None, True))
+        response.close.assert_called_once_with()
+
+    @patch('skd_smoke.streaming.default_timer')
+    def test_consume_empty_streaming_response(self, mock_timer):
+        mock_timer.return_value = 0.003
+        response = create_streaming_response([b''])
+
+        stats = consume_response(response, 0.001)
+
+        self.assertEqual(stats, ResponseStats(True, 2, 2, 0, 0, None, True))
+
+    @patch('skd_smoke.streaming.default_timer')
+    def test_consume_usual_response(self, mock_timer):
+        mock_timer.return_value = 0.003
+        response = create_response(b'abc')
+
+        stats = consume_response(response, 0.001)
+
+        self.assertEqual(stats, ResponseStats(False, 2, 2, 1, 3, None, True))
+        response.close.assert_not_called()
+
+    def test_consume_response_with_content_length(self):
+        response = create_response(b'abc', {'Content-Length': '10'})
+        self.assertEqual(consume_response(response, 0).size, 10)
+
+        response = create_streaming_response([b'abc'],
+                                             {'Content-Length': '10'})
+        stats = consume_response(response, 0, max_size=5)
+        self.assertEqual((stats.chunks, stats.size, stats.complete),
+                         (0, 10, True))
+        response.close.assert_called_once_with()
+
+    def test_consume_streaming_response_stops_at_max_size(self):
+        chunks = iter([b'abc', b'def', b'ghi'])
+        response = create_streaming_response(chunks)
+
+        stats = consume_response(response, 0, max_size=5)
+
+        self.assertEqual((stats.chunks, stats.size, stats.complete),
+                         (2, 6, False))
+        self.assertEqual(list(chunks), [b'ghi'])
+        self.assertEqual(describe_size(stats),
+                         'more than 6 bytes (reading was stopped)')
+
+    @patch('skd_smoke.streaming.DECOMPRESSED_BLOCK_SIZE', 100)
+    def test_consume_gzipped_response(self):
+        content = b'a' * 1000
+        compressed = compress(content)
+        response = create_response(compressed, {'Content-Encoding': 'gzip'})
+
+        stats = consume_response(response, 0)
+
+        self.assertEqual(stats.size, len(compressed))
+        self.assertEqual(stats.uncompressed_size, 1000)
+        self.assertEqual(describe_size(stats),
+                         '%s bytes gzipped, 1000 bytes uncompressed' %
+                         len(compressed))
+
+        response = create_streaming_response(
+            [compressed[:10], compressed[10:]], {'Content-Encoding': 'gzip'})
+        self.assertEqual(consume_response(response, 0).uncompressed_size,
+                         1000)
+
+    @patch('skd_smoke.streaming.consume_response')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_exceeded_ttfb_budget(
+            self, mock_django_resolve_url, mock_consume_response):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_consume_response.return_value = ResponseStats(
+            True, 30, 50, 3, 9, None, True)
+        response = create_streaming_response([])
+        client_mock = Mock(get=Mock(return_value=response))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_ttfb_ms=20,
+                                    min_chunks=3)
+        test(testcase_mock)
+
+        testcase_mock.fail.assert_called_once_with(
+            TTFB_BUDGET_EXCEEDED_MSG % (30, 20, 3, 9, 50))
+
+    @patch('skd_smoke.streaming.consume_response')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_not_enough_chunks(
+            self, mock_django_resolve_url, mock_consume_response):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_consume_response.return_value = ResponseStats(
+            True, 30, 50, 1, 9, None, True)
+        response = create_streaming_response([])
+        client_mock = Mock(get=Mock(return_value=response))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_ttfb_ms=40,
+                                    min_chunks=2)
+        test(testcase_mock)
+
+        testcase_mock.fail.assert_called_once_with(
+            NOT_ENOUGH_CHUNKS_MSG % (1, 9, 30, 50, 2))
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_buffered_response(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=create_response(b'abc')))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, min_chunks=2)
+        test(testcase_mock)
+
+        testcase_mock.fail.assert_called_once_with(
+            NOT_STREAMING_RESPONSE_MSG % ('MagicMock', 2))
+
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_exceeded_size_budget(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        response = create_streaming_response([b'abc', b'def', b'ghi'])
+        client_mock = Mock(get=Mock(return_value=response))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_response_bytes=5)
+        test(testcase_mock)
+
+        client_mock.get.assert_called_once_with(
+            '/url/', data={}, HTTP_ACCEPT_ENCODING='gzip')
+        testcase_mock.fail.assert_called_once_with(
+            RESPONSE_SIZE_EXCEEDED_MSG %
+            ('more than 6 bytes (reading was stopped)', 5))
+
+    @patch('skd_smoke.streaming.consume_response')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_does_not_consume_response(
+            self, mock_django_resolve_url, mock_consume_response):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_latency_ms=1000)
+        test(testcase_mock)
+
+        mock_consume_response.assert_not_called()
+        testcase_mock.fail.assert_not_called()
+
+    @patch('skd_smoke.streaming.consume_response')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_repeats_request_the_same_way(
+            self, mock_django_resolve_url, mock_consume_response):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_consume_response.side_effect = [
+            ResponseStats(False, 1, 2, 1, 3, None, True),
+            ResponseStats(False, 4, 5, 1, 3, None, True)]
+        client_mock = Mock(get=Mock(return_value=create_response(b'abc')))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+        leak_check = Mock(run=Mock(return_value=[]))
+
+        test = generate_test_method('urlname', 200, max_response_bytes=5,
+                                    leak_check=leak_check)
+        test(testcase_mock)
+        send = leak_check.run.call_args[0][1]
+        response, elapsed_ms, stats = send()
+
+        self.assertEqual(client_mock.get.call_count, 2)
+        client_mock.get.assert_called_with(
+            '/url/', data={}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(mock_consume_response.call_count, 2)
+        self.assertEqual(mock_consume_response.call_args[0][2], 5)
+        self.assertEqual(elapsed_ms, 5)
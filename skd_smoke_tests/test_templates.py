@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+from unittest import TestCase
+
+from django.test.signals import template_rendered
+from mock import Mock, patch
+
+from skd_smoke import generate_test_method, TEMPLATES_BUDGET_EXCEEDED_MSG, \
+    TEMPLATES_TIME_BUDGET_EXCEEDED_MSG
+from skd_smoke.templates import TemplateRenderContext, \
+    format_template_statistics, UNNAMED_TEMPLATE
+
+
+class FakeTemplate(object):
+    """
+    Renders nested templates and sends ``template_rendered`` signal like
+    instrumented render of test environment does.
+    """
+
+    def __init__(self, name, nested=()):
+        self.name = name
+        self.nested = nested
+
+    def render(self, context):
+        template_rendered.send(sender=self, template=self, context=context)
+        return ''.join([self.name or ''] +
+                       [template.render(context) for template in self.nested])
+
+
+class TemplatesTestCase(TestCase):
+
+    @patch('skd_smoke.templates.default_timer')
+    @patch('skd_smoke.templates.Template', FakeTemplate)
+    def test_template_render_context(self, mock_timer):
+        # base.html starts, two includes take 2 ms each, base.html ends
+        mock_timer.side_effect = [0, 0.001, 0.003, 0.004, 0.006, 0.010,
+                                  0.020, 0.021]
+        original_render = FakeTemplate.__dict__['render']
+        item = FakeTemplate('item.html')
+        page = FakeTemplate('base.html', [item, item])
+        unnamed = FakeTemplate(None)
+
+        with TemplateRenderContext() as templates:
+            self.assertIsNot(FakeTemplate.__dict__['render'],
+                             original_render)
+            self.assertEqual(page.render({}),
+                             'base.htmlitem.htmlitem.html')
+            unnamed.render({})
+        self.assertIs(FakeTemplate.__dict__['render'], original_render)
+        # signal receiver is disconnected
+        page.render({})
+
+        self.assertEqual(templates.count, 4)
+        self.assertAlmostEqual(templates.total_ms, 11)
+        report = templates.get_report()
+        self.assertEqual([statistics['name'] for statistics in report],
+                         ['base.html', 'item.html', UNNAMED_TEMPLATE])
+        self.assertEqual(report[0]['renders'], 1)
+        self.assertAlmostEqual(report[0]['total_ms'], 10)
+        self.assertAlmostEqual(report[0]['own_ms'], 6)
+        self.assertEqual(report[1]['renders'], 2)
+        self.assertAlmostEqual(report[1]['total_ms'], 4)
+        self.assertIn('item.html: 2 renders, 4.00 ms in total, 4.00 ms '
+                      'without nested templates',
+                      format_template_statistics(report))
+
+    @patch('skd_smoke.templates.TemplateRenderContext')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_with_exceeded_templates_budget(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        templates = mock_context.return_value.__enter__.return_value
+        templates.count = 12
+        templates.total_ms = 30.0
+        templates.get_report.return_value = []
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_templates=10)
+        test(testcase_mock)
+        testcase_mock.fail.assert_called_once_with(
+            TEMPLATES_BUDGET_EXCEEDED_MSG % (12, 10, ''))
+
+        testcase_mock.fail.reset_mock()
+        test = generate_test_method('urlname', 200, max_templates=12,
+                                    max_template_ms=20)
+        test(testcase_mock)
+        testcase_mock.fail.assert_called_once_with(
+            TEMPLATES_TIME_BUDGET_EXCEEDED_MSG % (30, 20, ''))
+
+    @patch('skd_smoke.templates.TemplateRenderContext')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_method_without_templates_budget(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200)
+        test(testcase_mock)
+
+        mock_context.assert_not_called()
+        testcase_mock.fail.assert_not_called()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+from unittest import TestCase
+
+from mock import MagicMock, Mock, patch
+from django.core.exceptions import ImproperlyConfigured
+
+from skd_smoke import SmokeTestCase, UserPool, INCORRECT_SETTING_MSG, \
+    BATCH_METHOD_NAME, prepare_test_name, run_directly
+from skd_smoke.users import PooledUsers, INCORRECT_ROLES_MSG, \
+    INCORRECT_POOL_SIZE_MSG, UNKNOWN_ROLE_MSG, POOL_IS_NOT_CREATED_MSG
+
+
+def create_user(username):
+    return Mock(get_username=Mock(return_value=username))
+
+
+class UserPoolTestCase(TestCase):
+
+    def test_incorrect_roles(self):
+        for roles in ([], {}, {'staff': True}):
+            with self.assertRaises(ImproperlyConfigured) as cm:
+                UserPool(roles)
+            self.assertEqual(str(cm.exception),
+                             INCORRECT_ROLES_MSG % (type(roles), roles))
+
+    def test_incorrect_size(self):
+        for size in (0, True, '5'):
+            with self.assertRaises(ImproperlyConfigured) as cm:
+                UserPool({'staff': {'is_staff': True}}, size=size)
+            self.assertEqual(str(cm.exception),
+                             INCORRECT_POOL_SIZE_MSG % (type(size), size))
+
+    def test_credentials_of_unknown_role(self):
+        pool = UserPool({'staff': {'is_staff': True}, 'reader': {}})
+
+        with self.assertRaises(ImproperlyConfigured) as cm:
+            pool.credentials('admin')
+        self.assertEqual(str(cm.exception),
+                         UNKNOWN_ROLE_MSG % ('admin', 'reader, staff'))
+
+    def test_pooled_users_are_handed_out_in_turn(self):
+        staff = [create_user('staff_1'), create_user('staff_2')]
+        pooled_users = PooledUsers({'staff': staff})
+
+        self.assertIs(pooled_users.get('test_a', 'staff'), staff[0])
+        self.assertIs(pooled_users.get('test_b', 'staff'), staff[1])
+        self.assertIs(pooled_users.get('test_c', 'staff'), staff[0])
+        # the same test gets the same user for all its callbacks
+        self.assertIs(pooled_users.get('test_b', 'staff'), staff[1])
+
+    def test_pool_credentials(self):
+        pool = UserPool({'staff': {'is_staff': True}}, password='secret')
+        credentials = pool.credentials('staff')
+        testcase_mock = Mock(
+            _testMethodName='test_a',
+            pooled_users=PooledUsers({'staff': [create_user('staff_1')]}))
+
+        self.assertEqual(credentials(testcase_mock),
+                         {'username': 'staff_1', 'password': 'secret'})
+        self.assertEqual(credentials.__name__, 'staff_credentials')
+
+        # names of tests depend on role only
+        names = [prepare_test_name('a', 'GET', 200, {'user_credentials': c})
+                 for c in (credentials,
+                           UserPool({'staff': {}}).credentials('staff'),
+                           UserPool({'reader': {}}).credentials('reader'))]
+        self.assertEqual(names[0], names[1])
+        self.assertNotEqual(names[0], names[2])
+
+    @patch('skd_smoke.run_in_savepoint', run_directly)
+    @patch('skd_smoke.resolve_url', Mock(return_value='/url/'))
+    def test_requests_of_batch_get_their_own_users(self):
+        pool = UserPool({'staff': {'is_staff': True}, 'reader': {}})
+        BatchConfig = type(str('BatchConfig'), (SmokeTestCase,), {
+            'BATCH': True,
+            'USER_POOL': pool,
+            'TESTS_CONFIGURATION': tuple(
+                ('url%s' % number, 200, 'GET',
+                 {'user_credentials': pool.credentials(role)})
+                for number, role in enumerate(
+                    ('staff', 'reader', 'staff', 'reader')))})
+        BatchConfig.generate_test_methods()
+        client_mock = Mock(login=Mock(return_value=True),
+                           get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = MagicMock(
+            spec=BatchConfig, client=client_mock, assertTrue=Mock(),
+            assertEqual=Mock(), _testMethodName=BATCH_METHOD_NAME,
+            smoke_request_key=None, pooled_users=PooledUsers({
+                'staff': [create_user('staff_1'), create_user('staff_2')],
+                'reader': [create_user('reader_1'),
+                           create_user('reader_2')]}))
+
+        getattr(BatchConfig, BATCH_METHOD_NAME)(testcase_mock)
+
+        self.assertEqual([call[1]['username'] for call in
+                          client_mock.login.call_args_list],
+                         ['staff_1', 'reader_1', 'staff_2', 'reader_2'])
+        testcase_mock.fail.assert_not_called()
+
+    def test_pool_is_not_created(self):
+        pool = UserPool({'staff': {'is_staff': True}})
+        testcase_mock = Mock(pooled_users=None)
+
+        with self.assertRaises(ImproperlyConfigured) as cm:
+            pool.credentials('staff')(testcase_mock)
+        self.assertEqual(str(cm.exception),
+                         POOL_IS_NOT_CREATED_MSG % 'Mock')
+
+    def test_users_are_created_once_per_class(self):
+        pool = Mock(spec=UserPool)
+        shared_initialize = Mock(return_value=None)
+        PoolConfig = type(str('PoolConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+            'USER_POOL': pool,
+            'SHARED_INITIALIZE': lambda cls: shared_initialize(
+                cls.pooled_users)})
+
+        PoolConfig.setUpTestData()
+
+        pool.create_users.assert_called_once_with()
+        # shared initialize can use pooled users
+        shared_initialize.assert_called_once_with(
+            pool.create_users.return_value)
+
+    def test_incorrect_user_pool_setting(self):
+        IncorrectConfig = type(str('IncorrectConfig'), (SmokeTestCase,), {
+            'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+            'USER_POOL': {'staff': {}}})
+        IncorrectConfig.generate_test_methods()
+
+        testcase_mock = Mock(spec=IncorrectConfig)
+        getattr(IncorrectConfig, IncorrectConfig.FAIL_METHOD_NAME)(
+            testcase_mock)
+        self.assertIn(INCORRECT_SETTING_MSG % (
+            'USER_POOL', 'UserPool', dict, {'staff': {}}),
+            testcase_mock.fail.call_args[0][0])
@@ -1,12 +1,15 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals, print_function
+import sys
 import types
+import warnings
+from functools import partial
 from unittest import TestCase
 
 from mock import Mock, patch
 from django.core.exceptions import ImproperlyConfigured
 from django.core.handlers.wsgi import STATUS_CODE_TEXT
-from six import string_types
+from six import string_types, get_function_closure
 
 from skd_smoke import generate_test_method, prepare_test_name, \
     prepare_configuration, generate_fail_test_method, prepare_test_method_doc,\
@@ -15,7 +18,15 @@ from skd_smoke import generate_test_method, prepare_test_name, \
     NOT_REQUIRED_PARAM_TYPE_CHECK, UNSUPPORTED_CONFIGURATION_KEY_MSG, \
     UNKNOWN_HTTP_METHOD_MSG, HTTP_METHODS, LINK_TO_DOCUMENTATION, \
     INCORRECT_REQUIRED_PARAM_TYPE_MSG, REQUIRED_PARAMS, \
-    INCORRECT_NOT_REQUIRED_PARAM_TYPE_MSG
+    INCORRECT_NOT_REQUIRED_PARAM_TYPE_MSG, INCORRECT_USER_CREDENTIALS, \
+    LATENCY_BUDGET_EXCEEDED_MSG, \
+    QUERIES_BUDGET_EXCEEDED_MSG, EXACT_QUERIES_MISMATCH_MSG, \
+    SUSPECTED_N_PLUS_ONE_MSG, fingerprint_query, find_n_plus_one_queries, \
+    format_queries, INCORRECT_SHARED_INITIALIZE_MSG, \
+    INCORRECT_SHARED_OBJECTS_MSG, fast_login, force_login, \
+    prepare_credentials_key, invalidate_resolved_urls, SmokeEntry, \
+    EMPTY_REQUEST_DATA, NO_REQUEST_EXTRA, GZIP_REQUEST_EXTRA, \
+    describe_config_value, POSITIONAL_OPTIONS_DEPRECATED_MSG
 
 
 class SmokeGeneratorTestCase(TestCase):
@@ -65,7 +76,23 @@ class SmokeGeneratorTestCase(TestCase):
             'url_args': 'url_args',  # should be list or callable
             'url_kwargs': 'url_kwargs',  # should be dict or callable
             'request_data': 'request_data',  # should be dict or callable
-            'user_credentials': 'user'  # should be dict or callable
+            'user_credentials': 'user',  # should be dict or callable
+            'max_latency_ms': 'fast',  # should be positive number
+            'max_queries': -1,  # should be non-negative int
+            'exact_queries': 1.5,  # should be non-negative int
+            'load_weight': 0,  # should be positive number
+            'max_memory_kb': -1,  # should be positive number
+            'leak_check': 'yes',  # should be bool or positive number
+            'max_ttfb_ms': 0,  # should be positive number
+            'min_chunks': 0,  # should be positive int
+            'max_response_bytes': 1.5,  # should be positive int
+            'profile': 'yes',  # should be bool
+            'max_templates': -1,  # should be non-negative int
+            'max_template_ms': 0,  # should be positive number
+            'warm_cache_check': 1,  # should be bool
+            'max_warm_queries': -1,  # should be non-negative int
+            'min_cache_speedup': 0,  # should be positive number
+            'requires_db': 'no',  # should be bool
         }
         with self.assertRaises(ImproperlyConfigured) as cm:
             prepare_configuration([
@@ -117,6 +144,275 @@ class SmokeGeneratorTestCase(TestCase):
         self.assertEqual(type(test), types.FunctionType)
         self.assertEqual(test.__name__, 'new_test_method')
 
+    def test_generate_test_method_holds_smoke_entry_only(self):
+        test = generate_test_method('urlname', 200, 'POST', url_args=[1],
+                                    max_response_bytes=1024)
+        closure = get_function_closure(test)
+        self.assertEqual(len(closure), 1)
+
+        entry = closure[0].cell_contents
+        self.assertIsInstance(entry, SmokeEntry)
+        self.assertFalse(hasattr(entry, '__dict__'))
+        self.assertEqual(entry.url_args, (1,))
+        self.assertEqual(entry.url_kwargs, {})
+        self.assertIs(entry.request_data, EMPTY_REQUEST_DATA)
+        self.assertEqual(entry.client_method, 'post')
+        self.assertIs(entry.extra, GZIP_REQUEST_EXTRA)
+        self.assertTrue(entry.consume)
+        self.assertTrue(entry.static_url)
+
+    def test_generate_test_method_with_legacy_positional_options(self):
+        initialize = Mock()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            test = generate_test_method('urlname', 200, 'GET', initialize,
+                                        [1], redirect_to='/to/')
+
+        self.assertEqual(len(caught), 1)
+        self.assertIs(caught[0].category, DeprecationWarning)
+        self.assertEqual(str(caught[0].message),
+                         POSITIONAL_OPTIONS_DEPRECATED_MSG %
+                         'initialize, url_args')
+        entry = get_function_closure(test)[0].cell_contents
+        self.assertIs(entry.initialize, initialize)
+        self.assertEqual(entry.url_args, (1,))
+        self.assertEqual(entry.redirect_to, '/to/')
+
+        with self.assertRaises(TypeError):
+            generate_test_method('urlname', 200, 'GET', None,
+                                 initialize=initialize)
+        with self.assertRaises(TypeError):
+            generate_test_method('urlname', 200, 'GET', None, None, None,
+                                 None, None, None, 1000)
+
+    def test_smoke_entry_with_callable_callbacks(self):
+        def url_kwargs(testcase):
+            return {'pk': 1}
+
+        def request_data(testcase):
+            return {'page': 2}
+
+        entry = SmokeEntry('urlname', 200, url_kwargs=url_kwargs,
+                           request_data=request_data)
+        self.assertIs(entry.url_kwargs, url_kwargs)
+        self.assertIs(entry.request_data, request_data)
+        self.assertIs(entry.extra, NO_REQUEST_EXTRA)
+        self.assertFalse(entry.static_url)
+        self.assertFalse(entry.consume)
+
+    @patch('skd_smoke.default_timer')
+    @patch('skd_smoke.resolve_url')
+    def test_generate_test_method_within_latency_budget(
+            self, mock_django_resolve_url, mock_timer):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_timer.side_effect = [10, 10.05]
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_latency_ms=100)
+        test(testcase_mock)
+
+        testcase_mock.fail.assert_not_called()
+
+    @patch('skd_smoke.default_timer')
+    @patch('skd_smoke.resolve_url')
+    def test_generate_test_method_with_exceeded_latency_budget(
+            self, mock_django_resolve_url, mock_timer):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_timer.side_effect = [10, 10.5]
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, max_latency_ms=100)
+        test(testcase_mock)
+
+        testcase_mock.fail.assert_called_once_with(
+            LATENCY_BUDGET_EXCEEDED_MSG % (500, 100))
+
+    def test_fingerprint_query(self):
+        self.assertEqual(
+            fingerprint_query(
+                'SELECT "a"."id" FROM "a"  WHERE ("a"."id" = 15 AND '
+                '"a"."name" = \'it\'\'s\' AND "a"."b_id" IN (1, 2, 3))'),
+            'SELECT "a"."id" FROM "a" WHERE ("a"."id" = ? AND "a"."name" = ? '
+            'AND "a"."b_id" IN (...))')
+
+    def test_fingerprint_query_with_separated_params(self):
+        self.assertEqual(
+            fingerprint_query(
+                'QUERY = \'SELECT "a"."id" FROM "a" WHERE "a"."id" = %s\' - '
+                'PARAMS = (15,)'),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" = ?')
+
+    def test_find_n_plus_one_queries(self):
+        queries = ['SELECT * FROM "b" WHERE "b"."id" = %s' % i
+                   for i in range(3)]
+        queries += ['SELECT * FROM "a"'] * 3
+        self.assertEqual(
+            find_n_plus_one_queries(queries),
+            [('SELECT * FROM "b" WHERE "b"."id" = ?', 3)])
+        self.assertEqual(find_n_plus_one_queries(queries[:2]), [])
+
+    def run_test_method_with_queries(self, queries, **kwargs):
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+        with patch('skd_smoke.CaptureQueriesContext') as context_mock, \
+                patch('skd_smoke.resolve_url', return_value='/url/'):
+            captured = context_mock.return_value.__enter__.return_value
+            captured.captured_queries = [{'sql': sql, 'time': '0.001'}
+                                         for sql in queries]
+            test = generate_test_method('urlname', 200, **kwargs)
+            test(testcase_mock)
+        return testcase_mock
+
+    def test_generate_test_method_within_queries_budget(self):
+        testcase_mock = self.run_test_method_with_queries(
+            ['SELECT 1'], max_queries=1, exact_queries=1)
+        testcase_mock.fail.assert_not_called()
+
+    def test_generate_test_method_with_exceeded_queries_budget(self):
+        queries = ['SELECT * FROM "b" WHERE "b"."id" = %s' % i
+                   for i in range(4)]
+        testcase_mock = self.run_test_method_with_queries(
+            queries, max_queries=2)
+        testcase_mock.fail.assert_called_once_with(
+            QUERIES_BUDGET_EXCEEDED_MSG % (4, 2, format_queries(queries)))
+        self.assertIn(
+            SUSPECTED_N_PLUS_ONE_MSG % (4, fingerprint_query(queries[0])),
+            testcase_mock.fail.call_args[0][0])
+
+    def test_generate_test_method_with_unexpected_queries_number(self):
+        testcase_mock = self.run_test_method_with_queries(
+            ['SELECT 1'], exact_queries=2)
+        testcase_mock.fail.assert_called_once_with(
+            EXACT_QUERIES_MISMATCH_MSG % (1, 2, format_queries(['SELECT 1'])))
+
+    @patch('skd_smoke.CaptureQueriesContext')
+    @patch('skd_smoke.resolve_url')
+    def test_generate_test_method_without_queries_budget(
+            self, mock_django_resolve_url, mock_context):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200)
+        test(testcase_mock)
+
+        mock_context.assert_not_called()
+
+    @patch('skd_smoke.fast_login')
+    @patch('skd_smoke.resolve_url')
+    def test_generate_test_method_with_fast_auth(
+            self, mock_django_resolve_url, mock_fast_login):
+        mock_django_resolve_url.return_value = '/url/'
+        mock_fast_login.return_value = True
+        credentials = {'username': 'test_user', 'password': '1234'}
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock(),
+                             assertTrue=Mock())
+
+        test = generate_test_method('urlname', 200,
+                                    user_credentials=credentials,
+                                    fast_auth=True)
+        test(testcase_mock)
+
+        mock_fast_login.assert_called_once_with(testcase_mock, credentials)
+        client_mock.login.assert_not_called()
+        testcase_mock.assertTrue.assert_called_once_with(
+            True, INCORRECT_USER_CREDENTIALS % credentials)
+
+    @patch('skd_smoke.resolve_url')
+    def test_generate_test_method_caches_static_url(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200, url_args=[1],
+                                    url_kwargs={'slug': 'slug'})
+        test(testcase_mock)
+        test(testcase_mock)
+
+        mock_django_resolve_url.assert_called_once_with(
+            'urlname', 1, slug='slug')
+        self.assertEqual(client_mock.get.call_count, 2)
+        client_mock.get.assert_called_with('/url/', data={})
+
+        invalidate_resolved_urls(setting='ROOT_URLCONF', value='urls')
+        test(testcase_mock)
+        self.assertEqual(mock_django_resolve_url.call_count, 2)
+
+        invalidate_resolved_urls(setting='DEBUG', value=True)
+        test(testcase_mock)
+        self.assertEqual(mock_django_resolve_url.call_count, 2)
+
+    @patch('skd_smoke.resolve_url')
+    def test_generate_test_method_resolves_callable_url_kwargs_every_time(
+            self, mock_django_resolve_url):
+        mock_django_resolve_url.return_value = '/url/'
+        client_mock = Mock(get=Mock(return_value=Mock(status_code=200)))
+        testcase_mock = Mock(client=client_mock, assertEqual=Mock())
+
+        test = generate_test_method('urlname', 200,
+                                    url_kwargs=lambda testcase: {'pk': 1})
+        test(testcase_mock)
+        test(testcase_mock)
+
+        self.assertEqual(mock_django_resolve_url.call_count, 2)
+        mock_django_resolve_url.assert_called_with('urlname', pk=1)
+
+    def test_prepare_credentials_key(self):
+        self.assertEqual(
+            prepare_credentials_key({'username': 'user', 'password': 1}),
+            prepare_credentials_key({'password': 1, 'username': 'user'}))
+        self.assertNotEqual(
+            prepare_credentials_key({'username': 'user', 'password': 1}),
+            prepare_credentials_key({'username': 'user', 'password': '1'}))
+
+    @patch('skd_smoke.force_login')
+    @patch.dict('sys.modules', {'django.contrib.auth': Mock()})
+    def test_fast_login_authenticates_credentials_once(self, mock_force_login):
+
+        class User(object):
+            _default_manager = Mock()
+            pk = 1
+            password = 'hash'
+            is_active = True
+            backend = 'backend'
+
+        credentials = {'username': 'test_user', 'password': '1234'}
+        user = User()
+        User._default_manager.filter.return_value.first.return_value = user
+        mock_authenticate = sys.modules['django.contrib.auth'].authenticate
+        mock_authenticate.return_value = user
+        testcase_mock = Mock(fast_auth_cache={})
+
+        self.assertTrue(fast_login(testcase_mock, credentials))
+        self.assertTrue(fast_login(testcase_mock, credentials))
+
+        mock_authenticate.assert_called_once_with(**credentials)
+        User._default_manager.filter.assert_called_once_with(pk=1)
+        self.assertEqual(mock_force_login.call_count, 2)
+        mock_force_login.assert_called_with(
+            testcase_mock.client, user, 'backend')
+
+    @patch('skd_smoke.force_login')
+    @patch.dict('sys.modules', {'django.contrib.auth': Mock()})
+    def test_fast_login_with_incorrect_credentials(self, mock_force_login):
+        sys.modules['django.contrib.auth'].authenticate.return_value = None
+        testcase_mock = Mock(fast_auth_cache={})
+
+        self.assertFalse(fast_login(testcase_mock, {'username': 'user'}))
+
+        self.assertEqual(testcase_mock.fast_auth_cache, {})
+        mock_force_login.assert_not_called()
+
+    def test_force_login_with_client_force_login(self):
+        client_mock = Mock()
+        user = Mock()
+        force_login(client_mock, user, 'backend')
+        client_mock.force_login.assert_called_once_with(user, 'backend')
+
     def test_prepare_test_name_with_just_urlname(self):
         test = prepare_test_name('urlname', 'GET', 200)
         name = test[0:test.rfind('_')]
@@ -132,6 +428,64 @@ class SmokeGeneratorTestCase(TestCase):
         name = test[0:test.rfind('_')]
         self.assertEqual(name, 'test_smoke_enclosed_url_get_200')
 
+    def test_prepare_test_name_is_stable(self):
+        def get_request_data(testcase):
+            return {}
+
+        data = {'request_data': get_request_data, 'url_kwargs': {'pk': 1}}
+        name = prepare_test_name('urlname', 'GET', 200, data)
+
+        self.assertEqual(name, prepare_test_name('urlname', 'GET', 200,
+                                                 dict(data)))
+        self.assertEqual(
+            name,
+            prepare_test_name('urlname', 'GET', 200,
+                              dict(data, comment='comment is ignored')))
+        # budgets and checks do not rename test
+        self.assertEqual(
+            name,
+            prepare_test_name('urlname', 'GET', 200,
+                              dict(data, max_latency_ms=100, max_queries=5,
+                                   redirect_to='/to/')))
+        self.assertNotEqual(
+            name,
+            prepare_test_name('urlname', 'GET', 200,
+                              dict(data, url_kwargs={'pk': 2})))
+        self.assertNotEqual(
+            name, prepare_test_name('urlname', 'POST', 200, data))
+
+    def test_prepare_test_name_of_partial_is_stable(self):
+        def get_request_data(testcase, page, per_page=10):
+            return {'page': page, 'per_page': per_page}
+
+        data = {'request_data': partial(get_request_data, 1, per_page=20)}
+        name = prepare_test_name('urlname', 'GET', 200, data)
+
+        self.assertEqual(name, prepare_test_name('urlname', 'GET', 200, {
+            'request_data': partial(get_request_data, 1, per_page=20)}))
+        self.assertNotEqual(name, prepare_test_name('urlname', 'GET', 200, {
+            'request_data': partial(get_request_data, 2, per_page=20)}))
+        self.assertNotEqual(name, prepare_test_name('urlname', 'GET', 200, {
+            'request_data': partial(get_request_data, 1, per_page=50)}))
+        self.assertEqual(
+            describe_config_value(data['request_data']),
+            {'partial': describe_config_value(get_request_data),
+             'args': [1], 'keywords': {'per_page': 20}})
+
+    def test_prepare_test_name_of_callable_instance_is_stable(self):
+        class RequestData(object):
+            def __call__(self, testcase):
+                return {}
+
+        name = prepare_test_name('urlname', 'GET', 200,
+                                 {'request_data': RequestData()})
+
+        self.assertEqual(name, prepare_test_name(
+            'urlname', 'GET', 200, {'request_data': RequestData()}))
+        self.assertEqual(describe_config_value(RequestData()),
+                         describe_config_value(RequestData))
+        self.assertNotIn('object at', describe_config_value(RequestData()))
+
     def test_prepare_test_method_doc(self):
         test = prepare_test_method_doc('GET', 'urlname', 200, 'status_text',
                                        None)
@@ -313,7 +667,7 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         unsupported_keys = set(data.keys()) - \
-                           set(NOT_REQUIRED_PARAM_TYPE_CHECK.keys())
+            set(NOT_REQUIRED_PARAM_TYPE_CHECK.keys())
 
         BrokenConfig = type(
             str('BrokenConfig'),
@@ -359,10 +713,8 @@ class SmokeTestCaseTestCase(TestCase):
             'TestCase should contain at least one generated test method.'
         )
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
-    def test_simple_generated_test_methods(self, mock_django_resolve_url,
-                                           mock_uuid4):
+    def test_simple_generated_test_methods(self, mock_django_resolve_url):
         conf = (
             ('/some_url/', 302, 'GET', {'comment': 'text comment'}),
             ('/comments/', 201, 'POST',
@@ -372,16 +724,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_some_url_get_302_ffffffff',
-            'test_smoke_comments_post_201_ffffffff',
-            'test_smoke_namespace_url_get_200_ffffffff',
-            'test_smoke_some_url2_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -406,10 +753,167 @@ class SmokeTestCaseTestCase(TestCase):
             self.assert_generated_test_method(CorrectConfig, name, conf[i],
                                               expected_docs[i], url)
 
-    @patch('skd_smoke.uuid4')
+    @patch('skd_smoke.default_timer')
+    @patch('skd_smoke.resolve_url')
+    def test_generated_test_methods_with_default_max_latency(
+            self, mock_django_resolve_url, mock_timer):
+        conf = (
+            ('urlname', 200, 'GET', {}),
+            ('urlname', 201, 'GET', {'max_latency_ms': 1000}),
+        )
+
+        mock_django_resolve_url.return_value = '/url/'
+
+        CorrectConfig = type(
+            str('CorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': conf, 'DEFAULT_MAX_LATENCY_MS': 100})
+
+        for status_code, fail_count in ((200, 1), (201, 0)):
+            mock_timer.side_effect = [0, 0.5]
+            test_method = getattr(
+                CorrectConfig,
+                prepare_test_name('urlname', 'GET', status_code,
+                                  conf[status_code - 200][3]))
+            client_mock = Mock(
+                get=Mock(return_value=Mock(status_code=status_code)))
+            testcase_mock = Mock(spec=CorrectConfig, client=client_mock,
+                                 assertEqual=Mock())
+            test_method(testcase_mock)
+            self.assertEqual(testcase_mock.fail.call_count, fail_count)
+
+    @patch('skd_smoke.prepare_configuration')
+    def test_lazy_test_methods_generation(self, mock_prepare_configuration):
+        conf = (('urlname', 200, 'GET'),)
+        mock_prepare_configuration.return_value = [conf[0] + ({},)]
+
+        LazyConfig = type(
+            str('LazyConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': conf})
+        mock_prepare_configuration.assert_not_called()
+        self.assertFalse(
+            self.check_if_class_contains_test_methods(LazyConfig),
+            'Test methods should be generated when class is loaded only.')
+
+        names = dir(LazyConfig)
+        dir(LazyConfig)
+
+        mock_prepare_configuration.assert_called_once_with(conf)
+        self.assertIn(prepare_test_name('urlname', 'GET', 200), names)
+
+    def test_lazy_test_methods_generation_on_attribute_access(self):
+        LazyConfig = type(
+            str('LazyConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('urlname', 200, 'GET'),)})
+        name = prepare_test_name('urlname', 'GET', 200)
+
+        self.assertTrue(callable(getattr(LazyConfig, name)))
+        self.assertFalse(hasattr(LazyConfig, 'test_smoke_not_existing'))
+
+    def test_inherited_test_methods_generation(self):
+        ParentConfig = type(
+            str('ParentConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('parent', 200, 'GET'),)})
+        ChildConfig = type(
+            str('ChildConfig'),
+            (ParentConfig,),
+            {'TESTS_CONFIGURATION': (('child', 200, 'GET'),)})
+
+        names = dir(ChildConfig)
+
+        self.assertIn(prepare_test_name('parent', 'GET', 200), names)
+        self.assertIn(prepare_test_name('child', 'GET', 200), names)
+
+    def test_duplicated_configuration_names(self):
+        conf = (
+            ('urlname', 200, 'GET', {}),
+            ('urlname', 200, 'GET', {'comment': 'the same request'}),
+        )
+        CorrectConfig = type(
+            str('CorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': conf})
+
+        name = prepare_test_name('urlname', 'GET', 200)
+        self.assertTrue(hasattr(CorrectConfig, name))
+        self.assertTrue(hasattr(CorrectConfig, name + '_2'))
+
+    def test_incorrect_shared_initialize(self):
+        BrokenConfig = type(
+            str('BrokenConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+             'SHARED_INITIALIZE': 'initialize'})
+        self.assertFalse(
+            self.check_if_class_contains_test_methods(BrokenConfig),
+            'TestCase contains generated test method but should not '
+            '(SHARED_INITIALIZE is broken).'
+        )
+        self.assert_called_fail_test_method(
+            BrokenConfig,
+            INCORRECT_SHARED_INITIALIZE_MSG % (type('initialize'),
+                                               'initialize'))
+
+    def test_shared_initialize(self):
+        articles = ['article #1', 'article #2']
+        shared_initialize = Mock(return_value={'articles': articles})
+
+        def initialize(cls):
+            return shared_initialize(cls)
+
+        CorrectConfig = type(
+            str('CorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+             'SHARED_INITIALIZE': initialize})
+        CorrectConfig.setUpTestData()
+
+        shared_initialize.assert_called_once_with(CorrectConfig)
+        self.assertIs(CorrectConfig.articles, articles)
+        self.assertFalse(hasattr(SmokeTestCase, 'articles'))
+
+    @patch('django.test.TestCase._fixture_teardown')
+    @patch('django.test.TestCase._fixture_setup')
+    @patch('skd_smoke.TestCase', Mock(spec=[]))
+    def test_shared_initialize_for_every_test_without_setup_test_data(
+            self, mock_fixture_setup, mock_fixture_teardown):
+        shared_initialize = Mock(side_effect=[None, ValueError])
+
+        def initialize(cls):
+            return shared_initialize(cls)
+
+        CorrectConfig = type(
+            str('CorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+             'SHARED_INITIALIZE': initialize})
+        testcase = CorrectConfig('run')
+
+        testcase._fixture_setup()
+        shared_initialize.assert_called_once_with(CorrectConfig)
+        mock_fixture_setup.assert_called_once_with()
+
+        with self.assertRaises(ValueError):
+            testcase._fixture_setup()
+        mock_fixture_teardown.assert_called_once_with()
+
+    def test_shared_initialize_with_incorrect_result(self):
+        CorrectConfig = type(
+            str('CorrectConfig'),
+            (SmokeTestCase,),
+            {'TESTS_CONFIGURATION': (('a', 200, 'GET'),),
+             'SHARED_INITIALIZE': lambda cls: ['article']})
+        with self.assertRaises(ImproperlyConfigured) as cm:
+            CorrectConfig.setUpTestData()
+        self.assertIn(INCORRECT_SHARED_OBJECTS_MSG % (list, ['article']),
+                      str(cm.exception))
+
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_redirect_to_setting(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         redirect_url = '/redirect_url/'
 
@@ -418,13 +922,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_get_302_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -449,10 +951,9 @@ class SmokeTestCaseTestCase(TestCase):
             CorrectConfig, expected_test_method_names[0], conf[0],
             expected_docs[0], url, redirect_to=redirect_url)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_initialize_callable(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         initialize_mock = Mock()
 
@@ -461,13 +962,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_slug_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -494,10 +993,9 @@ class SmokeTestCaseTestCase(TestCase):
 
         self.assertEqual(initialize_mock.call_count, 1)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_url_kwargs_as_dict(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         url_kwargs = {'slug': 'cool_article'}
 
@@ -507,13 +1005,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_slug_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -543,10 +1039,9 @@ class SmokeTestCaseTestCase(TestCase):
         mock_django_resolve_url.assert_called_once_with(
             conf[0][0], **url_kwargs)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_url_kwargs_as_callable(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         url_kwargs = {'slug': 'cool_article'}
 
@@ -559,13 +1054,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_slug_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -595,10 +1088,9 @@ class SmokeTestCaseTestCase(TestCase):
         mock_django_resolve_url.assert_called_once_with(
             conf[0][0], **url_kwargs)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_url_args_as_list(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         url_args = ['arg1']
 
@@ -608,13 +1100,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_arg_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -644,10 +1134,9 @@ class SmokeTestCaseTestCase(TestCase):
         mock_django_resolve_url.assert_called_once_with(
             conf[0][0], *url_args)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_url_args_as_callable(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         url_args = ['arg1']
 
@@ -660,13 +1149,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_arg_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -696,10 +1183,9 @@ class SmokeTestCaseTestCase(TestCase):
         mock_django_resolve_url.assert_called_once_with(
             conf[0][0], *url_args)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_user_credentials_as_dict(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         user_credentials = {'username': 'test_user', 'password': '1234'}
 
@@ -709,13 +1195,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_slug_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -740,10 +1224,9 @@ class SmokeTestCaseTestCase(TestCase):
             CorrectConfig, expected_test_method_names[0], conf[0],
             expected_docs[0], url, user_credentials)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_user_credentials_as_callable(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         user_credentials = {'username': 'test_user', 'password': '1234'}
 
@@ -756,13 +1239,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_urlname_with_slug_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -787,10 +1268,9 @@ class SmokeTestCaseTestCase(TestCase):
             CorrectConfig, expected_test_method_names[0], conf[0],
             expected_docs[0], url, user_credentials)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_request_data_as_dict(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         request_data = {'message': 'new comment'}
 
@@ -803,16 +1283,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_some_url_get_200_ffffffff',
-            'test_smoke_comments_post_201_ffffffff',
-            'test_smoke_namespace_url_get_200_ffffffff',
-            'test_smoke_some_url2_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -837,10 +1312,9 @@ class SmokeTestCaseTestCase(TestCase):
             self.assert_generated_test_method(CorrectConfig, name, conf[i],
                                               expected_docs[i], url)
 
-    @patch('skd_smoke.uuid4')
     @patch('skd_smoke.resolve_url')
     def test_generated_test_method_with_request_data_as_callable(
-            self, mock_django_resolve_url, mock_uuid4):
+            self, mock_django_resolve_url):
 
         request_data = {'message': 'new comment'}
 
@@ -856,16 +1330,11 @@ class SmokeTestCaseTestCase(TestCase):
         )
 
         expected_test_method_names = [
-            'test_smoke_some_url_get_200_ffffffff',
-            'test_smoke_comments_post_201_ffffffff',
-            'test_smoke_namespace_url_get_200_ffffffff',
-            'test_smoke_some_url2_get_200_ffffffff',
-        ]
+            prepare_test_name(c[0], c[2], c[1], c[3]) for c in conf]
 
         expected_docs = self.generate_docs_from_configuration(conf)
 
         mock_django_resolve_url.return_value = url = '/url/'
-        mock_uuid4.return_value = Mock(hex='ffffffff')
 
         CorrectConfig = type(
             str('CorrectConfig'),
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals, print_function
+
+from mock import Mock
+
+
+def create_test_method(name, side_effect=None):
+    """
+    Creates mock of generated smoke test method with its name and doc.
+
+    :param name: name of test method
+    :param side_effect: exception raised or callable called by test method
+    :return: ``Mock`` instance
+    """
+    test_method = Mock(side_effect=side_effect)
+    test_method.__name__ = str(name)
+    test_method.__doc__ = 'GET %s 200 "OK" {}' % name
+    return test_method